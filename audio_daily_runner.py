@@ -4,48 +4,61 @@ Daily runner: scans BASE_DIR/<client>/ATENDIMENTO/ for new audio files,
 transcribes them locally with Whisper, generates a structured report via
 OpenRouter, and POSTs the run summary to the N8N webhook.
 
-Idempotent: skips audio that already has a fresh transcript/report.
+Idempotent: each recording is tracked in a SQLite job table (see
+src/utils/job_queue.py), so only new or failed-and-due jobs are processed.
+
+With --watch it stays resident instead: new recordings are picked up via
+inotify (or polling) as soon as they finish syncing, and the Whisper model is
+kept loaded between files.
 """
+import argparse
 import json
 import logging
 import os
+import signal
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 # Setup project root
 script_dir = Path(__file__).resolve().parent
 sys.path.insert(0, str(script_dir))
 os.chdir(script_dir)
 
-import subprocess
-import tempfile
-
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 from src.config.settings import (
+    AUDIO_COMPACT_ENABLED,
     BASE_DIR,
+    JOB_DB_PATH,
+    METRICS_TEXTFILE_DIR,
     OPENROUTER_API_KEY,
     OPENROUTER_MODEL,
+    SHARED_JOBS_DIR,
+    WATCH_IDLE_UNLOAD_SECONDS,
+    WATCH_POLL_SECONDS,
+    WATCH_SETTLE_SECONDS,
     WHISPER_MODEL,
 )
+from src.utils import audio_transcriber
+from src.utils.audio_compactor import NOT_TRANSCRIBED_YET, OPUS_SUFFIX, compact_batch, ffmpeg_available
 from src.utils.audio_transcriber import (
-    find_audio_files,
     needs_transcription,
     transcribe_and_save,
     transcript_path_for,
+    unload_model,
 )
+from src.utils.audio_watcher import create_watcher
 from src.utils.audio_summarizer import (
     needs_report,
-    report_path_for,
     summarize_and_save,
 )
+from src.utils.job_queue import JobQueue, REPORTED, TRANSCRIBED
+from src.utils.metrics import metrics, profiled
+from src.utils.model_scheduler import ModelScheduler, audio_duration, next_deadline
+from src.utils.shared_jobs import Heartbeat, SharedJobDir, default_worker_id
+from src.utils.webhook import deliver
 
-N8N_WEBHOOK_URL = os.getenv(
-    "WEBHOOK_URL",
-    "https://n8n.srv921079.hstgr.cloud/webhook/b657fab8-c7ff-4a0c-90cc-0b49ce9a7411",
-)
 
 LOG_FILE = script_dir / "audio_daily_runner.log"
 logging.basicConfig(
@@ -64,8 +77,8 @@ def client_folder_for(audio_path: Path) -> str:
     return rel.parts[0] if rel.parts else "(unknown)"
 
 
-def run() -> dict:
-    results = {
+def new_results() -> dict:
+    return {
         "timestamp": datetime.now().isoformat(),
         "base_dir": str(BASE_DIR),
         "whisper_model": WHISPER_MODEL,
@@ -74,96 +87,285 @@ def run() -> dict:
         "reported": [],
         "skipped": [],
         "failures": [],
+        "timings": [],
     }
 
-    audio_files = list(find_audio_files(BASE_DIR))
-    logger.info(f"Found {len(audio_files)} audio file(s) under ATENDIMENTO/ folders")
 
-    for audio in audio_files:
-        client = client_folder_for(audio)
-        rel_audio = audio.relative_to(BASE_DIR)
+def run() -> dict:
+    results = new_results()
+
+    queue = JobQueue(JOB_DB_PATH, BASE_DIR)
+    try:
+        new_jobs = queue.sync()
+        jobs = queue.pending(include_reports=bool(OPENROUTER_API_KEY))
+        logger.info(f"Job queue: {new_jobs} new audio file(s), {len(jobs)} job(s) pending")
+
+        process_jobs(queue, jobs, results)
+        if AUDIO_COMPACT_ENABLED:
+            results["compaction"] = compact_stage(queue)
+        results["queue"] = queue.counts()
+    finally:
+        queue.close()
+
+    return results
+
+
+def compact_stage(queue: JobQueue) -> dict:
+    """Transcode transcribed recordings to Opus and report the bytes saved."""
+    if not ffmpeg_available():
+        logger.warning("AUDIO_COMPACT is on but ffmpeg/ffprobe are not on PATH; skipping")
+        return {"error": "ffmpeg not found"}
+
+    jobs = {str(BASE_DIR / job["path"]): job["path"] for job in queue.compactable(OPUS_SUFFIX)}
+    outcomes = compact_batch(Path(p) for p in jobs)
+    summary = {"compacted": 0, "skipped": 0, "bytes_saved": 0, "errors": []}
+    for outcome in outcomes:
+        rel_audio = jobs[outcome["audio"]]
+        # Kept in the queue so the same file is not transcoded again every night
+        if "error" in outcome:
+            logger.error(f"Compaction failed for {rel_audio}: {outcome['error']}")
+            summary["errors"].append({"audio": rel_audio, "error": outcome["error"]})
+            queue.set_compaction(rel_audio, f"failed: {outcome['error']}")
+        elif "skipped" in outcome:
+            if outcome["skipped"] != NOT_TRANSCRIBED_YET:
+                queue.set_compaction(rel_audio, f"skipped: {outcome['skipped']}")
+                summary["skipped"] += 1
+        elif "bytes_saved" in outcome:
+            queue.rename(rel_audio, Path(outcome["opus"]))
+            summary["compacted"] += 1
+            summary["bytes_saved"] += outcome["bytes_saved"]
+    logger.info(
+        f"Compaction: {summary['compacted']} file(s) to Opus, "
+        f"{summary['bytes_saved'] / (1024 * 1024):.1f} MB saved"
+    )
+    return summary
+
+
+def process_jobs(queue: JobQueue, jobs: list, results: dict, stop: Optional[list] = None):
+    """Process a batch, choosing the Whisper model per file to meet WHISPER_DEADLINE.
 
-        # Stage 1 — transcription
+    Stops between jobs once `stop` is non-empty (set by the SIGTERM handler in
+    watch mode); the jobs left over stay pending in the queue.
+    """
+    scheduler = ModelScheduler(deadline=next_deadline(datetime.now()))
+    backlog = {}
+    for job in jobs:
+        audio = BASE_DIR / job["path"]
         if needs_transcription(audio):
-            try:
-                logger.info(f"Transcribing: {rel_audio}")
-                transcribe_and_save(audio)
-                results["transcribed"].append(str(rel_audio))
-            except Exception as e:
-                logger.exception(f"Transcription failed for {rel_audio}")
-                results["failures"].append({
-                    "audio": str(rel_audio),
-                    "stage": "transcribe",
-                    "error": str(e),
-                })
-                continue
-        else:
-            results["skipped"].append(str(rel_audio))
+            backlog[job["path"]] = audio_duration(audio)
+    results["model_plan"] = {
+        "deadline": scheduler.deadline.isoformat() if scheduler.deadline else None,
+        "backlog_audio_seconds": round(sum(backlog.values()), 1),
+        "estimated_seconds": round(scheduler.estimate(scheduler.ladder[0], sum(backlog.values())), 1),
+    }
 
-        # Stage 2 — summarization (skip if no API key)
-        if not OPENROUTER_API_KEY:
-            continue
+    for index, job in enumerate(jobs):
+        if stop:
+            logger.info(f"Stopping with {len(jobs) - index} job(s) left for the next run")
+            break
+        process_job(queue, job, results, scheduler, backlog)
+    scheduler.save()
 
-        transcript = transcript_path_for(audio)
-        if needs_report(transcript):
-            try:
-                logger.info(f"Summarizing: {rel_audio}")
-                summarize_and_save(transcript, client)
-                results["reported"].append(str(rel_audio))
-            except Exception as e:
-                logger.exception(f"Summarization failed for {rel_audio}")
-                results["failures"].append({
-                    "audio": str(rel_audio),
-                    "stage": "summarize",
-                    "error": str(e),
-                })
 
-    return results
+def process_job(queue: JobQueue, job, results: dict, scheduler: ModelScheduler, backlog: dict):
+    """Run the stages a single job still needs and record the outcome in the queue."""
+    rel_audio = job["path"]
+    audio = BASE_DIR / rel_audio
+
+    # Stage 1 — transcription
+    if needs_transcription(audio):
+        model_name = scheduler.pick(sum(backlog.values()))
+        backlog.pop(rel_audio, None)
+        try:
+            logger.info(f"Transcribing: {rel_audio} (model={model_name})")
+            transcribe_and_save(audio, model_name)
+            timing = audio_transcriber.last_transcription
+            scheduler.record(model_name, timing["audio_seconds"], timing["seconds"] - timing["load_seconds"])
+            results["transcribed"].append(rel_audio)
+            results["timings"].append({"audio": rel_audio, **timing})
+        except Exception as e:
+            logger.exception(f"Transcription failed for {rel_audio}")
+            attempts = queue.mark_failed(rel_audio, "transcribe", str(e))
+            results["failures"].append({
+                "audio": rel_audio,
+                "stage": "transcribe",
+                "error": str(e),
+                "attempts": attempts,
+            })
+            return
+    queue.mark(rel_audio, TRANSCRIBED)
 
+    # Stage 2 — summarization (skip if no API key)
+    if not OPENROUTER_API_KEY:
+        return
 
-def post_to_webhook(data: dict) -> bool:
-    """POST JSON results to N8N webhook via curl (matches existing cron_runner pattern)."""
+    transcript = transcript_path_for(audio)
+    if needs_report(transcript):
+        try:
+            logger.info(f"Summarizing: {rel_audio}")
+            summarize_and_save(transcript, client_folder_for(audio))
+            results["reported"].append(rel_audio)
+        except Exception as e:
+            logger.exception(f"Summarization failed for {rel_audio}")
+            attempts = queue.mark_failed(rel_audio, "summarize", str(e))
+            results["failures"].append({
+                "audio": rel_audio,
+                "stage": "summarize",
+                "error": str(e),
+                "attempts": attempts,
+            })
+            return
+    else:
+        results["skipped"].append(rel_audio)
+    queue.mark(rel_audio, REPORTED)
+
+
+def is_settled(audio: Path) -> bool:
+    """True once the file has not been written for WATCH_SETTLE_SECONDS (sync finished)."""
     try:
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump(data, f, ensure_ascii=False)
-            tmp_path = f.name
-
-        result = subprocess.run(
-            [
-                "curl", "-s", "-w", "%{http_code}",
-                "-X", "POST",
-                "-H", "Content-Type: application/json",
-                "-d", f"@{tmp_path}",
-                "--max-time", "30",
-                N8N_WEBHOOK_URL,
-            ],
-            capture_output=True,
-            text=True,
-            timeout=35,
-        )
-        os.unlink(tmp_path)
-
-        output = result.stdout
-        status_code = output[-3:] if len(output) >= 3 else "000"
-        body = output[:-3]
-
-        if result.returncode == 0 and status_code.startswith("2"):
-            logger.info(f"Webhook POST success: HTTP {status_code}")
-            return True
-        logger.error(
-            f"Webhook POST failed: HTTP {status_code}, "
-            f"curl exit {result.returncode}, body: {body}, stderr: {result.stderr}"
-        )
-        return False
-    except Exception as e:
-        logger.error(f"Webhook POST failed: {e}")
+        return time.time() - audio.stat().st_mtime >= WATCH_SETTLE_SECONDS
+    except FileNotFoundError:
         return False
 
 
-def main():
-    logger.info("=== Audio daily runner started ===")
-    results = run()
+def watch(force_polling: bool = False):
+    """Long-running mode: process recordings as soon as they land and settle."""
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(True))
 
+    watcher = create_watcher(BASE_DIR, force_polling=force_polling)
+    queue = JobQueue(JOB_DB_PATH, BASE_DIR)
+    last_work = time.monotonic()
+    try:
+        while not stop:
+            queue.sync()
+            jobs = queue.pending(include_reports=bool(OPENROUTER_API_KEY))
+            ready = [job for job in jobs if is_settled(BASE_DIR / job["path"])]
+
+            if ready:
+                results = new_results()
+                process_jobs(queue, ready, results, stop)
+                results["queue"] = queue.counts()
+                publish(results)
+                # Each batch's results carry that batch's metrics, not the process lifetime's
+                metrics.reset()
+                last_work = time.monotonic()
+            elif time.monotonic() - last_work > WATCH_IDLE_UNLOAD_SECONDS:
+                unload_model()
+
+            # Recordings still syncing are re-checked once they could have settled
+            timeout = WATCH_SETTLE_SECONDS if len(ready) < len(jobs) else WATCH_POLL_SECONDS
+            watcher.wait(timeout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        queue.close()
+
+
+def distribute() -> dict:
+    """Coordinator: fold finished worker jobs back into the queue and publish new ones."""
+    results = new_results()
+    shared = SharedJobDir(SHARED_JOBS_DIR)
+    queue = JobQueue(JOB_DB_PATH, BASE_DIR)
+    try:
+        done, failed = shared.collect()
+        for record in done:
+            queue.refresh(record["audio"])
+            results["transcribed"].append(record["audio"])
+            if "timing" in record:
+                results["timings"].append({"audio": record["audio"], "worker": record["worker"], **record["timing"]})
+        for record in failed:
+            attempts = queue.mark_failed(record["audio"], record.get("stage", "transcribe"), record["error"])
+            results["failures"].append({
+                "audio": record["audio"],
+                "stage": record.get("stage", "transcribe"),
+                "error": record["error"],
+                "attempts": attempts,
+                "worker": record.get("worker"),
+            })
+
+        queue.sync()
+        enqueued = 0
+        scheduler = ModelScheduler()
+        for job in queue.pending(include_reports=bool(OPENROUTER_API_KEY)):
+            if needs_transcription(BASE_DIR / job["path"]):
+                enqueued += shared.enqueue(job["path"])
+            else:
+                # Only the summary is left (e.g. a worker without an API key
+                # transcribed it): one API call, made here instead of handing
+                # the job back to workers that may never be able to do it
+                process_job(queue, job, results, scheduler, {})
+        logger.info(f"Shared job dir: {enqueued} job(s) published, {len(done)} done, {len(failed)} failed, "
+                    f"{len(results['reported'])} summarized here")
+        results["queue"] = queue.counts()
+        results["shared_jobs"] = shared.counts()
+    finally:
+        queue.close()
+    return results
+
+
+def work(worker_id: str, drain: bool = False):
+    """Worker: claim jobs from the shared directory until stopped (or empty, with drain)."""
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(True))
+    shared = SharedJobDir(SHARED_JOBS_DIR)
+    scheduler = ModelScheduler()
+    logger.info(f"Worker {worker_id} polling {SHARED_JOBS_DIR}")
+
+    try:
+        while not stop:
+            shared.requeue_stale()
+            job = shared.claim(worker_id)
+            if job is None:
+                if drain:
+                    break
+                time.sleep(WATCH_POLL_SECONDS)
+                continue
+
+            audio = BASE_DIR / job["audio"]
+            job["stage"] = "transcribe"
+            try:
+                with Heartbeat(shared, job):
+                    if needs_transcription(audio):
+                        logger.info(f"[{worker_id}] Transcribing: {job['audio']}")
+                        transcribe_and_save(audio)
+                        timing = dict(audio_transcriber.last_transcription)
+                        scheduler.record(timing["model"], timing["audio_seconds"],
+                                         timing["seconds"] - timing["load_seconds"])
+                        job["timing"] = timing
+                    job["stage"] = "summarize"
+                    transcript = transcript_path_for(audio)
+                    if OPENROUTER_API_KEY and needs_report(transcript):
+                        logger.info(f"[{worker_id}] Summarizing: {job['audio']}")
+                        summarize_and_save(transcript, client_folder_for(audio))
+                shared.finish(job)
+            except Exception as e:
+                logger.exception(f"[{worker_id}] {job['stage']} failed for {job['audio']}")
+                shared.finish(job, error=str(e))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.save()
+
+
+def latency_summary(timings: list) -> dict:
+    """Mean wall time per file, split by cold (model loaded for it) and warm."""
+    summary = {}
+    for label, warm in (("cold", False), ("warm", True)):
+        seconds = [t["seconds"] for t in timings if t.get("warm") is warm]
+        if seconds:
+            summary[label] = {
+                "files": len(seconds),
+                "mean_seconds": round(sum(seconds) / len(seconds), 2),
+            }
+    return summary
+
+
+def publish(results: dict):
+    """Log the summary, save it locally and POST it to the webhook."""
+    results["latency"] = latency_summary(results.get("timings", []))
+    results["metrics"] = metrics.to_dict()
     summary = {
         "transcribed": len(results["transcribed"]),
         "reported": len(results["reported"]),
@@ -171,17 +373,73 @@ def main():
         "failures": len(results["failures"]),
     }
     logger.info(f"Summary: {summary}")
+    if results["latency"]:
+        logger.info(f"Per-file latency: {results['latency']}")
 
     results_file = script_dir / "audio_latest_results.json"
     with open(results_file, "w") as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
     logger.info(f"Results saved to {results_file}")
 
-    if post_to_webhook(results):
+    with metrics.span("webhook.post"):
+        posted = deliver(results, "audio_runner")
+    if posted:
         logger.info("Results posted to N8N successfully.")
     else:
-        logger.warning("Failed to post results to N8N (continuing).")
+        logger.warning("Failed to post results to N8N; kept in the outbox for the next run.")
+
+    metrics.write_prometheus(METRICS_TEXTFILE_DIR / "pwa_audio_runner.prom", "audio_runner")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe and summarize ATENDIMENTO recordings")
+    parser.add_argument("--watch", action="store_true",
+                        help="stay resident and process new recordings as they arrive")
+    parser.add_argument("--poll", action="store_true",
+                        help="with --watch: poll instead of using inotify (network/FUSE mounts)")
+    parser.add_argument("--serve", action="store_true",
+                        help="run the warm Whisper model server on WHISPER_SOCKET")
+    parser.add_argument("--distribute", action="store_true",
+                        help="publish pending jobs to SHARED_JOBS_DIR for --worker machines")
+    parser.add_argument("--worker", action="store_true",
+                        help="claim and process jobs from SHARED_JOBS_DIR")
+    parser.add_argument("--worker-id", default=default_worker_id(),
+                        help="name reported in heartbeats (default: hostname-pid)")
+    parser.add_argument("--drain", action="store_true",
+                        help="with --worker: exit once no job is pending")
+    parser.add_argument("--profile", action="store_true",
+                        help="run under cProfile and write audio_daily_runner.prof")
+    args = parser.parse_args()
 
+    with profiled(script_dir / "audio_daily_runner.prof" if args.profile else None):
+        dispatch(args)
+
+
+def dispatch(args):
+    """Run the mode selected on the command line."""
+    if args.worker:
+        work(args.worker_id, drain=args.drain)
+        return
+
+    if args.distribute:
+        logger.info("=== Audio runner distribute started ===")
+        publish(distribute())
+        logger.info("=== Audio runner distribute finished ===")
+        return
+
+    if args.serve:
+        from src.utils.whisper_server import serve
+        serve()
+        return
+
+    if args.watch:
+        logger.info("=== Audio runner watch mode started ===")
+        watch(force_polling=args.poll)
+        logger.info("=== Audio runner watch mode stopped ===")
+        return
+
+    logger.info("=== Audio daily runner started ===")
+    publish(run())
     logger.info("=== Audio daily runner finished ===")
 
 
@@ -0,0 +1,5 @@
+"""
+Benchmarks and synthetic fixtures for the file checks and pipelines.
+
+Run from the project root, e.g. `.venv/bin/python -m benchmarks.bench_file_checks`.
+"""
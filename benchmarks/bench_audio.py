@@ -0,0 +1,205 @@
+"""
+Compare Whisper configurations on this machine before touching `.env`.
+
+    .venv/bin/python -m benchmarks.bench_audio --make-corpus         # synthetic clips (espeak-ng)
+    .venv/bin/python -m benchmarks.bench_audio --models tiny base small \\
+        --compute-types int8 float32 --beams 1 5 --vad on off
+
+The corpus is a directory of short clips, each with its reference transcript
+next to it as `<stem>.txt` (default `benchmarks/audio_corpus/`, not in git —
+never put client recordings there). `--make-corpus` fills it with Portuguese
+sentences spoken by espeak-ng; recorded clips of real (consented, non-client)
+speech give far more meaningful WER numbers.
+
+Every configuration runs in its own process so load time and peak RSS are not
+polluted by the previous model. The table reports load time, RTF (inference
+time / audio duration, load excluded), peak RSS and word error rate, and marks
+the fastest configuration under `--max-wer`.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import re
+import shutil
+import subprocess
+import sys
+import unicodedata
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_CORPUS = BENCH_DIR / 'audio_corpus'
+DEFAULT_OUTPUT = BENCH_DIR / 'whisper_results.md'
+
+# Sentences in the register of an atendimento, for the synthetic corpus
+SENTENCES = [
+    "O cliente trabalhou vinte anos como soldador e quer pedir a aposentadoria especial.",
+    "Precisamos do PPP e do LTCAT da empresa para comprovar a exposição ao ruído.",
+    "O benefício por incapacidade foi negado pelo INSS em março do ano passado.",
+    "Ela contribuiu como autônoma entre dois mil e dez e dois mil e quinze.",
+    "Vamos pedir uma cópia do processo administrativo e do extrato do CNIS.",
+    "A audiência de instrução ficou marcada para o dia quinze de agosto.",
+    "O laudo médico indica perda auditiva bilateral e dor lombar crônica.",
+    "Ele recebe auxílio-acidente desde que sofreu a fratura no braço direito.",
+]
+
+
+def normalize_words(text: str) -> list:
+    """Lowercase, strip accents and punctuation, split into words."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^a-z0-9 ]+', ' ', text).split()
+
+
+def word_errors(reference: str, hypothesis: str) -> tuple:
+    """(edit distance in words, reference word count)."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def make_corpus(corpus: Path):
+    espeak = shutil.which('espeak-ng') or shutil.which('espeak')
+    if not espeak:
+        sys.exit("espeak-ng not found; install it or record clips by hand (see module docstring)")
+    corpus.mkdir(parents=True, exist_ok=True)
+    for index, sentence in enumerate(SENTENCES, 1):
+        clip = corpus / f'sintetico_{index:02d}.wav'
+        subprocess.run([espeak, '-v', 'pt-br', '-s', '150', '-w', str(clip), sentence], check=True)
+        clip.with_suffix('.txt').write_text(sentence + '\n', encoding='utf-8')
+    print(f"Wrote {len(SENTENCES)} clips to {corpus}")
+
+
+def corpus_clips(corpus: Path) -> list:
+    from src.config.settings import AUDIO_EXTENSIONS
+    clips = sorted(
+        p for p in corpus.iterdir()
+        if p.suffix.lower() in AUDIO_EXTENSIONS and p.with_suffix('.txt').exists()
+    )
+    if not clips:
+        sys.exit(f"No clips with reference .txt in {corpus}; try --make-corpus")
+    return clips
+
+
+def run_child(config: dict, clips: list) -> dict:
+    """Transcribe every clip with one configuration (runs in a fresh process)."""
+    from src.utils import audio_transcriber
+    from src.utils.metrics import peak_rss_bytes
+
+    load_seconds = 0.0
+    inference_seconds = 0.0
+    audio_seconds = 0.0
+    texts = {}
+    for clip in clips:
+        result = audio_transcriber.transcribe_local(
+            Path(clip), config['model'], compute_type=config['compute_type'],
+            beam_size=config['beam_size'], vad_filter=config['vad'],
+        )
+        load_seconds += result['load_seconds']
+        inference_seconds += result['seconds'] - result['load_seconds']
+        audio_seconds += result['audio_seconds']
+        texts[clip] = result['text']
+    return {
+        'load_seconds': load_seconds,
+        'inference_seconds': inference_seconds,
+        'audio_seconds': audio_seconds,
+        'peak_rss_mb': peak_rss_bytes() / (1024 * 1024),
+        'texts': texts,
+    }
+
+
+def bench_config(config: dict, clips: list) -> dict:
+    proc = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_audio', '--child', json.dumps(config),
+         *[str(c) for c in clips]],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = (proc.stderr.strip().splitlines() or ['unknown error'])[-1]
+        return dict(config, error=tail)
+    measured = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    errors = words = 0
+    for clip, text in measured.pop('texts').items():
+        e, n = word_errors(Path(clip).with_suffix('.txt').read_text(encoding='utf-8'), text)
+        errors += e
+        words += n
+    audio = measured['audio_seconds'] or 1
+    return dict(
+        config,
+        load_s=round(measured['load_seconds'], 2),
+        rtf=round(measured['inference_seconds'] / audio, 3),
+        peak_mb=round(measured['peak_rss_mb']),
+        wer=round(100 * errors / max(words, 1), 1),
+    )
+
+
+def render_table(rows: list, max_wer: float) -> str:
+    ok = [r for r in rows if 'error' not in r and r['wer'] <= max_wer]
+    best = min(ok, key=lambda r: r['rtf']) if ok else None
+    lines = [
+        '| model | compute_type | beam | vad | load (s) | RTF | peak RSS (MB) | WER (%) |',
+        '|---|---|---|---|---|---|---|---|',
+    ]
+    for r in rows:
+        vad = 'on' if r['vad'] else 'off'
+        if 'error' in r:
+            lines.append(f"| {r['model']} | {r['compute_type']} | {r['beam_size']} | {vad} | error: {r['error']} ||||")
+            continue
+        mark = ' **←**' if r is best else ''
+        lines.append(
+            f"| {r['model']} | {r['compute_type']} | {r['beam_size']} | {vad} | {r['load_s']} | "
+            f"{r['rtf']} | {r['peak_mb']} | {r['wer']}{mark} |"
+        )
+    if best:
+        lines.append(
+            f"\nFastest with WER <= {max_wer}%: WHISPER_MODEL={best['model']} "
+            f"WHISPER_COMPUTE_TYPE={best['compute_type']} WHISPER_BEAM_SIZE={best['beam_size']} "
+            f"WHISPER_VAD={int(best['vad'])}"
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Whisper configurations")
+    parser.add_argument('--corpus', type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument('--make-corpus', action='store_true', help="synthesize clips with espeak-ng and exit")
+    parser.add_argument('--models', nargs='+', default=['tiny', 'base', 'small'])
+    parser.add_argument('--compute-types', nargs='+', default=['int8'])
+    parser.add_argument('--beams', nargs='+', type=int, default=[1, 5])
+    parser.add_argument('--vad', nargs='+', choices=['on', 'off'], default=['on'])
+    parser.add_argument('--max-wer', type=float, default=15.0, help="acceptable WER in %% for the recommendation")
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT, help="markdown table")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('clips', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(json.loads(args.child), args.clips)))
+        return
+    if args.make_corpus:
+        make_corpus(args.corpus)
+        return
+
+    clips = corpus_clips(args.corpus)
+    rows = []
+    for model, compute_type, beam, vad in itertools.product(
+            args.models, args.compute_types, args.beams, args.vad):
+        config = {'model': model, 'compute_type': compute_type, 'beam_size': beam, 'vad': vad == 'on'}
+        print(f"Running {config} over {len(clips)} clips...", flush=True)
+        rows.append(bench_config(config, clips))
+
+    table = render_table(rows, args.max_wer)
+    args.output.write_text(table, encoding='utf-8')
+    print(table)
+    print(f"Table written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
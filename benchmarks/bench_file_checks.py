@@ -0,0 +1,185 @@
+"""
+Benchmark the file checks on a synthetic (or given) BASE_DIR.
+
+    .venv/bin/python -m benchmarks.bench_file_checks                  # compare with baseline
+    .venv/bin/python -m benchmarks.bench_file_checks --save-baseline  # record a new baseline
+    .venv/bin/python -m benchmarks.bench_file_checks --tree /mnt/copy_of_base
+
+Each check runs `--repeat` times on a warm cache and the best wall time is
+kept; a separate run under tracemalloc records peak Python memory (tracemalloc
+slows the code down, so it never feeds the timings). Results are compared
+with the stored baseline and the exit status is 1 when a check got slower or
+hungrier than `--tolerance` allows. Baselines are machine specific: record
+one on the machine that runs the comparison, with the same tree parameters.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.synthetic_tree import generate
+from src.utils.file_operations import FileOperations
+from src.utils.folder_checker import FolderChecker
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline_file_checks.json'
+MIN_SECONDS_DELTA = 0.005  # timings this close are noise, whatever the ratio
+
+
+def _folder_sizes(base: Path):
+    ops = FileOperations(base)
+    ops.get_folder_sizes()
+    return ops.items_scanned
+
+
+def _inactive_folders(base: Path):
+    checker = FolderChecker(base)
+    checker.find_inactive_folders(base / 'AAA --- CONSULTAS')
+    return checker.items_scanned
+
+
+def _nonconforming_names(base: Path):
+    ops = FileOperations(base)
+    ops.check_nonconforming_names()
+    return ops.items_scanned
+
+
+def _file_naming_issues(base: Path):
+    ops = FileOperations(base)
+    ops.check_file_naming_issues()
+    return ops.items_scanned
+
+
+def _file_naming_issues_streamed(base: Path):
+    ops = FileOperations(base)
+    ops.write_file_naming_issues(Path(tempfile.gettempdir()) / 'pwa-bench-naming-issues.jsonl')
+    return ops.items_scanned
+
+
+BENCHMARKS = {
+    'get_folder_sizes': _folder_sizes,
+    'find_inactive_folders': _inactive_folders,
+    'check_nonconforming_names': _nonconforming_names,
+    'check_file_naming_issues': _file_naming_issues,
+    'write_file_naming_issues': _file_naming_issues_streamed,
+}
+
+
+def run_benchmarks(base: Path, repeat: int, only=None) -> dict:
+    results = {}
+    for name, func in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        func(base)  # warm the dentry/inode cache so runs are comparable
+        best = float('inf')
+        items = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            items = func(base)
+            best = min(best, time.perf_counter() - started)
+
+        tracemalloc.start()
+        func(base)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {
+            'seconds': round(best, 4),
+            'items': items,
+            'items_per_s': round(items / best) if best > 0 else None,
+            'peak_kb': round(peak / 1024),
+        }
+        print(f"{name:28s} {best * 1000:9.1f} ms  {items:8d} items  "
+              f"{results[name]['items_per_s'] or 0:10d} items/s  {results[name]['peak_kb']:8d} KiB peak")
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Return human-readable regressions of `current` against `baseline`."""
+    regressions = []
+    if baseline.get('tree') != current.get('tree'):
+        print("warning: baseline was recorded on a different tree; comparison is indicative only")
+    for name, now in current['checks'].items():
+        before = baseline.get('checks', {}).get(name)
+        if not before:
+            continue
+        for key, label in (('seconds', 'time'), ('peak_kb', 'peak memory')):
+            if key == 'seconds' and now[key] - before[key] < MIN_SECONDS_DELTA:
+                continue
+            if before[key] and now[key] > before[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {label} {before[key]} -> {now[key]} (+{(now[key] / before[key] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BASE_DIR file checks")
+    parser.add_argument('--tree', type=Path, help="benchmark an existing tree instead of generating one")
+    parser.add_argument('--clients', type=int, default=300)
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--files-per-client', type=int, default=40)
+    parser.add_argument('--consultas', type=int, default=100)
+    parser.add_argument('--violation-rate', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', choices=sorted(BENCHMARKS), help="run only these checks")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown/memory growth (0.25 = 25%%)")
+    parser.add_argument('--json', type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    workdir = None
+    if args.tree:
+        base, tree = args.tree, {'path': str(args.tree)}
+    else:
+        workdir = Path(tempfile.mkdtemp(prefix='pwa-bench-'))
+        base = workdir / 'base'
+        started = time.perf_counter()
+        summary = generate(base, clients=args.clients, depth=args.depth,
+                           files_per_client=args.files_per_client, consultas=args.consultas,
+                           violation_rate=args.violation_rate, seed=args.seed)
+        tree = summary['params']
+        print(f"Generated {summary['files']} files in {summary['dirs']} dirs "
+              f"in {time.perf_counter() - started:.1f}s at {base}")
+
+    try:
+        current = {
+            'python': platform.python_version(),
+            'machine': platform.node(),
+            'tree': tree,
+            'checks': run_benchmarks(base, args.repeat, args.only),
+        }
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        args.json.write_text(json.dumps(current, indent=2))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return
+
+    regressions = compare(current, json.loads(args.baseline.read_text()), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Regression and speed check for scanify.py against the original full-resolution pipeline.
+
+    .venv/bin/python -m benchmarks.bench_scanify                 # synthetic photos
+    .venv/bin/python -m benchmarks.bench_scanify --photos DIR    # real photos (never commit client photos)
+
+`reference_find_page` / `reference_scan_effect` are frozen copies of the
+implementation before the pyramid path, kept here as ground truth. For every
+photo both pipelines run on the same input; the check fails when the detected
+corners drift more than `--max-corner-px` (in the photo) or the output pages
+differ by more than `--max-mean-diff` grey levels on average. Per-page time of
+each stage is reported side by side, so the speedup is measured, not assumed,
+together with the peak memory of the array allocations made by scan_effect.
+The bytes per page of every output mode (`scanify.OUTPUT_MODES`, plus
+`--target-kb`) are listed at the end.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import scanify  # noqa: E402
+
+
+def reference_find_page(img):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    blur = cv2.GaussianBlur(gray, (5, 5), 0)
+    _, th = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    th = cv2.morphologyEx(th, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
+    th = cv2.morphologyEx(th, cv2.MORPH_OPEN, np.ones((15, 15), np.uint8))
+    contours, _ = cv2.findContours(th, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    c = max(contours, key=cv2.contourArea)
+    if cv2.contourArea(c) < 0.25 * img.shape[0] * img.shape[1]:
+        return None
+    peri = cv2.arcLength(c, True)
+    approx = cv2.approxPolyDP(c, 0.02 * peri, True)
+    if len(approx) == 4:
+        return scanify.order_points(approx.reshape(4, 2).astype("float32"))
+    box = cv2.boxPoints(cv2.minAreaRect(c))
+    return scanify.order_points(box.astype("float32"))
+
+
+def reference_scan_effect(img, strength=1.35):
+    bg = cv2.medianBlur(img, 51)
+    norm = cv2.divide(img.astype(np.float32), bg.astype(np.float32) + 1e-6)
+    norm = np.clip(norm * 255.0, 0, 255)
+    norm = np.clip(norm * (255.0 / 238.0), 0, 255)
+    out = 255.0 - np.clip((255.0 - norm) * strength, 0, 255)
+    out = np.clip(out, 0, 255).astype(np.uint8)
+    blur = cv2.GaussianBlur(out, (0, 0), 1.0)
+    out = cv2.addWeighted(out, 1.4, blur, -0.4, 0)
+    bg_gray = cv2.cvtColor(bg, cv2.COLOR_BGR2GRAY)
+    dark = (bg_gray < 110).astype(np.uint8) * 255
+    dark = cv2.dilate(dark, np.ones((9, 9), np.uint8))
+    out[dark > 0] = (255, 255, 255)
+    m = max(8, out.shape[0] // 150)
+    out = cv2.copyMakeBorder(out[m:-m, m:-m], m, m, m, m,
+                             cv2.BORDER_CONSTANT, value=(255, 255, 255))
+    return out
+
+
+def synthetic_photo(seed: int, width: int = 3000, height: int = 4000):
+    """A printed A4 page photographed on a desk: perspective, uneven light, sensor noise."""
+    rng = np.random.default_rng(seed)
+    page = np.full((1754, 1240, 3), 245, np.uint8)
+    for line in range(38):
+        text = f"Requerimento {seed}-{line} CNIS PPP LTCAT 2025 beneficio"
+        cv2.putText(page, text, (80, 110 + line * 42), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.9, (25, 25, 25), 2, cv2.LINE_AA)
+    cv2.rectangle(page, (80, 1650), (500, 1700), (150, 150, 150), -1)  # grey stamp
+    desk = np.empty((height, width, 3), np.uint8)
+    desk[:] = (55, 70, 95)
+    corners = np.float32([[400, 420], [width - 420, 380], [width - 360, height - 400], [380, height - 430]])
+    corners += rng.uniform(-150, 150, corners.shape).astype(np.float32)
+    matrix = cv2.getPerspectiveTransform(np.float32([[0, 0], [1239, 0], [1239, 1753], [0, 1753]]), corners)
+    photo = cv2.warpPerspective(page, matrix, (width, height), dst=desk, borderMode=cv2.BORDER_TRANSPARENT)
+    light = np.linspace(0.7, 1.05, width, dtype=np.float32)[None, :, None]
+    photo = photo.astype(np.float32) * light + rng.normal(0, 4, photo.shape).astype(np.float32)
+    return np.clip(photo, 0, 255).astype(np.uint8)
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def peak_mb(func, *args):
+    """Peak of the array allocations made by `func` (numpy/OpenCV outputs, not OpenCV internals)."""
+    scanify._buffers.clear()  # count the reused work buffers too
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def compare_photo(img, repeat, modes=(), target_kb=None):
+    ref_quad, t_ref_find = timed(reference_find_page, img, repeat=repeat)
+    quad, t_find = timed(scanify.find_page, img, repeat=repeat)
+    if ref_quad is None or quad is None:
+        return {'detected': (ref_quad is not None, quad is not None)}
+    corner_px = float(np.max(np.linalg.norm(ref_quad - quad, axis=1)))
+
+    warped = scanify.warp_to_a4(img, ref_quad)  # same input for both effects
+    ref_page, t_ref_effect = timed(reference_scan_effect, warped, repeat=repeat)
+    page, t_effect = timed(scanify.scan_effect, warped, repeat=repeat)
+    diff = cv2.absdiff(ref_page, page)
+    sizes = {mode: len(scanify.encode_page(page, mode)) for mode in modes}
+    if target_kb:
+        sizes[f"color <= {target_kb} KB"] = len(scanify.encode_page(page, 'color', target_kb=target_kb))
+    return {
+        'bytes': sizes,
+        'effect_mb': (peak_mb(reference_scan_effect, warped), peak_mb(scanify.scan_effect, warped)),
+        'page_mb': warped.nbytes / (1024 * 1024),
+        'corner_px': corner_px,
+        'mean_diff': float(diff.mean()),
+        'p99_diff': float(np.percentile(diff, 99)),
+        'find': (t_ref_find, t_find),
+        'effect': (t_ref_effect, t_effect),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="scanify regression/speed check")
+    parser.add_argument('--photos', type=Path, help="folder of real photos (default: synthetic)")
+    parser.add_argument('--count', type=int, default=4, help="synthetic photos to generate")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-corner-px', type=float, default=6.0)
+    parser.add_argument('--max-mean-diff', type=float, default=2.0)
+    parser.add_argument('--target-kb', type=int, default=200, help="also size a JPEG searched for this target")
+    args = parser.parse_args()
+    cv2.setNumThreads(1)  # per-page cost as seen by one scanify worker
+    modes = [m for m in scanify.OUTPUT_MODES if m != 'bilevel']
+    try:
+        import PIL  # noqa: F401
+        modes.append('bilevel')
+    except ImportError:
+        print("Pillow not installed, skipping the bilevel (G4) size")
+
+    if args.photos:
+        photos = [(p.name, cv2.imread(str(p))) for p in sorted(args.photos.iterdir()) if scanify.is_image(str(p))]
+    else:
+        photos = [(f"synthetic_{i}", synthetic_photo(i)) for i in range(args.count)]
+
+    failures = []
+    rows = []
+    for name, img in photos:
+        if img is None:
+            continue
+        r = compare_photo(img, args.repeat, modes, args.target_kb)
+        if 'detected' in r:
+            failures.append(f"{name}: page detected by reference/new = {r['detected']}")
+            continue
+        rows.append(r)
+        print(f"{name:20s} corners {r['corner_px']:5.2f}px  diff mean {r['mean_diff']:5.2f} p99 {r['p99_diff']:5.1f}  "
+              f"find {r['find'][0] * 1000:6.0f} -> {r['find'][1] * 1000:5.0f} ms  "
+              f"effect {r['effect'][0] * 1000:6.0f} -> {r['effect'][1] * 1000:5.0f} ms "
+              f"{r['effect_mb'][0]:5.1f} -> {r['effect_mb'][1]:4.1f} MiB")
+        if r['corner_px'] > args.max_corner_px:
+            failures.append(f"{name}: corners moved {r['corner_px']:.1f}px")
+        if r['mean_diff'] > args.max_mean_diff:
+            failures.append(f"{name}: output differs by {r['mean_diff']:.2f} grey levels on average")
+
+    if rows:
+        for stage in ('find', 'effect'):
+            before = statistics.median(r[stage][0] for r in rows)
+            after = statistics.median(r[stage][1] for r in rows)
+            print(f"{stage:7s} median per page: {before * 1000:.0f} ms -> {after * 1000:.0f} ms ({before / after:.1f}x)")
+        before = statistics.median(r['effect_mb'][0] for r in rows)
+        after = statistics.median(r['effect_mb'][1] for r in rows)
+        print(f"effect  peak array memory per page: {before:.1f} MiB -> {after:.1f} MiB "
+              f"(page itself: {rows[0]['page_mb']:.1f} MiB)")
+        print("bytes per page (median):")
+        for mode in rows[0]['bytes']:
+            print(f"  {mode:18s} {statistics.median(r['bytes'][mode] for r in rows) / 1024:7.0f} KB")
+
+    for line in failures:
+        print(f"REGRESSION {line}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
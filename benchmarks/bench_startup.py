@@ -0,0 +1,110 @@
+"""
+Track startup cost of the entry points with `python -X importtime`.
+
+    .venv/bin/python -m benchmarks.bench_startup                  # compare with baseline
+    .venv/bin/python -m benchmarks.bench_startup --save-baseline
+    .venv/bin/python -m benchmarks.bench_startup --top 15         # show the slowest imports
+
+Each command is started with `--help` (parses arguments and exits, so nothing
+touches BASE_DIR or the network). For every command the import time of the
+modules it loads is summed (interpreter `site` setup excluded, since that
+depends on the environment, not on us) and the slowest imports are listed.
+Exits with 1 when a command imports a heavy dependency it does not need
+(`HEAVY_MODULES`) or got slower than `--tolerance` against the baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline_startup.json'
+
+# name -> argv (relative to the project root)
+COMMANDS = {
+    'settings': ['-c', 'import src.config.settings'],
+    'cron': ['pwa.py', 'cron', '--help'],
+    'audio': ['pwa.py', 'audio', '--help'],
+    'search': ['pwa.py', 'search', '--help'],
+}
+
+# Dependencies that only the work itself may import, never startup
+HEAVY_MODULES = {'requests', 'urllib3', 'boto3', 'botocore', 'cv2', 'numpy', 'faster_whisper', 'av', 'cProfile'}
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+MIN_MS_DELTA = 5  # differences below this are noise
+
+
+def measure(argv: list) -> dict:
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', *argv],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    top_level_us = 0
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        modules[name] = self_us
+        if not indent and name != 'site':
+            top_level_us += cumulative_us
+    return {
+        'import_ms': top_level_us / 1000,
+        'modules': modules,
+        'heavy': sorted(HEAVY_MODULES & set(modules)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure entry point import time")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per command (median is kept)")
+    parser.add_argument('--top', type=int, default=0, help="list the N slowest imports per command")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {}
+    failures = []
+    for name, argv in COMMANDS.items():
+        runs = [measure(argv) for _ in range(args.repeat)]
+        import_ms = round(statistics.median(r['import_ms'] for r in runs), 1)
+        heavy = runs[-1]['heavy']
+        results[name] = {'import_ms': import_ms, 'modules': len(runs[-1]['modules'])}
+        print(f"{name:10s} {import_ms:8.1f} ms  {results[name]['modules']:4d} modules"
+              + (f"  HEAVY: {', '.join(heavy)}" if heavy else ''))
+        if heavy:
+            failures.append(f"{name} imports {', '.join(heavy)} at startup")
+        if args.top:
+            slowest = sorted(runs[-1]['modules'].items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+            for module, self_us in slowest:
+                print(f"             {self_us / 1000:7.1f} ms  {module}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        for name, now in results.items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            if (now['import_ms'] - before['import_ms'] >= MIN_MS_DELTA
+                    and now['import_ms'] > before['import_ms'] * (1 + args.tolerance)):
+                failures.append(f"{name}: {before['import_ms']} ms -> {now['import_ms']} ms")
+
+    for line in failures:
+        print(f"REGRESSION {line}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+End-to-end run of the distributed audio flow with several local worker processes.
+
+    .venv/bin/python -m benchmarks.distributed_workers                          # 4 workers, 40 recordings
+    .venv/bin/python -m benchmarks.distributed_workers --workers 8 --recordings 200
+
+A copy of audio_daily_runner.py (it writes its log and results next to
+itself) runs against a temporary BASE_DIR, with local stand-ins for the
+services: a Unix-socket server speaking the warm-model protocol
+(src/utils/whisper_server.py) in place of Whisper, and one HTTP server for
+both the OpenRouter chat endpoint and the N8N webhook. The workers have no
+OPENROUTER_API_KEY and the coordinator does, so the summaries are left to it:
+
+1. `--distribute` publishes every recording to SHARED_JOBS_DIR;
+2. N `--worker --drain` processes transcribe them at the same time;
+3. `--distribute` again collects them and writes the summaries.
+
+Exits 1 unless every recording was transcribed exactly once, every report was
+written, the queue ends all `reported` and the shared job directory is empty.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import socketserver
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+SUBDIRS = ('pending', 'claimed', 'done', 'failed')
+
+
+class StandIns:
+    """Whisper socket and OpenRouter/webhook HTTP stand-ins, counting what they receive."""
+
+    def __init__(self, workdir: Path, seconds_per_file: float):
+        self.transcribed = Counter()
+        self.summaries = 0
+        self.webhook_posts = 0
+        self._lock = threading.Lock()
+        self.socket_path = str(workdir / 'whisper.sock')
+        stand_ins = self
+
+        class Whisper(socketserver.StreamRequestHandler):
+            def handle(self):
+                request = json.loads(self.rfile.readline())
+                with stand_ins._lock:
+                    stand_ins.transcribed[Path(request['audio']).name] += 1
+                time.sleep(seconds_per_file)
+                reply = {'ok': True, 'text': f"Atendimento de teste, {Path(request['audio']).stem}.",
+                         'model': 'stand-in', 'seconds': seconds_per_file, 'load_seconds': 0.0,
+                         'warm': True, 'audio_seconds': 60.0}
+                self.wfile.write(json.dumps(reply).encode() + b'\n')
+
+        class Http(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with stand_ins._lock:
+                    if self.path.endswith('/chat/completions'):
+                        stand_ins.summaries += 1
+                        body = {'choices': [{'message': {'content': '# Relatório de teste'}}]}
+                    else:
+                        stand_ins.webhook_posts += 1
+                        body = {}
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.whisper = socketserver.ThreadingUnixStreamServer(self.socket_path, Whisper)
+        self.http = ThreadingHTTPServer(('127.0.0.1', 0), Http)
+        self.url = f"http://127.0.0.1:{self.http.server_address[1]}"
+        for server in (self.whisper, self.http):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def close(self):
+        for server in (self.whisper, self.http):
+            server.shutdown()
+            server.server_close()
+
+
+def make_recordings(base: Path, recordings: int, clients: int) -> list:
+    names = []
+    old = time.time() - 3600
+    for i in range(recordings):
+        client = i % clients
+        audio = base / f"CLIENTE {client} ({client})" / 'ATENDIMENTO' / f"atendimento_{i:04d}.m4a"
+        audio.parent.mkdir(parents=True, exist_ok=True)
+        audio.write_bytes(os.urandom(4096))
+        os.utime(audio, (old, old))
+        names.append(audio.name)
+    return names
+
+
+def run_runner(app: Path, env: dict, *args) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, str(app / 'audio_daily_runner.py'), *args], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+
+def wait_ok(proc: subprocess.Popen, label: str):
+    _, stderr = proc.communicate()
+    if proc.returncode != 0:
+        sys.exit(f"{label} exited with {proc.returncode}:\n{stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed audio flow with local worker processes")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--recordings', type=int, default=40)
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--seconds-per-file', type=float, default=0.2, help="stand-in transcription time")
+    parser.add_argument('--keep', action='store_true', help="keep the temporary directory")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='pwa-distributed-'))
+    app = workdir / 'app'
+    shutil.copytree(REPO / 'src', app / 'src', ignore=shutil.ignore_patterns('__pycache__'))
+    shutil.copy2(REPO / 'audio_daily_runner.py', app)
+    names = make_recordings(workdir / 'base', args.recordings, args.clients)
+    stand_ins = StandIns(workdir, args.seconds_per_file)
+
+    env = dict(
+        os.environ,
+        BASE_DIR=str(workdir / 'base'),
+        JOB_DB_PATH=str(workdir / 'jobs.db'),
+        SHARED_JOBS_DIR=str(workdir / 'shared_jobs'),
+        SEARCH_INDEX_PATH=str(workdir / 'search_index.db'),
+        WHISPER_SOCKET=stand_ins.socket_path,
+        WHISPER_DEADLINE='',
+        OPENROUTER_BASE_URL=stand_ins.url,
+        WEBHOOK_URL=f"{stand_ins.url}/hook",
+        WEBHOOK_OUTBOX_DIR=str(workdir / 'outbox'),
+        METRICS_TEXTFILE_DIR=str(workdir),
+    )
+    coordinator_env = dict(env, OPENROUTER_API_KEY='stand-in')
+    worker_env = dict(env, OPENROUTER_API_KEY='')
+
+    try:
+        started = time.perf_counter()
+        wait_ok(run_runner(app, coordinator_env, '--distribute'), 'first --distribute')
+        published = sum(1 for _ in (workdir / 'shared_jobs' / 'pending').glob('*.json'))
+
+        workers_started = time.perf_counter()
+        workers = [run_runner(app, worker_env, '--worker', '--drain', '--worker-id', f"worker-{i}")
+                   for i in range(args.workers)]
+        for i, proc in enumerate(workers):
+            wait_ok(proc, f"worker-{i}")
+        workers_seconds = time.perf_counter() - workers_started
+
+        wait_ok(run_runner(app, coordinator_env, '--distribute'), 'second --distribute')
+        total_seconds = time.perf_counter() - started
+
+        results = json.loads((app / 'audio_latest_results.json').read_text(encoding='utf-8'))
+        per_worker = Counter(t.get('worker') for t in results['timings'])
+        with sqlite3.connect(str(workdir / 'jobs.db')) as conn:
+            states = dict(conn.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+        left = {sub: sum(1 for _ in (workdir / 'shared_jobs' / sub).glob('*.json')) for sub in SUBDIRS}
+        reports = sum(1 for _ in (workdir / 'base').rglob('*.relatorio.md'))
+
+        print(f"{args.recordings} recordings, {args.workers} workers, {args.seconds_per_file}s per transcription")
+        print(f"published {published}; workers done in {workers_seconds:.1f}s; total {total_seconds:.1f}s")
+        print(f"jobs per worker: {dict(sorted(per_worker.items()))}")
+        print(f"queue: {states}; shared dir: {left}; reports: {reports}; "
+              f"summaries requested: {stand_ins.summaries}; webhook posts: {stand_ins.webhook_posts}")
+
+        problems = []
+        if published != args.recordings:
+            problems.append(f"published {published} of {args.recordings}")
+        twice = [name for name, n in stand_ins.transcribed.items() if n > 1]
+        missing = [name for name in names if name not in stand_ins.transcribed]
+        if twice or missing:
+            problems.append(f"transcribed twice: {twice[:5]}, never: {missing[:5]}")
+        if states != {'reported': args.recordings}:
+            problems.append(f"queue is not all reported: {states}")
+        if reports != args.recordings or stand_ins.summaries != args.recordings:
+            problems.append(f"{reports} reports, {stand_ins.summaries} summary requests")
+        if any(left.values()):
+            problems.append(f"shared job dir not empty: {left}")
+        if problems:
+            print('FAILED: ' + '; '.join(problems))
+            sys.exit(1)
+        print('OK')
+    finally:
+        stand_ins.close()
+        if args.keep:
+            print(f"kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
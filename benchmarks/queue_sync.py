@@ -0,0 +1,94 @@
+"""
+Regression run of the audio job queue's incremental discovery (src/utils/job_queue.py).
+
+    .venv/bin/python -m benchmarks.queue_sync
+
+A folder's mtime is only trusted once it is a couple of seconds old, and an
+unchanged folder is only descended into through the subfolders the queue
+already knows. This walks a temporary BASE_DIR through the cases that broke
+that before:
+
+1. a month subfolder created (still fresh) under an ATENDIMENTO folder that
+   is already settled, then a second recording added to it, as watch mode
+   sees it;
+2. the same subfolder once it has settled, then a third recording;
+3. a recording re-saved in place (the folder's mtime does not change).
+
+Exits 1 unless every recording is queued by the sync that follows it.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+OLD = time.time() - 3600
+
+
+def settle(*paths: Path):
+    for path in paths:
+        os.utime(path, (OLD, OLD))
+
+
+def main():
+    workdir = Path(tempfile.mkdtemp(prefix='pwa-queue-sync-'))
+    base = workdir / 'base'
+    atendimento = base / 'FULANO (123)' / 'ATENDIMENTO'
+    month = atendimento / '2026-10'
+    month.mkdir(parents=True)
+
+    from src.utils.job_queue import JobQueue
+
+    queue = JobQueue(workdir / 'jobs.db', base)
+    problems = []
+
+    def expect(label: str, new_jobs: int, wanted: int):
+        ok = new_jobs == wanted
+        print(f"{'ok  ' if ok else 'FAIL'} {label}: {new_jobs} new job(s), expected {wanted}")
+        if not ok:
+            problems.append(label)
+
+    try:
+        (month / 'a.mp3').write_bytes(b'a' * 100)
+        settle(atendimento, atendimento.parent)  # the month folder itself stays fresh
+        expect('first recording in a fresh subfolder', queue.sync(), 1)
+        expect('nothing changed', queue.sync(), 0)
+
+        (month / 'b.mp3').write_bytes(b'b' * 100)
+        expect('second recording in the still-fresh subfolder', queue.sync(), 1)
+
+        settle(month)
+        expect('subfolder settled', queue.sync(), 0)
+        (month / 'c.mp3').write_bytes(b'c' * 100)
+        expect('recording added to the settled subfolder', queue.sync(), 1)
+
+        settle(month, month / 'c.mp3')
+        queue.sync()
+        (month / 'c.mp3').write_bytes(b'c' * 200)
+        os.utime(month, (OLD, OLD))
+        queue.sync()
+        row = queue.conn.execute("SELECT size FROM jobs WHERE path LIKE '%c.mp3'").fetchone()
+        size = row['size'] if row else None
+        ok = size == 200
+        print(f"{'ok  ' if ok else 'FAIL'} recording re-saved in place: size {size}, expected 200")
+        if not ok:
+            problems.append('re-saved recording')
+
+        queued = queue.conn.execute('SELECT COUNT(*) AS n FROM jobs').fetchone()['n']
+        if queued != 3:
+            problems.append(f"{queued} jobs queued, expected 3")
+    finally:
+        queue.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if problems:
+        print('FAILED: ' + '; '.join(problems))
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Sharded cron_runner run with local processes, checked against a single-process run.
+
+    .venv/bin/python -m benchmarks.sharded_run                       # 4 shards, 300 clients
+    .venv/bin/python -m benchmarks.sharded_run --shards 8 --clients 2000
+
+A synthetic BASE_DIR (benchmarks/synthetic_tree.py) is checked twice by
+copies of cron_runner.py (it writes its log and results next to itself),
+each posting to a local HTTP stand-in for the N8N webhook:
+
+1. once by a plain `cron_runner.py`, as one machine would;
+2. by N `cron_runner.py --shard i/N` processes at the same time, then
+   `cron_runner.py --merge N`.
+
+Exits 1 unless the merged results match the single run: folder sizes
+(top_10, largest_subfolders), naming-issue counts and samples, the full
+naming_issues.jsonl (as a set of lines; shards write it in shard order),
+the checks that only shard 0 runs, and an empty SHARD_RESULTS_DIR.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from benchmarks.synthetic_tree import generate
+
+REPO = Path(__file__).resolve().parent.parent
+# Checks whose payload must be the same whichever way the tree was walked
+GLOBAL_CHECKS = ('inactive_folders', 'nonconforming_names')
+
+
+class Webhook:
+    """Accepts every POST, so both runs can publish."""
+
+    def __init__(self):
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_app(workdir: Path, name: str, base: Path, webhook: str) -> tuple:
+    """A copy of the runner with its own output paths; returns (app dir, env)."""
+    app = workdir / name
+    shutil.copytree(REPO / 'src', app / 'src', ignore=shutil.ignore_patterns('__pycache__'))
+    shutil.copy2(REPO / 'cron_runner.py', app)
+    env = dict(
+        os.environ,
+        BASE_DIR=str(base),
+        NAMING_ISSUES_REPORT=str(app / 'naming_issues.jsonl'),
+        SIZE_TREE_PATH=str(app / 'size_tree.json.gz'),
+        SIZE_HISTORY_PATH=str(app / 'size_history.db'),
+        SHARD_RESULTS_DIR=str(workdir / 'shard_results'),
+        FILE_LEDGER_PATH=str(app / 'file_ledger.db'),
+        WEBHOOK_URL=webhook,
+        WEBHOOK_OUTBOX_DIR=str(app / 'outbox'),
+        METRICS_TEXTFILE_DIR=str(app),
+        DOCUMENT_SCAN='0',
+        IMAGE_COMPACT='0',
+        ARCHIVE_CONSULTAS='0',
+    )
+    return app, env
+
+
+def run(app: Path, env: dict, *args) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, str(app / 'cron_runner.py'), *args], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+
+def wait_ok(proc: subprocess.Popen, label: str):
+    _, stderr = proc.communicate()
+    if proc.returncode != 0:
+        sys.exit(f"{label} exited with {proc.returncode}:\n{stderr}")
+
+
+def load(app: Path) -> dict:
+    return json.loads((app / 'latest_results.json').read_text(encoding='utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded cron_runner run against a single-process run")
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=300)
+    parser.add_argument('--files-per-client', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help="keep the temporary directory")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='pwa-sharded-'))
+    base = workdir / 'base'
+    generate(base, clients=args.clients, files_per_client=args.files_per_client, seed=args.seed)
+    webhook = Webhook()
+    single_app, single_env = make_app(workdir, 'single', base, webhook.url)
+    sharded_app, sharded_env = make_app(workdir, 'sharded', base, webhook.url)
+
+    try:
+        started = time.perf_counter()
+        wait_ok(run(single_app, single_env), 'single run')
+        single_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        shards = [run(sharded_app, sharded_env, '--shard', f"{i}/{args.shards}") for i in range(args.shards)]
+        for i, proc in enumerate(shards):
+            wait_ok(proc, f"shard {i}")
+        wait_ok(run(sharded_app, sharded_env, '--merge', str(args.shards)), 'merge')
+        sharded_seconds = time.perf_counter() - started
+
+        single, merged = load(single_app)['checks'], load(sharded_app)['checks']
+        print(f"{args.clients} clients, {args.shards} shards: single run {single_seconds:.1f}s, "
+              f"shards + merge {sharded_seconds:.1f}s")
+
+        problems = []
+
+        def expect(label: str, a, b):
+            ok = a == b
+            print(f"{'ok  ' if ok else 'FAIL'} {label}")
+            if not ok:
+                problems.append(f"{label}: single {json.dumps(a)[:200]} vs merged {json.dumps(b)[:200]}")
+
+        for key in ('top_10', 'largest_subfolders'):
+            expect(f"folder_sizes.{key}", single['folder_sizes'].get(key), merged['folder_sizes'].get(key))
+        for key in ('counts', 'samples'):
+            expect(f"file_naming_issues.{key}", single['file_naming_issues'].get(key),
+                   merged['file_naming_issues'].get(key))
+        lines = [sorted((app / 'naming_issues.jsonl').read_text(encoding='utf-8').splitlines())
+                 for app in (single_app, sharded_app)]
+        expect(f"naming_issues.jsonl ({len(lines[0])} lines)", *lines)
+        for name in GLOBAL_CHECKS:
+            strip = ('duration_ms', 'items_scanned', 'errors')
+            expect(name, {k: v for k, v in single[name].items() if k not in strip},
+                   {k: v for k, v in merged[name].items() if k not in strip})
+        left = sorted(p.name for p in (workdir / 'shard_results').iterdir())
+        expect('shard results removed', left, [])
+        errors = {name: check['error'] for name, check in merged.items() if 'error' in check}
+        expect('no check errors', errors, {})
+
+        if problems:
+            print('FAILED:\n  ' + '\n  '.join(problems))
+            sys.exit(1)
+        print('OK')
+    finally:
+        webhook.close()
+        if args.keep:
+            print(f"kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
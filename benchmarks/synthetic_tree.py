@@ -0,0 +1,144 @@
+"""
+Generate a synthetic BASE_DIR that looks like the real client tree.
+
+    .venv/bin/python -m benchmarks.synthetic_tree /tmp/fake_base --clients 500
+
+Layout mirrors production: `<NOME (123)>/` client folders with nested
+subfolders and documents, an `AAA --- CONSULTAS/` with active and idle
+consultation folders, `AAA --- NAO CLIENTE/ZMODELOS|MODELOS`, optional
+`ATENDIMENTO/` recordings, plus a controlled share of naming violations
+(folders without `(number)`, files without extension, `2025.01.`-style
+dates). Files are sparse (truncate), so a tree "holding" many GB costs
+almost no disk and is quick to create. Output is deterministic for a seed.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+FIRST_NAMES = ['JOAO', 'MARIA', 'JOSE', 'ANA', 'ANTONIO', 'FRANCISCA', 'CARLOS', 'PAULO',
+               'LUCIA', 'PEDRO', 'SANDRA', 'MARCOS', 'RAIMUNDA', 'LUIZ', 'TEREZA']
+LAST_NAMES = ['SILVA', 'SANTOS', 'OLIVEIRA', 'SOUZA', 'RODRIGUES', 'FERREIRA', 'ALVES',
+              'PEREIRA', 'LIMA', 'GOMES', 'COSTA', 'RIBEIRO', 'MARTINS', 'CARVALHO']
+SUBFOLDERS = ['DOCUMENTOS', 'PROCESSO', 'CNIS', 'PPP', 'LAUDOS', 'PROCURACAO', 'ATENDIMENTO']
+EXTENSIONS = ['.pdf', '.pdf', '.pdf', '.jpg', '.jpg', '.docx', '.png', '.xlsx', '.m4a']
+DOC_WORDS = ['CNIS', 'RG', 'CPF', 'PPP', 'LTCAT', 'CTPS', 'laudo', 'peticao', 'procuracao', 'comprovante']
+
+DAY = 86400
+
+
+def _client_name(rng: random.Random, index: int, violation_rate: float) -> str:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    if rng.random() < violation_rate:
+        return f"{name} {index}"  # missing the "(number)" suffix
+    return f"{name} ({index})"
+
+
+def _file_name(rng: random.Random, violation_rate: float) -> str:
+    word = rng.choice(DOC_WORDS)
+    ext = rng.choice(EXTENSIONS)
+    if rng.random() >= violation_rate:
+        return f"{word} {rng.randint(1, 9999)}{ext}"
+    kind = rng.randrange(5)
+    if kind == 0:
+        return f"{word}_{rng.randint(1, 9999)}"  # no extension
+    if kind == 1:
+        return f"{rng.randint(2015, 2026)}.01.{word}{ext}"
+    if kind == 2:
+        return f"{rng.randint(2015, 2026)}.01-{word}{ext}"
+    if kind == 3:
+        return f"{word} {rng.randint(2015, 2026)}{ext}"
+    return f"{rng.randint(2015, 2026)}-{word}{ext}"
+
+
+def _file_size(rng: random.Random, median_kb: float) -> int:
+    # Document sizes are roughly log-normal: many small scans, a few huge files
+    return max(1, int(rng.lognormvariate(0, 1.2) * median_kb * 1024))
+
+
+def _touch(path: Path, size: int, mtime: float):
+    with open(path, 'wb') as f:
+        f.truncate(size)
+    os.utime(path, (mtime, mtime))
+
+
+def generate(root: Path, clients: int = 200, depth: int = 2, files_per_client: int = 40,
+             median_kb: float = 300, max_age_days: int = 1500, consultas: int = 50,
+             inactive_ratio: float = 0.3, violation_rate: float = 0.1, seed: int = 42) -> dict:
+    """Build the tree under `root` (must not exist yet). Returns a summary dict."""
+    rng = random.Random(seed)
+    root = Path(root)
+    root.mkdir(parents=True)
+    now = time.time()
+    stats = {'files': 0, 'dirs': 0, 'bytes': 0}
+
+    def add_files(folder: Path, count: int, oldest_days: float, newest_days: float = 0):
+        for _ in range(count):
+            path = folder / _file_name(rng, violation_rate)
+            size = _file_size(rng, median_kb)
+            _touch(path, size, now - rng.uniform(newest_days, oldest_days) * DAY)
+            stats['files'] += 1
+            stats['bytes'] += size
+
+    def add_dir(path: Path):
+        path.mkdir(exist_ok=True)
+        stats['dirs'] += 1
+        return path
+
+    for index in range(1, clients + 1):
+        client = add_dir(root / _client_name(rng, index, violation_rate))
+        folders = [client]
+        for level in range(depth):
+            parent = rng.choice(folders)
+            for name in rng.sample(SUBFOLDERS, k=rng.randint(1, 3)):
+                folders.append(add_dir(parent / (name if level == 0 else f"{name} {level}")))
+        per_folder = max(1, files_per_client // len(folders))
+        for folder in folders:
+            add_files(folder, per_folder, max_age_days)
+
+    consultas_dir = add_dir(root / 'AAA --- CONSULTAS')
+    add_dir(consultas_dir / '#ENCERRADOS')
+    for index in range(1, consultas + 1):
+        folder = add_dir(consultas_dir / f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} ({index})")
+        if rng.random() < inactive_ratio:
+            add_files(folder, rng.randint(1, 8), max_age_days + 800, 731)  # idle > 2 years
+        else:
+            add_files(folder, rng.randint(1, 8), 700)
+
+    nao_cliente = add_dir(root / 'AAA --- NAO CLIENTE')
+    add_files(add_dir(nao_cliente / 'ZMODELOS'), 20, 365)
+    add_dir(nao_cliente / 'MODELOS')
+    add_dir(root / 'AAA --- ARQUIVO MORTO')
+
+    summary = dict(stats, params={
+        'clients': clients, 'depth': depth, 'files_per_client': files_per_client,
+        'median_kb': median_kb, 'max_age_days': max_age_days, 'consultas': consultas,
+        'inactive_ratio': inactive_ratio, 'violation_rate': violation_rate, 'seed': seed,
+    })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic BASE_DIR tree")
+    parser.add_argument('root', type=Path, help="directory to create (must not exist)")
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--depth', type=int, default=2, help="levels of subfolders per client")
+    parser.add_argument('--files-per-client', type=int, default=40)
+    parser.add_argument('--median-kb', type=float, default=300, help="median file size (log-normal)")
+    parser.add_argument('--max-age-days', type=int, default=1500, help="oldest file mtime")
+    parser.add_argument('--consultas', type=int, default=50)
+    parser.add_argument('--inactive-ratio', type=float, default=0.3, help="share of idle CONSULTAS folders")
+    parser.add_argument('--violation-rate', type=float, default=0.1, help="share of badly named items")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    summary = generate(**{k: v for k, v in vars(args).items()})
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
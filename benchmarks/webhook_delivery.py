@@ -0,0 +1,141 @@
+"""
+Webhook delivery (src/utils/webhook.py) against a local http.server stand-in.
+
+    .venv/bin/python -m benchmarks.webhook_delivery
+
+The stand-in decompresses and records every POST. Four phases:
+
+1. it answers 503 once and then 200: `deliver` must succeed after exactly
+   one retry, with a gzip body that decodes to the payload;
+2. it answers only 503: two payloads go to the outbox, the first after
+   WEBHOOK_RETRIES retries and the second queued behind it;
+3. it answers 200 again: the next `deliver` must send the outbox oldest
+   first, then the new payload, and leave the outbox empty;
+4. two payloads are left claimed (`.sending`), one by a runner killed
+   mid-POST long ago and one by a runner still sending: the next `deliver`
+   must re-send the abandoned one before its own and leave the other alone.
+
+The 503s carry `Retry-After: 1`, so urllib3 waits one second instead of the
+4s/8s backoff and the run takes a few seconds. Exits 1 on any mismatch.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+class StandIn:
+    """Answers each POST with the next status in `statuses` (the last one repeats)."""
+
+    def __init__(self):
+        self.statuses = [200]
+        self.received = []  # (status answered, Content-Encoding, decoded payload)
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                encoding = self.headers.get('Content-Encoding')
+                if encoding == 'gzip':
+                    body = gzip.decompress(body)
+                with stand_in._lock:
+                    status = stand_in.statuses.pop(0) if len(stand_in.statuses) > 1 else stand_in.statuses[0]
+                    stand_in.received.append((status, encoding, json.loads(body)))
+                self.send_response(status)
+                if status == 503:
+                    self.send_header('Retry-After', '1')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def answer(self, *statuses: int):
+        with self._lock:
+            self.statuses = list(statuses)
+            self.received = []
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    workdir = Path(tempfile.mkdtemp(prefix='pwa-webhook-'))
+    outbox = workdir / 'outbox'
+    # Settings are read on import, so the environment goes first
+    os.environ.update(WEBHOOK_OUTBOX_DIR=str(outbox), WEBHOOK_GZIP='1')
+    from src.config.settings import WEBHOOK_RETRIES
+    from src.utils.webhook import _SENDING_STALE_SECONDS, deliver
+
+    stand_in = StandIn()
+    problems = []
+
+    def expect(label: str, ok: bool, detail):
+        print(f"{'ok  ' if ok else 'FAIL'} {label}: {detail}")
+        if not ok:
+            problems.append(label)
+
+    try:
+        stand_in.answer(503, 200)
+        delivered = deliver({'run': 1}, 'bench', stand_in.url)
+        statuses = [status for status, _, _ in stand_in.received]
+        expect('503 then 200 is delivered', delivered, delivered)
+        expect('one retry', statuses == [503, 200], statuses)
+        expect('gzip body', all(enc == 'gzip' and data == {'run': 1} for _, enc, data in stand_in.received),
+               [(enc, data) for _, enc, data in stand_in.received])
+
+        stand_in.answer(503)
+        first = deliver({'run': 2}, 'bench', stand_in.url)
+        attempts = len(stand_in.received)
+        second = deliver({'run': 3}, 'bench', stand_in.url)
+        queued = sorted(p.name for p in outbox.glob('*.json'))
+        expect('endpoint down keeps both payloads', not first and not second and len(queued) == 2, queued)
+        expect(f'{WEBHOOK_RETRIES} retries per delivery', attempts == WEBHOOK_RETRIES + 1, attempts)
+        expect('queued behind the backlog without its own retries',
+               [data for _, _, data in stand_in.received[attempts:]] == [{'run': 2}] * (WEBHOOK_RETRIES + 1),
+               [data for _, _, data in stand_in.received[attempts:]])
+
+        stand_in.answer(200)
+        delivered = deliver({'run': 4}, 'bench', stand_in.url)
+        order = [data['run'] for _, _, data in stand_in.received]
+        expect('recovered endpoint gets the outbox in order', delivered and order == [2, 3, 4], order)
+        left = sorted(p.name for p in outbox.iterdir()) if outbox.is_dir() else []
+        expect('outbox drained', not left, left)
+
+        stand_in.answer(200)
+        claims = {}
+        for run, age in ((5, _SENDING_STALE_SECONDS + 60), (6, 0)):
+            claims[run] = outbox / f"{time.time_ns()}-bench.sending"
+            claims[run].write_text(json.dumps({'url': stand_in.url, 'payload': {'run': run}}), encoding='utf-8')
+            os.utime(claims[run], (time.time() - age,) * 2)
+        delivered = deliver({'run': 7}, 'bench', stand_in.url)
+        order = [data['run'] for _, _, data in stand_in.received]
+        expect('abandoned claim re-sent first, live claim left alone', delivered and order == [5, 7], order)
+        left = sorted(p.name for p in outbox.iterdir())
+        expect('only the live claim is left', left == [claims[6].name], left)
+    finally:
+        stand_in.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if problems:
+        print('FAILED: ' + '; '.join(problems))
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
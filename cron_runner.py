@@ -1,28 +1,36 @@
 #!/usr/bin/env python3
 """
 Cron runner: executes PWA file checks, collects results as JSON,
-and POSTs them to the N8N webhook.
+and POSTs them to the N8N webhook (WEBHOOK_URL).
+
+On a tree too large for one machine, run `--shard i/N` on N machines (each
+walks its share of the client folders and writes a partial result to
+SHARD_RESULTS_DIR) and `--merge N` on one of them, which combines the
+partials and posts once (see src/utils/sharding.py).
 """
 import os
 import sys
 import json
+import argparse
 import logging
 from pathlib import Path
-from datetime import datetime
 
 # Setup project root
 script_dir = Path(__file__).resolve().parent
 sys.path.insert(0, str(script_dir))
 os.chdir(script_dir)
 
-import requests
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-from src.utils.folder_checker import FolderChecker
-from src.utils.file_operations import FileOperations
-from src.config.settings import BASE_DIR, CONSULTAS_DIR, AUTOREMOVE_DIRS
-
-N8N_WEBHOOK_URL = "https://n8n.srv921079.hstgr.cloud/webhook/b657fab8-c7ff-4a0c-90cc-0b49ce9a7411"
+from src.config.settings import (
+    METRICS_TEXTFILE_DIR,
+    RESULTS_FULL_SNAPSHOT_DAYS,
+    SHARD_RESULTS_DIR,
+    validate_paths,
+)
+from src.utils.check_runner import merge_shards, run_checks
+from src.utils.metrics import metrics, profiled
+from src.utils.results_diff import build_payload
+from src.utils.sharding import Shard, remove_partials, wait_for_partials, write_partial
+from src.utils.webhook import deliver
 
 LOG_FILE = script_dir / "cron_runner.log"
 logging.basicConfig(
@@ -32,128 +40,99 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+RESULTS_FILE = script_dir / "latest_results.json"
 
-def run_checks() -> dict:
-    """Run all checks and return structured results (mirrors src/main.py)."""
-    folder_checker = FolderChecker(BASE_DIR)
-    file_ops = FileOperations(BASE_DIR)
-
-    results = {
-        "timestamp": datetime.now().isoformat(),
-        "base_dir": str(BASE_DIR),
-        "checks": {},
-    }
-
-    # 1. Auto-remove junk folders
-    import shutil
-    removed = []
-    for dirname in AUTOREMOVE_DIRS:
-        target = BASE_DIR / dirname
-        if target.exists():
-            shutil.rmtree(target)
-            removed.append(dirname)
-    results["checks"]["autoremoved_folders"] = removed
-
-    # 2. Inactive folders
-    try:
-        inactive = folder_checker.find_inactive_folders(CONSULTAS_DIR)
-        results["checks"]["inactive_folders"] = {
-            "count": len(inactive),
-            "folders": inactive,
-        }
-    except Exception as e:
-        results["checks"]["inactive_folders"] = {"error": str(e)}
-
-    # 3. Folder sizes
-    try:
-        folder_sizes = file_ops.get_folder_sizes()
-        top_10 = sorted(folder_sizes.items(), key=lambda x: x[1], reverse=True)[:10]
-        results["checks"]["folder_sizes"] = {
-            "top_10": [{"name": name, "size_mb": size} for name, size in top_10],
-        }
-    except Exception as e:
-        results["checks"]["folder_sizes"] = {"error": str(e)}
-
-    # 4. Model file replacement
-    try:
-        success = file_ops.replace_model_files()
-        results["checks"]["model_files_replaced"] = {"success": success}
-    except Exception as e:
-        results["checks"]["model_files_replaced"] = {"error": str(e)}
 
-    # 5. Nonconforming names
+def load_previous_results():
+    """The last run's full results (the base of the delta), or None."""
     try:
-        nonconforming = file_ops.check_nonconforming_names()
-        results["checks"]["nonconforming_names"] = {
-            "count": len(nonconforming),
-            "items": nonconforming,
-        }
-    except Exception as e:
-        results["checks"]["nonconforming_names"] = {"error": str(e)}
+        with open(RESULTS_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable {RESULTS_FILE.name} ({e}); sending a full snapshot")
+        return None
 
-    return results
-
-
-def post_to_webhook(data: dict) -> bool:
-    """POST JSON results to N8N webhook via curl (handles TLS better)."""
-    import subprocess
-    import tempfile
 
+def shard_arg(text):
     try:
-        # Write JSON to temp file to avoid shell escaping issues
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump(data, f, ensure_ascii=False)
-            tmp_path = f.name
-
-        result = subprocess.run(
-            [
-                "curl", "-s", "-w", "%{http_code}",
-                "-X", "GET",
-                "-H", "Content-Type: application/json",
-                "-d", f"@{tmp_path}",
-                "--max-time", "30",
-                N8N_WEBHOOK_URL,
-            ],
-            capture_output=True,
-            text=True,
-            timeout=35,
-        )
+        return Shard.parse(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
-        os.unlink(tmp_path)
 
-        # Last 3 chars are the HTTP status code
-        output = result.stdout
-        status_code = output[-3:] if len(output) >= 3 else "000"
-        body = output[:-3]
+def publish(results, force_full=False):
+    """Save `results` as latest_results.json and post them (or their delta) to N8N."""
+    payload = build_payload(load_previous_results(), results, RESULTS_FULL_SNAPSHOT_DAYS, force_full=force_full)
+    logger.info(f"Posting a {payload['snapshot']} snapshot")
 
-        if result.returncode == 0 and status_code.startswith("2"):
-            logger.info(f"Webhook POST success: HTTP {status_code} - {body}")
-            return True
-        else:
-            logger.error(f"Webhook POST failed: HTTP {status_code}, curl exit {result.returncode}, body: {body}, stderr: {result.stderr}")
-            return False
-    except Exception as e:
-        logger.error(f"Webhook POST failed: {e}")
-        return False
-
-
-def main():
-    logger.info("=== Cron runner started ===")
-
-    results = run_checks()
-    logger.info(f"Checks completed. Found {len(results['checks'])} check categories.")
-
-    # Save latest results locally as well
-    results_file = script_dir / "latest_results.json"
-    with open(results_file, "w") as f:
+    # Save latest results locally as well (always in full: next run diffs against it)
+    with open(RESULTS_FILE, "w") as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
-    logger.info(f"Results saved to {results_file}")
+    logger.info(f"Results saved to {RESULTS_FILE}")
 
     # Post to N8N
-    if post_to_webhook(results):
+    with metrics.span("webhook.post"):
+        posted = deliver(payload, "cron_runner")
+    if posted:
         logger.info("Results posted to N8N successfully.")
     else:
-        logger.error("Failed to post results to N8N.")
+        logger.error("Failed to post results to N8N; kept in the outbox for the next run.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the PWA file checks and post them to N8N")
+    parser.add_argument("--profile", action="store_true",
+                        help="run under cProfile and write cron_runner.prof")
+    parser.add_argument("--full", action="store_true",
+                        help="post a full snapshot instead of the delta against the last run")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--shard", type=shard_arg, metavar="I/N",
+                      help="check only shard I of N (0-based) and write its partial result; posts nothing")
+    mode.add_argument("--merge", type=int, metavar="N",
+                      help="combine the results of shards 0..N-1 and post them")
+    parser.add_argument("--wait", type=float, default=0, metavar="SECONDS",
+                        help="with --merge: wait this long for shards that have not finished")
+    args = parser.parse_args()
+    if args.merge is not None and args.merge < 1:
+        parser.error("--merge needs the number of shards (1 or more)")
+
+    runner = f"cron_runner_shard{args.shard.index}" if args.shard else "cron_runner"
+    logger.info(f"=== Cron runner started{f' (shard {args.shard})' if args.shard else ''} ===")
+    try:
+        validate_paths()
+    except FileNotFoundError as e:
+        logger.error(f"Path validation error: {e}")
+
+    if args.merge is not None:
+        try:
+            partials = wait_for_partials(args.merge, SHARD_RESULTS_DIR, args.wait)
+        except FileNotFoundError as e:
+            # Posting part of the tree as if it were all of it would look like folders vanished
+            logger.error(f"Not merging: {e}")
+            sys.exit(1)
+        with profiled(script_dir / "cron_runner.prof" if args.profile else None):
+            results = merge_shards(partials)
+        logger.info(f"Merged {args.merge} shard(s); slowest took {results['duration_ms']} ms")
+    else:
+        with profiled(script_dir / "cron_runner.prof" if args.profile else None):
+            results = run_checks(shard=args.shard)
+        logger.info(
+            f"Checks completed in {results['duration_ms']} ms. "
+            f"Found {len(results['checks'])} check categories."
+        )
+    results["metrics"] = metrics.to_dict()
+
+    if args.shard:
+        path = write_partial(results, args.shard, SHARD_RESULTS_DIR)
+        logger.info(f"Shard {args.shard} results saved to {path}")
+    else:
+        publish(results, force_full=args.full)
+        if args.merge is not None:
+            remove_partials(args.merge, SHARD_RESULTS_DIR)
+
+    metrics.write_prometheus(METRICS_TEXTFILE_DIR / f"pwa_{runner}.prom", runner)
 
     logger.info("=== Cron runner finished ===")
 
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the project's commands.
+
+    .venv/bin/python pwa.py check                 # run.py
+    .venv/bin/python pwa.py cron [--full]         # cron_runner.py (--shard I/N, --merge N)
+    .venv/bin/python pwa.py audio [--watch ...]   # audio_daily_runner.py
+    .venv/bin/python pwa.py search LTCAT          # search.py
+    .venv/bin/python pwa.py scan OUT foto.jpg     # scanify.py
+    .venv/bin/python pwa.py backup [...]          # src/scripts/schedule_backup.py
+    .venv/bin/python pwa.py images --dry-run      # src/scripts/compact_images.py
+    .venv/bin/python pwa.py archive list NAME     # src/scripts/archive_consultas.py
+    .venv/bin/python pwa.py growth --days 90      # src/scripts/folder_growth.py
+    .venv/bin/python pwa.py du "FULANO (123)"     # src/scripts/size_tree.py
+
+Only the chosen command's script is loaded, so heavy dependencies (requests,
+faster_whisper, cv2, boto3) are imported by the subcommands that use them and
+never by the others. Everything after the subcommand is passed through.
+"""
+import runpy
+import sys
+from pathlib import Path
+
+script_dir = Path(__file__).resolve().parent
+
+COMMANDS = {
+    "check": ("run.py", "run all file checks and print them"),
+    "cron": ("cron_runner.py", "run the checks and post the results to N8N"),
+    "audio": ("audio_daily_runner.py", "transcribe and summarize ATENDIMENTO recordings"),
+    "search": ("search.py", "full-text search over transcripts and relatórios"),
+    "scan": ("scanify.py", "turn document photos into scanned-looking pages"),
+    "backup": ("src/scripts/schedule_backup.py", "back BASE_DIR up to S3"),
+    "images": ("src/scripts/compact_images.py", "shrink camera photos in the client folders"),
+    "archive": ("src/scripts/archive_consultas.py", "archive inactive CONSULTAS folders, list/extract archives"),
+    "growth": ("src/scripts/folder_growth.py", "fastest-growing folders and disk forecast from the size history"),
+    "du": ("src/scripts/size_tree.py", "largest folders at any depth, from the saved size tree"),
+}
+
+
+def usage() -> str:
+    lines = ["usage: pwa.py <command> [args...]", "", "commands:"]
+    lines += [f"  {name:8s} {help_text}" for name, (_, help_text) in COMMANDS.items()]
+    return "\n".join(lines)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print(usage())
+        return
+    command = sys.argv[1]
+    if command not in COMMANDS:
+        print(f"pwa.py: unknown command '{command}'\n\n{usage()}", file=sys.stderr)
+        sys.exit(2)
+
+    script = script_dir / COMMANDS[command][0]
+    sys.argv = [str(script)] + sys.argv[2:]
+    runpy.run_path(str(script), run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,26 @@
 #!/usr/bin/env python3
 """Transforma foto de documento A4 em imagem com aparencia de escaneado:
-detecta a folha, corrige perspectiva (remove fundo/borda) e uniformiza a iluminacao."""
-import sys
+detecta a folha, corrige perspectiva (remove fundo/borda) e uniformiza a iluminacao.
+
+Uso:
+    scanify.py SAIDA foto1.jpg foto2.jpg ...
+    scanify.py SAIDA "PASTA/*.jpg" PASTA2 --recursive --jobs 4
+
+Entradas podem ser arquivos, pastas ou globs. Com pastas, a estrutura de
+subpastas e repetida dentro de SAIDA. Imagens cuja saida ja e mais nova que a
+foto sao puladas (--force refaz)."""
+import argparse
+import glob
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import cv2
 import numpy as np
 
 A4_RATIO = 297.0 / 210.0  # altura / largura
+DETECT_MAX_SIDE = 1000     # lado maior da copia usada para achar a folha
+BACKGROUND_SCALE = 4       # fundo (iluminacao) estimado em 1/4 da resolucao
 
 
 def order_points(pts):
@@ -20,24 +34,58 @@ def order_points(pts):
     return rect
 
 
-def find_page(img):
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    blur = cv2.GaussianBlur(gray, (5, 5), 0)
+def find_page(img, max_side=DETECT_MAX_SIDE):
+    # detecta a folha numa copia reduzida (o contorno de uma folha A4 nao
+    # precisa de 12 MP) e leva os cantos de volta para a resolucao original
+    scale = min(1.0, max_side / max(img.shape[:2])) if max_side else 1.0
+    small = img if scale == 1.0 else cv2.resize(img, None, fx=scale, fy=scale,
+                                                interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    if scale == 1.0:
+        blur = cv2.GaussianBlur(gray, (5, 5), 0)
+    else:
+        # a reducao (INTER_AREA) ja tira o ruido; borrar de novo arredonda os cantos
+        blur = gray
     _, th = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    th = cv2.morphologyEx(th, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
-    th = cv2.morphologyEx(th, cv2.MORPH_OPEN, np.ones((15, 15), np.uint8))
+    k = max(3, int(round(15 * scale)) | 1)  # 15x15 na resolucao original
+    th = cv2.morphologyEx(th, cv2.MORPH_CLOSE, np.ones((k, k), np.uint8))
+    th = cv2.morphologyEx(th, cv2.MORPH_OPEN, np.ones((k, k), np.uint8))
     contours, _ = cv2.findContours(th, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     if not contours:
         return None
     c = max(contours, key=cv2.contourArea)
-    if cv2.contourArea(c) < 0.25 * img.shape[0] * img.shape[1]:
+    if cv2.contourArea(c) < 0.25 * small.shape[0] * small.shape[1]:
         return None
     peri = cv2.arcLength(c, True)
     approx = cv2.approxPolyDP(c, 0.02 * peri, True)
     if len(approx) == 4:
-        return order_points(approx.reshape(4, 2).astype("float32"))
-    box = cv2.boxPoints(cv2.minAreaRect(c))
-    return order_points(box.astype("float32"))
+        quad = approx.reshape(4, 2).astype("float32")
+    else:
+        quad = cv2.boxPoints(cv2.minAreaRect(c)).astype("float32")
+    if scale == 1.0:
+        return order_points(quad)
+    # centro do pixel reduzido -> coordenada na imagem original, depois
+    # ajuste fino de cada canto na foto original (so numa janela em volta dele)
+    quad = (quad + 0.5) / scale - 0.5
+    return order_points(refine_corners(img, quad, radius=int(round(2 / scale))))
+
+
+def refine_corners(img, quad, radius):
+    """Ajusta cada canto com precisao subpixel numa janela de +-radius na imagem original."""
+    h, w = img.shape[:2]
+    pad = radius + 2
+    refined = quad.copy()
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+    for i, (x, y) in enumerate(quad):
+        x0, y0 = max(0, int(x) - pad), max(0, int(y) - pad)
+        x1, y1 = min(w, int(x) + pad + 1), min(h, int(y) + pad + 1)
+        if x1 - x0 <= 2 * radius + 2 or y1 - y0 <= 2 * radius + 2:
+            continue  # canto colado na borda da foto: fica como esta
+        roi = cv2.cvtColor(img[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        pt = np.array([[[x - x0, y - y0]]], dtype=np.float32)
+        cv2.cornerSubPix(roi, pt, (radius, radius), (-1, -1), criteria)
+        refined[i] = pt[0, 0] + (x0, y0)
+    return refined
 
 
 def warp_to_a4(img, quad, out_width=1240):
@@ -50,34 +98,131 @@ def warp_to_a4(img, quad, out_width=1240):
                                flags=cv2.INTER_CUBIC)
 
 
+# Buffers de trabalho reaproveitados entre paginas do mesmo processo (todas
+# as paginas tem o mesmo tamanho depois de warp_to_a4)
+_buffers = {}
+
+
+def _buffer(name, shape, dtype=np.uint8):
+    buf = _buffers.get(name)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = _buffers[name] = np.empty(shape, dtype)
+    return buf
+
+
+def estimate_background(img, scale=BACKGROUND_SCALE):
+    """Fundo (iluminacao) da pagina: mediana 51x51, calculada numa copia reduzida.
+
+    A iluminacao varia devagar, entao a mediana em 1/scale da resolucao
+    (com janela proporcional) e ampliada de volta da praticamente o mesmo
+    fundo por uma fracao do custo da mediana 51x51 na pagina inteira.
+    """
+    if scale <= 1:
+        return cv2.medianBlur(img, 51)
+    h, w = img.shape[:2]
+    small = cv2.resize(img, (w // scale, h // scale), interpolation=cv2.INTER_AREA)
+    small = cv2.medianBlur(small, max(3, (51 // scale) | 1))
+    return cv2.resize(small, (w, h), dst=_buffer("bg", img.shape), interpolation=cv2.INTER_LINEAR)
+
+
+# ponto branco em 238: elimina sombras leves e o vazamento do verso
+# sem apagar logos em cinza-claro
+WHITE_POINT = 238
+
+
+def _stroke_lut(strength):
+    # reforcar o traco: escurece o que nao e fundo (mesma conta de antes,
+    # tabelada para os 256 valores possiveis)
+    v = np.arange(256, dtype=np.float32)
+    return (255.0 - np.clip((255.0 - v) * strength, 0, 255)).astype(np.uint8)
+
+
 def scan_effect(img, strength=1.35):
+    # Tudo em uint8, sem copias float32: a divisao ja sai escalada e saturada
+    # em 0..255 e o reforco do traco e uma tabela (LUT) de 256 entradas
+    bg = estimate_background(img)
     # nivelar iluminacao: divide cada canal pelo "fundo" (blur grande)
-    bg = cv2.medianBlur(img, 51)
-    norm = cv2.divide(img.astype(np.float32), bg.astype(np.float32) + 1e-6)
-    norm = np.clip(norm * 255.0, 0, 255)
-    # ponto branco em 238: elimina sombras leves e o vazamento do verso
-    # sem apagar logos em cinza-claro
-    norm = np.clip(norm * (255.0 / 238.0), 0, 255)
-    # reforcar o traco: escurece o que nao e fundo
-    out = 255.0 - np.clip((255.0 - norm) * strength, 0, 255)
-    out = np.clip(out, 0, 255).astype(np.uint8)
+    norm = _buffer("norm", img.shape)
+    cv2.divide(img, bg, dst=norm, scale=255.0 * 255.0 / WHITE_POINT)
+    cv2.LUT(norm, _stroke_lut(strength), dst=norm)
     # leve nitidez
-    blur = cv2.GaussianBlur(out, (0, 0), 1.0)
-    out = cv2.addWeighted(out, 1.4, blur, -0.4, 0)
+    blur = cv2.GaussianBlur(norm, (0, 0), 1.0, dst=_buffer("blur", img.shape))
+    out = cv2.addWeighted(norm, 1.4, blur, -0.4, 0)
     # regioes onde o fundo original era escuro (mesa/sombra, nao papel):
     # a divisao gera ruido colorido ali — pintar de branco
-    bg_gray = cv2.cvtColor(bg, cv2.COLOR_BGR2GRAY)
-    dark = (bg_gray < 110).astype(np.uint8) * 255
-    dark = cv2.dilate(dark, np.ones((9, 9), np.uint8))
-    out[dark > 0] = (255, 255, 255)
+    bg_gray = cv2.cvtColor(bg, cv2.COLOR_BGR2GRAY, dst=_buffer("bg_gray", img.shape[:2]))
+    _, dark = cv2.threshold(bg_gray, 109, 255, cv2.THRESH_BINARY_INV, dst=_buffer("dark", img.shape[:2]))
+    dark = cv2.dilate(dark, np.ones((9, 9), np.uint8), dst=_buffer("dark_wide", img.shape[:2]))
+    cv2.bitwise_or(out, (255, 255, 255, 0), dst=out, mask=dark)
     # borda branca fina: remove franjas de cor onde sobrou fundo da mesa
     m = max(8, out.shape[0] // 150)
-    out = cv2.copyMakeBorder(out[m:-m, m:-m], m, m, m, m,
-                             cv2.BORDER_CONSTANT, value=(255, 255, 255))
+    out[:m] = 255
+    out[-m:] = 255
+    out[:, :m] = 255
+    out[:, -m:] = 255
     return out
 
 
-def process(path, out_dir):
+# Modos de saida:
+#   color   JPEG colorido (padrao, como sempre foi)
+#   gray    JPEG em tons de cinza (1 canal)
+#   auto    cinza, a nao ser que a pagina tenha cor de verdade (carimbo, logo)
+#   bilevel TIFF preto e branco com compressao CCITT G4 (precisa do Pillow)
+OUTPUT_MODES = ("color", "gray", "auto", "bilevel")
+JPEG_QUALITY = 92
+PAGE_DPI = 150  # 1240 px de largura = A4 a 150 dpi
+
+
+def has_color(page, min_chroma=60, min_fraction=0.002):
+    """True se uma parte relevante da pagina tem cor (carimbo, logo), nao so preto/cinza/branco.
+
+    Mede a croma (max - min dos canais) numa copia 1/4, o que ja tira o ruido do
+    sensor nas letras pretas.
+    """
+    small = cv2.resize(page, None, fx=0.25, fy=0.25, interpolation=cv2.INTER_AREA)
+    chroma = cv2.subtract(small.max(axis=2), small.min(axis=2))
+    return cv2.countNonZero(cv2.compare(chroma, min_chroma, cv2.CMP_GT)) > min_fraction * chroma.size
+
+
+def encode_jpeg(img, quality=JPEG_QUALITY, target_kb=None):
+    """JPEG em bytes. Com target_kb, a maior qualidade (30..95) que cabe no tamanho."""
+    if not target_kb:
+        return cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+    # busca binaria: tamanho cresce com a qualidade
+    lo, hi, best = 30, 95, None
+    while lo <= hi:
+        q = (lo + hi) // 2
+        data = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, q])[1].tobytes()
+        if len(data) <= target_kb * 1024:
+            best, lo = data, q + 1
+        else:
+            hi = q - 1
+    # nem na qualidade minima coube: fica a menor possivel
+    return best or cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 30])[1].tobytes()
+
+
+def encode_g4(page):
+    """TIFF 1 bit/pixel, CCITT Group 4 (o formato de fax/scanner de documento)."""
+    from io import BytesIO
+    from PIL import Image
+
+    gray = cv2.cvtColor(page, cv2.COLOR_BGR2GRAY)
+    _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    out = BytesIO()
+    Image.fromarray(bw).convert("1").save(out, "TIFF", compression="group4", dpi=(PAGE_DPI, PAGE_DPI))
+    return out.getvalue()
+
+
+def encode_page(page, mode="color", quality=JPEG_QUALITY, target_kb=None):
+    """Bytes do arquivo de saida da pagina no modo pedido."""
+    if mode == "bilevel":
+        return encode_g4(page)
+    if mode == "gray" or (mode == "auto" and not has_color(page)):
+        page = cv2.cvtColor(page, cv2.COLOR_BGR2GRAY)
+    return encode_jpeg(page, quality, target_kb)
+
+
+def process(path, out_dir, mode="color", quality=JPEG_QUALITY, target_kb=None):
     img = cv2.imread(path)
     if img is None:
         return path, "ERRO: nao consegui abrir"
@@ -86,15 +231,188 @@ def process(path, out_dir):
         return path, "AVISO: folha nao detectada, aplicado apenas efeito de scanner"
     warped = warp_to_a4(img, quad)
     result = scan_effect(warped)
-    name = os.path.splitext(os.path.basename(path))[0] + ".jpg"
-    out_path = os.path.join(out_dir, name)
-    cv2.imwrite(out_path, result, [cv2.IMWRITE_JPEG_QUALITY, 92])
+    out_path = output_path(path, out_dir, mode)
+    with open(out_path, "wb") as f:
+        f.write(encode_page(result, mode, quality, target_kb))
     return path, f"OK -> {out_path}"
 
 
-if __name__ == "__main__":
-    out_dir = sys.argv[1]
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".webp"}
+
+
+def is_image(path):
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def output_dir_for(path, out_dir, root=None):
+    """Pasta de saida da foto: espelha a subpasta relativa a `root` (entrada do tipo pasta)."""
+    if root is None:
+        return out_dir
+    rel = os.path.relpath(os.path.dirname(path), root)
+    return out_dir if rel == "." else os.path.join(out_dir, rel)
+
+
+def collect_inputs(inputs, out_dir, recursive=False):
+    """Lista (foto, pasta de saida) a partir de arquivos, pastas e globs, sem repetir."""
+    out_abs = os.path.abspath(out_dir)
+    found = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            if recursive:
+                for root, dirnames, filenames in os.walk(item):
+                    # nao reprocessar a propria saida quando ela fica dentro da entrada
+                    dirnames[:] = sorted(d for d in dirnames
+                                         if os.path.abspath(os.path.join(root, d)) != out_abs)
+                    for name in sorted(filenames):
+                        path = os.path.join(root, name)
+                        if is_image(path):
+                            found.setdefault(path, output_dir_for(path, out_dir, item))
+            else:
+                for name in sorted(os.listdir(item)):
+                    path = os.path.join(item, name)
+                    if os.path.isfile(path) and is_image(path):
+                        found.setdefault(path, out_dir)
+        elif glob.has_magic(item):
+            for path in sorted(glob.glob(item, recursive=recursive)):
+                if os.path.isfile(path) and is_image(path):
+                    found.setdefault(path, out_dir)
+        else:
+            # arquivo comum (mesmo sem extensao de imagem: o usuario pediu explicitamente)
+            found.setdefault(item, out_dir)
+    return list(found.items())
+
+
+def output_path(path, out_dir, mode="color"):
+    ext = ".tif" if mode == "bilevel" else ".jpg"
+    return os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + ext)
+
+
+def is_up_to_date(path, out_dir, mode="color"):
+    out = output_path(path, out_dir, mode)
+    try:
+        return os.path.getmtime(out) >= os.path.getmtime(path)
+    except OSError:
+        return False
+
+
+def _init_worker():
+    # Cada processo do pool usa 1 thread do OpenCV: o paralelismo vem do pool.
+    # Sem isso, N processos x N threads disputam os mesmos nucleos.
+    cv2.setNumThreads(1)
+
+
+def _timed_process(path, out_dir, options):
+    started = time.perf_counter()
     os.makedirs(out_dir, exist_ok=True)
-    for p in sys.argv[2:]:
-        src, msg = process(p, out_dir)
-        print(f"{os.path.basename(src)}: {msg}")
+    src, msg = process(path, out_dir, **options)
+    size = os.path.getsize(output_path(path, out_dir, options["mode"])) if msg.startswith("OK") else 0
+    return src, msg, time.perf_counter() - started, size
+
+
+def run_batch(jobs, workers, options=None):
+    """Processa (foto, pasta de saida) em paralelo; imprime cada foto e devolve os tempos."""
+    options = options or {"mode": "color"}
+    timings = []
+
+    def report(src, msg, seconds, size=0):
+        timings.append((src, msg, seconds, size))
+        kb = f", {size / 1024:.0f} KB" if size else ""
+        print(f"{os.path.basename(src)}: {msg} ({seconds:.2f}s{kb})", flush=True)
+
+    if workers <= 1 or len(jobs) <= 1:
+        for path, out_dir in jobs:
+            report(*_timed_process(path, out_dir, options))
+        return timings
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(_timed_process, path, out_dir, options): path for path, out_dir in jobs}
+        for future in as_completed(futures):
+            try:
+                report(*future.result())
+            except Exception as e:
+                report(futures[future], f"ERRO: {e}", 0.0)
+    return timings
+
+
+def write_pdf(pages, pdf_path):
+    """Junta as paginas (na ordem dada) num PDF; JPEG vai como DCT e o G4 como CCITT.
+
+    quality="keep" reaproveita as tabelas do JPEG de cada pagina, senao o Pillow
+    recodificaria tudo em qualidade 75.
+    """
+    from PIL import Image
+
+    images = [Image.open(p) for p in pages]
+    try:
+        images[0].save(pdf_path, "PDF", save_all=True, append_images=images[1:], resolution=PAGE_DPI,
+                       **({"quality": "keep"} if images[0].format == "JPEG" else {}))
+    finally:
+        for im in images:
+            im.close()
+
+
+def print_summary(timings, skipped, wall_seconds, workers):
+    ok = [t for t in timings if t[1].startswith("OK")]
+    errors = [t for t in timings if t[1].startswith("ERRO")]
+    busy = sum(t[2] for t in timings)
+    print(f"\n{len(timings)} processadas ({len(ok)} ok, {len(errors)} com erro, "
+          f"{len(timings) - len(ok) - len(errors)} com aviso), {skipped} ja atualizadas")
+    if timings:
+        print(f"Tempo total {wall_seconds:.1f}s com {workers} processo(s); "
+              f"media {busy / len(timings):.2f}s por imagem, soma {busy:.1f}s")
+        slowest = sorted(timings, key=lambda t: t[2], reverse=True)[:5]
+        print("Mais lentas: " + ", ".join(f"{os.path.basename(t[0])} {t[2]:.2f}s" for t in slowest))
+    if ok:
+        total = sum(t[3] for t in ok)
+        print(f"Tamanho: {total / 1024:.0f} KB, {total / len(ok) / 1024:.0f} KB por pagina")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fotos de documentos -> paginas com cara de escaneadas")
+    parser.add_argument("out_dir", help="pasta de saida")
+    parser.add_argument("inputs", nargs="+", help="fotos, pastas ou globs (entre aspas)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="entrar em subpastas (e ** nos globs)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="processos em paralelo (padrao: numero de nucleos)")
+    parser.add_argument("--force", action="store_true", help="refazer mesmo se a saida estiver atualizada")
+    parser.add_argument("--mode", choices=OUTPUT_MODES, default="color",
+                        help="color (JPEG), gray (JPEG cinza), auto (cinza se nao houver cor), "
+                             "bilevel (TIFF G4 preto e branco)")
+    parser.add_argument("--quality", type=int, default=JPEG_QUALITY, help="qualidade JPEG")
+    parser.add_argument("--target-kb", type=int,
+                        help="JPEG: maior qualidade que deixa a pagina com no maximo N KB")
+    parser.add_argument("--pdf", help="tambem junta todas as paginas do lote neste PDF")
+    args = parser.parse_args()
+
+    if args.mode == "bilevel" or args.pdf:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            parser.error("--mode bilevel e --pdf precisam do Pillow (pip install Pillow)")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    jobs = collect_inputs(args.inputs, args.out_dir, args.recursive)
+    todo = [(p, d) for p, d in jobs if args.force or not is_up_to_date(p, d, args.mode)]
+    skipped = len(jobs) - len(todo)
+    if not jobs:
+        print("Nenhuma imagem encontrada")
+        return
+
+    options = {"mode": args.mode, "quality": args.quality, "target_kb": args.target_kb}
+    started = time.perf_counter()
+    timings = run_batch(todo, min(args.jobs, len(todo)), options)
+    print_summary(timings, skipped, time.perf_counter() - started, min(args.jobs, len(todo)) or 1)
+
+    if args.pdf:
+        # todas as paginas do lote (inclusive as ja atualizadas), na ordem da entrada
+        pages = [output_path(p, d, args.mode) for p, d in jobs]
+        pages = [p for p in pages if os.path.exists(p)]
+        if pages:
+            write_pdf(pages, args.pdf)
+            size = os.path.getsize(args.pdf)
+            print(f"PDF: {args.pdf} ({len(pages)} paginas, {size / 1024:.0f} KB, "
+                  f"{size / len(pages) / 1024:.0f} KB por pagina)")
+
+
+if __name__ == "__main__":
+    main()
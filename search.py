@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Search transcripts and relatórios across all client ATENDIMENTO folders.
+
+    .venv/bin/python search.py LTCAT
+    .venv/bin/python search.py "123.456.789-00" --client "JOAO DA SILVA (123)"
+    .venv/bin/python search.py --rebuild [--full]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Setup project root
+script_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(script_dir))
+os.chdir(script_dir)
+
+from src.utils.search_index import SearchIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over transcripts and relatórios")
+    parser.add_argument("query", nargs="?", help="words, a phrase in quotes, or FTS5 syntax (AND/OR/NOT, prefix*)")
+    parser.add_argument("--client", help="restrict to one client folder")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--rebuild", action="store_true", help="index sidecars written outside the runners")
+    parser.add_argument("--full", action="store_true", help="with --rebuild: drop and re-index everything")
+    args = parser.parse_args()
+
+    if not args.rebuild and not args.query:
+        parser.error("a query or --rebuild is required")
+
+    index = SearchIndex()
+    try:
+        if args.rebuild:
+            started = time.perf_counter()
+            stats = index.rebuild(full=args.full)
+            print(f"Index rebuilt in {time.perf_counter() - started:.1f}s: {stats}")
+            if not args.query:
+                return
+
+        started = time.perf_counter()
+        hits = index.search(args.query, limit=args.limit, client=args.client)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    finally:
+        index.close()
+
+    for hit in hits:
+        print(f"{hit['score']:7.2f}  {hit['client']}  [{hit['kind']}]")
+        print(f"         {hit['path']}")
+        print(f"         {' '.join(hit['snippet'].split())}")
+    print(f"\n{len(hits)} hit(s) in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
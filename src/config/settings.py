@@ -1,10 +1,13 @@
 # src/config/settings.py
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
 # Base Directory
 BASE_DIR = Path(os.getenv(
     'BASE_DIR',
@@ -43,6 +46,34 @@ AUTOREMOVE_DIRS = [
 # Thresholds
 INACTIVE_DAYS_THRESHOLD = 730  # 2 years
 SIZE_THRESHOLD_MB = 1000  # Flag folders larger than 1GB
+CHECK_TIMEOUT_SECONDS = 30 * 60  # per check, see src/utils/check_runner.py
+# Full list of file naming issues (JSON lines); the results only carry counts and samples
+NAMING_ISSUES_REPORT = Path(os.getenv('NAMING_ISSUES_REPORT', str(PROJECT_ROOT / 'naming_issues.jsonl')))
+NAMING_ISSUES_SAMPLES = 20  # paths kept per category in the results
+# Folder size tree of the last run (gzip'd JSON, src/utils/size_tree.py), queried by pwa.py du
+SIZE_TREE_PATH = Path(os.getenv('SIZE_TREE_PATH', str(PROJECT_ROOT / 'size_tree.json.gz')))
+SIZE_TREE_TOP_DEPTH = 2  # results list the largest subfolders at this depth (client/subfolder)
+# Per-folder size/files/last-activity time series, appended by every run (src/utils/size_history.py)
+SIZE_HISTORY_PATH = Path(os.getenv('SIZE_HISTORY_PATH', str(PROJECT_ROOT / 'size_history.db')))
+GROWTH_WINDOW_DAYS = 90  # fastest-growing folders and disk forecast look back this far
+GROWTH_TOP = 5  # fastest-growing folders kept in the results
+# cron_runner posts a delta against the previous run, and a full snapshot this often
+RESULTS_FULL_SNAPSHOT_DAYS = int(os.getenv('RESULTS_FULL_SNAPSHOT_DAYS', '28'))
+
+# Prometheus textfile output (point at node_exporter's --collector.textfile.directory)
+METRICS_TEXTFILE_DIR = Path(os.getenv('METRICS_TEXTFILE_DIR', str(PROJECT_ROOT)))
+
+# N8N webhook that receives both runners' results (src/utils/webhook.py)
+WEBHOOK_URL = os.getenv(
+    'WEBHOOK_URL',
+    'https://n8n.srv921079.hstgr.cloud/webhook/b657fab8-c7ff-4a0c-90cc-0b49ce9a7411',
+)
+WEBHOOK_GZIP = os.getenv('WEBHOOK_GZIP', '1') == '1'
+WEBHOOK_TIMEOUT_SECONDS = 30
+WEBHOOK_RETRIES = 3  # per delivery, with exponential backoff
+# Payloads that could not be delivered wait here for the next run
+WEBHOOK_OUTBOX_DIR = Path(os.getenv('WEBHOOK_OUTBOX_DIR', str(PROJECT_ROOT / 'webhook_outbox')))
+WEBHOOK_OUTBOX_MAX = 50  # oldest payloads are dropped beyond this
 
 # Derived Paths
 EXCLUDED_CONSULTAS_FOLDERS = os.getenv('EXCLUDED_CONSULTAS_FOLDERS', '#ENCERRADOS').split(',')
@@ -50,7 +81,7 @@ CONSULTAS_DIR = BASE_DIR / 'AAA --- CONSULTAS'
 
 # === Audio transcription / summarization (daily runner) ===
 ATENDIMENTO_DIR_NAME = 'ATENDIMENTO'
-AUDIO_EXTENSIONS = ['.m4a', '.mp3', '.wav', '.ogg', '.aac', '.flac']
+AUDIO_EXTENSIONS = ['.m4a', '.mp3', '.wav', '.ogg', '.aac', '.flac', '.opus']
 TRANSCRIPT_SUFFIX = '.transcricao.txt'
 REPORT_SUFFIX = '.relatorio.md'
 
@@ -58,14 +89,93 @@ WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'small')
 WHISPER_DEVICE = os.getenv('WHISPER_DEVICE', 'cpu')
 WHISPER_COMPUTE_TYPE = os.getenv('WHISPER_COMPUTE_TYPE', 'int8')
 WHISPER_LANGUAGE = os.getenv('WHISPER_LANGUAGE', 'pt')
+WHISPER_BEAM_SIZE = int(os.getenv('WHISPER_BEAM_SIZE', '5'))
+WHISPER_VAD = os.getenv('WHISPER_VAD', '1') == '1'  # skip silence with Silero VAD
+# Unix socket of the warm model server (audio_daily_runner.py --serve)
+WHISPER_SOCKET = os.getenv('WHISPER_SOCKET', '/tmp/pwa-whisper.sock')
+# The backlog must be transcribed by this time (HH:MM, empty = no deadline);
+# WHISPER_MODEL is the largest model the scheduler may pick.
+WHISPER_DEADLINE = os.getenv('WHISPER_DEADLINE', '08:00')
+WHISPER_RTF_PATH = PROJECT_ROOT / 'whisper_rtf.json'  # measured speed per model
 
 OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '')
 OPENROUTER_MODEL = os.getenv('OPENROUTER_MODEL', 'anthropic/claude-sonnet-4')
-OPENROUTER_BASE_URL = 'https://openrouter.ai/api/v1'
+OPENROUTER_BASE_URL = os.getenv('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1')
+
+# Optional post-transcription compaction of recordings to Opus (needs ffmpeg)
+AUDIO_COMPACT_ENABLED = os.getenv('AUDIO_COMPACT', '0') == '1'
+AUDIO_COMPACT_BITRATE = os.getenv('AUDIO_COMPACT_BITRATE', '24k')
+
+# Full-text index over transcripts and relatórios (search.py)
+SEARCH_INDEX_PATH = Path(os.getenv('SEARCH_INDEX_PATH', str(PROJECT_ROOT / 'search_index.db')))
+
+# Job queue (SQLite) for the audio pipeline
+JOB_DB_PATH = Path(os.getenv('JOB_DB_PATH', str(PROJECT_ROOT / 'audio_jobs.db')))
+JOB_MAX_ATTEMPTS = 5  # give up after this many failures
+JOB_RETRY_BASE_SECONDS = 6 * 3600  # 6h, 12h, 24h, 48h...
+JOB_RETRY_MAX_SECONDS = 7 * 24 * 3600
+
+# Watch mode (audio_daily_runner.py --watch)
+WATCH_POLL_SECONDS = 60  # re-sync interval when no inotify event arrives
+WATCH_SETTLE_SECONDS = 30  # audio must be untouched this long (sync finished)
+WATCH_IDLE_UNLOAD_SECONDS = 15 * 60  # unload Whisper after this much idle time
+
+# Distributed workers (audio_daily_runner.py --distribute / --worker). The job
+# directory must be on storage every machine mounts directly (NFS/SMB).
+SHARED_JOBS_DIR = Path(os.getenv('SHARED_JOBS_DIR', str(PROJECT_ROOT / 'shared_jobs')))
+WORKER_HEARTBEAT_SECONDS = 30
+WORKER_STALE_SECONDS = 5 * 60  # claims without a heartbeat this long are re-queued
+
+# Sharded file checks (cron_runner.py --shard i/N on each machine, then --merge N
+# on one). Partial results go here; same storage rules as SHARED_JOBS_DIR.
+SHARD_RESULTS_DIR = Path(os.getenv('SHARD_RESULTS_DIR', str(PROJECT_ROOT / 'shard_results')))
+SHARD_MAX_AGE_HOURS = 12  # older partial results (left by a failed run) are not merged
+SHARD_POLL_SECONDS = 10  # --merge --wait checks for missing shards this often
+
+# Ledger (SQLite, keyed by content hash) of files already handled by the
+# BASE_DIR stages below, so nothing is processed twice (src/utils/file_ledger.py)
+FILE_LEDGER_PATH = Path(os.getenv('FILE_LEDGER_PATH', str(PROJECT_ROOT / 'file_ledger.db')))
+
+# Document photos -> scanned pages next to the original (src/utils/document_scanner.py)
+DOCUMENT_SCAN_ENABLED = os.getenv('DOCUMENT_SCAN', '0') == '1'
+DOCUMENT_SCAN_EXTENSIONS = ['.jpg', '.jpeg', '.heic', '.heif']
+DOCUMENT_SCAN_SUFFIX = '.scan.jpg'  # foto.jpg -> foto.scan.jpg
+DOCUMENT_SCAN_MIN_KB = 500  # phone camera photos; skips thumbnails and chat images
+DOCUMENT_SCAN_MODE = os.getenv('DOCUMENT_SCAN_MODE', 'auto')  # scanify --mode: color, gray or auto (bilevel is TIFF, not allowed here)
+DOCUMENT_SCAN_MAX_PER_RUN = int(os.getenv('DOCUMENT_SCAN_MAX_PER_RUN', '200'))  # the rest waits for the next run
+DOCUMENT_SCAN_SAMPLES = 20  # new scans listed in the results (`outputs`)
+
+# Re-encoding of camera photos in the client folders (src/utils/image_compactor.py)
+IMAGE_COMPACT_ENABLED = os.getenv('IMAGE_COMPACT', '0') == '1'
+IMAGE_COMPACT_EXTENSIONS = ['.jpg', '.jpeg']  # re-encoded in place, so the format never changes
+IMAGE_COMPACT_MIN_KB = 500  # smaller files are not worth the work
+IMAGE_COMPACT_MAX_PIXELS = int(os.getenv('IMAGE_COMPACT_MAX_PIXELS', str(8_000_000)))  # ~3264x2448, downscaled above
+IMAGE_COMPACT_TARGET_PSNR = float(os.getenv('IMAGE_COMPACT_TARGET_PSNR', '40'))  # dB, lowest quality that keeps it
+IMAGE_COMPACT_QUALITY_RANGE = (60, 90)
+IMAGE_COMPACT_MIN_SAVING = 0.2  # replace only if the file shrinks at least this much
+IMAGE_COMPACT_MAX_PER_RUN = int(os.getenv('IMAGE_COMPACT_MAX_PER_RUN', '500'))
+
+# Inactive CONSULTAS folders packed into ZIP archives (src/utils/folder_archiver.py)
+ARCHIVE_CONSULTAS_ENABLED = os.getenv('ARCHIVE_CONSULTAS', '0') == '1'
+ARQUIVO_MORTO_DIR = BASE_DIR / 'AAA --- ARQUIVO MORTO'
+CONSULTAS_ARCHIVE_DIR = ARQUIVO_MORTO_DIR / 'CONSULTAS'
+ARCHIVE_THREADS = int(os.getenv('ARCHIVE_THREADS', '4'))  # folders compressed at the same time
+ARCHIVE_MAX_PER_RUN = 20
+# Already compressed formats are stored as they are instead of LZMA'd again
+ARCHIVE_STORED_EXTENSIONS = [
+    '.jpg', '.jpeg', '.png', '.heic', '.gif', '.webp', '.mp4', '.mov', '.m4a', '.mp3', '.opus', '.ogg',
+    '.zip', '.rar', '.7z', '.gz', '.xz', '.docx', '.xlsx', '.pptx', '.odt',
+]
 
 # Validation
+@lru_cache(maxsize=None)
 def validate_paths():
-    """Validate that all required paths exist."""
+    """Validate that all required paths exist.
+
+    Not run on import: stat-ing BASE_DIR on the OneDrive/network share is the
+    slowest part of startup, so only the commands that walk BASE_DIR call it
+    (once per process).
+    """
     required_paths = {
         'BASE_DIR': BASE_DIR,
         'ZMODELOS_DIR': ZMODELOS_DIR,
@@ -77,8 +187,3 @@ def validate_paths():
         if not path.exists():
             raise FileNotFoundError(f"{name} does not exist at: {path}")
 
-# Run validation when settings are imported
-try:
-    validate_paths()
-except FileNotFoundError as e:
-    print(f"Path validation error: {e}")
\ No newline at end of file
@@ -1,4 +1,5 @@
 # src/main.py
+import argparse
 import logging
 import sys
 from pathlib import Path
@@ -11,14 +12,12 @@ if str(project_root) not in sys.path:
 
 # Now import the modules
 try:
-    from src.utils.folder_checker import FolderChecker
-    from src.utils.file_operations import FileOperations
-    from src.config.settings import BASE_DIR, CONSULTAS_DIR, AUTOREMOVE_DIRS
+    from src.config.settings import validate_paths
+    from src.utils.check_runner import run_checks
 except ModuleNotFoundError:
     # If running from within src directory
-    from utils.folder_checker import FolderChecker
-    from utils.file_operations import FileOperations
-    from config.settings import BASE_DIR, CONSULTAS_DIR, AUTOREMOVE_DIRS
+    from config.settings import validate_paths
+    from utils.check_runner import run_checks
 
 # Custom formatter without INFO: __main__:
 class CustomFormatter(logging.Formatter):
@@ -35,52 +34,72 @@ logger.setLevel(logging.INFO)
 # Remove the root logger handlers to avoid duplicate messages
 logging.getLogger().handlers = []
 
+def _timing(entry: dict) -> str:
+    return f"({entry.get('duration_ms', 0):,} ms, {entry.get('items_scanned', 0):,} items)"
+
+
 def main():
-    # Initialize our utility classes
-    folder_checker = FolderChecker(BASE_DIR)
-    file_ops = FileOperations(BASE_DIR)
+    # No options, but --help and typos must exit here: the checks write to disk
+    argparse.ArgumentParser(description="Run all file checks and print the results").parse_args()
+    try:
+        validate_paths()
+    except FileNotFoundError as e:
+        print(f"Path validation error: {e}")
+
+    results = run_checks()
+    checks = results["checks"]
 
     print("\n=== Auto-removing junk folders ===")
-    import shutil
-    for dirname in AUTOREMOVE_DIRS:
-        target = BASE_DIR / dirname
-        if target.exists():
-            shutil.rmtree(target)
-            print(f"Removed: {dirname}")
-
-    print("\n=== Checking Inactive Folders ===")
-    inactive_folders = folder_checker.find_inactive_folders(CONSULTAS_DIR)
-    if inactive_folders:
+    removed = checks["autoremoved_folders"]
+    for dirname in removed.get("folders", []):
+        print(f"Removed: {dirname}")
+
+    print(f"\n=== Checking Inactive Folders === {_timing(checks['inactive_folders'])}")
+    inactive = checks["inactive_folders"]
+    if inactive.get("folders"):
         print("\nInactive folders found:")
-        for folder in inactive_folders:
+        for folder in inactive["folders"]:
             print(f"- {folder}")
     else:
         print("\nNo inactive folders found")
 
-    print("\n=== Analyzing Folder Sizes ===")
-    folder_sizes = file_ops.get_folder_sizes()
+    print(f"\n=== Analyzing Folder Sizes === {_timing(checks['folder_sizes'])}")
     print("\nTen largest folders:")
-    for folder, size in sorted(folder_sizes.items(), key=lambda x: x[1], reverse=True)[:10]:
-        print(f"{folder}: {size:,} MB")
+    for entry in checks["folder_sizes"].get("top_10", []):
+        print(f"{entry['name']}: {entry['size_mb']:,} MB")
+    growth = checks["folder_sizes"].get("growth", {})
+    if growth.get("fastest"):
+        print(f"\nFastest growing (last {growth['window_days']} days):")
+        for entry in growth["fastest"]:
+            print(f"{entry['name']}: +{entry['growth_mb']:,} MB ({entry['mb_per_day']:,} MB/day)")
+    days_until_full = growth.get("disk_forecast", {}).get("days_until_full")
+    if days_until_full is not None:
+        print(f"Disk full in about {days_until_full:,} days at the current rate")
 
-    print("\n=== Replacing Model Files ===")
-    try:
-        if file_ops.replace_model_files():
-            print("✓ Model files successfully replaced")
-        else:
-            print("✗ Failed to replace model files")
-    except KeyboardInterrupt:
-        print("\n⚠️ Model file replacement interrupted by user")
-    except Exception as e:
-        print(f"✗ Error replacing model files: {str(e)}")
+    print(f"\n=== Replacing Model Files === {_timing(checks['model_files_replaced'])}")
+    if checks["model_files_replaced"].get("success"):
+        print("✓ Model files successfully replaced")
+    else:
+        print("✗ Failed to replace model files")
 
-    print("\n=== Checking Nonconforming Names ===")
-    nonconforming = file_ops.check_nonconforming_names()
+    print(f"\n=== Checking Nonconforming Names === {_timing(checks['nonconforming_names'])}")
+    nonconforming = checks["nonconforming_names"].get("items", [])
     if nonconforming:
         print("\nNonconforming folders and files found:")
         for item in nonconforming:
             print(f"- {item}")
-    print("\n=== Operation Complete ===\n")
+
+    print(f"\n=== Checking File Naming Issues === {_timing(checks['file_naming_issues'])}")
+    naming = checks["file_naming_issues"]
+    for category, count in naming.get("counts", {}).items():
+        print(f"{category}: {count:,}")
+    if naming.get("report"):
+        print(f"Full list: {naming['report']}")
+
+    for name, entry in checks.items():
+        for error in entry.get("errors", []):
+            print(f"✗ {name}: {error}")
+    print(f"\n=== Operation Complete ({results['duration_ms']:,} ms) ===\n")
 
 if __name__ == "__main__":
     try:
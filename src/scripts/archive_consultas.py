@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# src/scripts/archive_consultas.py
+"""
+Archive inactive CONSULTAS folders and read the archives back (src/utils/folder_archiver.py).
+
+    .venv/bin/python src/scripts/archive_consultas.py run --dry-run       # which folders would go
+    .venv/bin/python src/scripts/archive_consultas.py run [--keep-source]
+    .venv/bin/python src/scripts/archive_consultas.py list "FULANO (123)"
+    .venv/bin/python src/scripts/archive_consultas.py extract "FULANO (123)" docs/RG.pdf --to /tmp/out
+    .venv/bin/python src/scripts/archive_consultas.py extract "FULANO (123)" --to "AAA --- CONSULTAS/FULANO (123)"   # restore all
+
+An archive can be given by folder name (looked up in CONSULTAS_ARCHIVE_DIR) or by path.
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config.settings import (  # noqa: E402
+    ARCHIVE_MAX_PER_RUN,
+    ARCHIVE_THREADS,
+    CONSULTAS_ARCHIVE_DIR,
+    CONSULTAS_DIR,
+)
+from src.utils.folder_archiver import archive_folders, extract, read_index, summarize  # noqa: E402
+from src.utils.folder_checker import FolderChecker  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def archive_path(name: str) -> Path:
+    path = Path(name)
+    if path.suffix == '.zip' and path.exists():
+        return path
+    return CONSULTAS_ARCHIVE_DIR / f'{name}.zip'
+
+
+def mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def cmd_run(args):
+    inactive = FolderChecker(CONSULTAS_DIR.parent).find_inactive_folders(CONSULTAS_DIR)
+    batch = inactive[:args.limit]
+    if args.dry_run:
+        for name in batch:
+            print(name)
+        print(f"{len(batch)} of {len(inactive)} inactive folders would be archived to {CONSULTAS_ARCHIVE_DIR}")
+        return 0
+    results = archive_folders([CONSULTAS_DIR / name for name in batch], CONSULTAS_ARCHIVE_DIR,
+                              workers=args.jobs, remove_source=not args.keep_source)
+    summary = summarize(results)
+    for item in summary['archived']:
+        print(f"OK {item['folder']}: {item['files']} entries, {mb(item['bytes'])} -> {mb(item['archive_bytes'])}")
+    for folder in summary['already_archived']:
+        print(f"ALREADY {folder}: archive matches the folder")
+    for item in summary['failed']:
+        print(f"FAILED {item['folder']}: {item['error']}")
+    print(f"{len(summary['archived'])} archived, {mb(summary['bytes_before'])} -> {mb(summary['bytes_after'])}, "
+          f"{len(inactive) - len(batch)} left for the next run")
+    return 1 if summary['failed'] else 0
+
+
+def cmd_list(args):
+    index = read_index(archive_path(args.archive))
+    if args.json:
+        print(json.dumps(index, indent=1, ensure_ascii=False))
+        return 0
+    for name, entry in index['files'].items():
+        if not name.endswith('/'):
+            print(f"{entry['size']:>12,}  {name}")
+    print(f"{len(index['files'])} entries, {mb(index['bytes'])}")
+    return 0
+
+
+def cmd_extract(args):
+    for path in extract(archive_path(args.archive), Path(args.to), args.members or None):
+        print(path)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive inactive CONSULTAS folders')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='archive the inactive folders now')
+    run.add_argument('--dry-run', action='store_true', help='only list the folders that would be archived')
+    run.add_argument('--keep-source', action='store_true', help='do not remove the folders after archiving')
+    run.add_argument('--limit', type=int, default=ARCHIVE_MAX_PER_RUN, help='folders per run')
+    run.add_argument('-j', '--jobs', type=int, default=ARCHIVE_THREADS, help='folders compressed at once')
+    run.set_defaults(func=cmd_run)
+
+    ls = sub.add_parser('list', help="list an archive's files (reads only the index)")
+    ls.add_argument('archive', help='folder name or .zip path')
+    ls.add_argument('--json', action='store_true')
+    ls.set_defaults(func=cmd_list)
+
+    ex = sub.add_parser('extract', help='extract some files (or all) from an archive')
+    ex.add_argument('archive', help='folder name or .zip path')
+    ex.add_argument('members', nargs='*', help='paths inside the archive (default: everything)')
+    ex.add_argument('--to', default='.', help='destination directory')
+    ex.set_defaults(func=cmd_extract)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# src/scripts/compact_images.py
+"""
+Re-encode the camera photos under BASE_DIR (see src/utils/image_compactor.py).
+
+    .venv/bin/python src/scripts/compact_images.py --dry-run        # estimate only, writes nothing
+    .venv/bin/python src/scripts/compact_images.py --limit 100 -j 4
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config.settings import BASE_DIR, IMAGE_COMPACT_MAX_PER_RUN  # noqa: E402
+from src.utils.image_compactor import ImageCompactor  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shrink camera photos in the client folders')
+    parser.add_argument('--directory', default=str(BASE_DIR), help='Directory to compact')
+    parser.add_argument('--dry-run', action='store_true', help='only estimate the saving')
+    parser.add_argument('--limit', type=int, default=IMAGE_COMPACT_MAX_PER_RUN, help='photos per run')
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes (default: CPU count)')
+    parser.add_argument('--json', action='store_true', help='print the full summary as JSON')
+    args = parser.parse_args()
+
+    compactor = ImageCompactor(Path(args.directory))
+    summary = compactor.run(dry_run=args.dry_run, max_files=args.limit, workers=args.jobs)
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+        return
+
+    done = 'would be compacted' if args.dry_run else 'compacted'
+    print(f"{summary['candidates']} candidate photos ({mb(summary['candidate_bytes'])}), "
+          f"{summary['compacted']} {done}, {summary['not_worth_it']} not worth it, "
+          f"{summary['duplicates']} duplicates, {len(summary['failed'])} failed, {summary['pending']} left for later")
+    print(f"{mb(summary['bytes_before'])} -> {mb(summary['bytes_after'])} (saved {mb(summary['bytes_saved'])})")
+    if 'estimated_bytes_saved' in summary:
+        print(f"Estimated saving over all {summary['candidates']} candidates: {mb(summary['estimated_bytes_saved'])}")
+    for failure in summary['failed']:
+        print(f"FAILED {failure['path']}: {failure['error']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# src/scripts/folder_growth.py
+"""
+Query the folder size time series (src/utils/size_history.py) without touching BASE_DIR.
+
+    .venv/bin/python src/scripts/folder_growth.py                    # fastest growing, last 90 days
+    .venv/bin/python src/scripts/folder_growth.py --days 365 --top 20
+    .venv/bin/python src/scripts/folder_growth.py --folder "FULANO (123)"
+"""
+import argparse
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config.settings import GROWTH_WINDOW_DAYS, SIZE_HISTORY_PATH  # noqa: E402
+from src.utils.size_history import SizeHistory, today  # noqa: E402
+
+EPOCH = date(1970, 1, 1)
+
+
+def day_str(day: int) -> str:
+    return (EPOCH + timedelta(days=day)).isoformat()
+
+
+def mb(n: float) -> str:
+    return f"{n / (1024 * 1024):,.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Folder growth and disk forecast from the size history')
+    parser.add_argument('--days', type=int, default=GROWTH_WINDOW_DAYS, help='look-back window')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--folder', help="print one folder's history instead")
+    parser.add_argument('--db', type=Path, default=SIZE_HISTORY_PATH)
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"No size history yet ({args.db}); it is written by every check run")
+        return
+    history = SizeHistory(args.db)
+    try:
+        if args.folder:
+            for row in history.folder_history(args.folder):
+                last = datetime.fromtimestamp(row['last_activity']).date() if row['last_activity'] else '-'
+                print(f"{day_str(row['day'])}  {mb(row['bytes']):>14}  {row['files']:>8,} files  last activity {last}")
+            return
+
+        print(f"Fastest growing folders, last {args.days} days:")
+        for row in history.fastest_growing(args.days, args.top):
+            print(f"{mb(row['growth_bytes']):>14}  {mb(row['bytes_per_day']):>11}/day  "
+                  f"{row['growth_files']:>+7,} files  {row['name']}  "
+                  f"({day_str(row['first_day'])} -> {day_str(row['last_day'])})")
+
+        forecast = history.forecast(args.days)
+        if forecast.get('bytes_per_day') is None:
+            print("\nNot enough disk samples for a forecast yet")
+        else:
+            print(f"\nDisk: {mb(forecast['used_bytes'])} of {mb(forecast['total_bytes'])} used, "
+                  f"{mb(forecast['bytes_per_day'])}/day over {forecast['samples']} samples")
+            if forecast['days_until_full'] is not None:
+                print(f"Full in about {forecast['days_until_full']:,} days "
+                      f"({day_str(today() + forecast['days_until_full'])})")
+    finally:
+        history.close()
+
+
+if __name__ == '__main__':
+    main()
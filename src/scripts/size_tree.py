@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# src/scripts/size_tree.py
+"""
+Drill into folder sizes (src/utils/size_tree.py), from the tree the last check run saved.
+
+    .venv/bin/python src/scripts/size_tree.py                          # largest client folders
+    .venv/bin/python src/scripts/size_tree.py "FULANO (123)" --depth 1  # what is big inside it
+    .venv/bin/python src/scripts/size_tree.py --any-depth --top 20      # largest folders anywhere
+    .venv/bin/python src/scripts/size_tree.py --rescan                  # walk BASE_DIR now and save
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config.settings import BASE_DIR, SIZE_TREE_PATH  # noqa: E402
+from src.utils.file_operations import FileOperations  # noqa: E402
+from src.utils.size_tree import FIELDS, dump, largest, load  # noqa: E402
+
+
+def mb(n: int) -> str:
+    return f"{n / (1024 * 1024):,.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Largest folders from the saved size tree')
+    parser.add_argument('under', nargs='?', default='', help='folder to look inside (relative to BASE_DIR)')
+    parser.add_argument('--depth', type=int, default=1, help='levels below `under`')
+    parser.add_argument('--any-depth', action='store_true', help='rank folders at every depth')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--by', choices=FIELDS, default='bytes', help='bytes, files, blocks (on disk)')
+    parser.add_argument('--tree', type=Path, default=SIZE_TREE_PATH)
+    parser.add_argument('--rescan', action='store_true', help='walk BASE_DIR now and save the tree')
+    args = parser.parse_args()
+
+    if args.rescan or not args.tree.exists():
+        file_ops = FileOperations(BASE_DIR)
+        tree = file_ops.get_size_tree()
+        dump(tree, args.tree, root=str(BASE_DIR))
+        print(f"Scanned {BASE_DIR} ({file_ops.items_scanned:,} entries), saved to {args.tree}")
+    else:
+        tree, header = load(args.tree)
+        print(f"{header['root']} as of {header['scanned_at']} (--rescan to refresh)")
+
+    start = tree.find(args.under) if args.under else tree
+    if start is None:
+        sys.exit(f"{args.under} is not in the tree")
+    print(f"{args.under or 'total'}: {mb(start.bytes)}, {start.files:,} files, {mb(start.blocks)} on disk\n")
+    for path, node in largest(tree, args.top, None if args.any_depth else args.depth, args.by, args.under):
+        print(f"{mb(node.bytes):>14}  {node.files:>9,} files  {mb(node.blocks):>14} on disk  {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Post-transcription compaction of ATENDIMENTO recordings to low-bitrate Opus.
+
+Speech at 24 kbit/s mono Opus is a fraction of a WAV or high-bitrate M4A and
+still perfectly reviewable. A recording is only replaced once its transcript
+exists, the encoded file's duration matches the original, and the sidecars
+have been renamed to follow it:
+
+    audio.wav                   -> audio.opus
+    audio.wav.transcricao.txt   -> audio.opus.transcricao.txt
+    audio.wav.relatorio.md      -> audio.opus.relatorio.md
+
+If a sidecar cannot be moved, or the original cannot be removed, the moved
+sidecars are put back and the .opus file is removed, so a failure never
+leaves both recordings behind.
+The .opus file keeps the original mtime, so `needs_transcription` still sees
+the transcript as fresh and nothing is re-transcribed. Requires ffmpeg with
+libopus (and ffprobe) on PATH.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from src.config.settings import AUDIO_COMPACT_BITRATE, REPORT_SUFFIX, TRANSCRIPT_SUFFIX
+from src.utils.audio_transcriber import needs_transcription
+from src.utils.search_index import move_sidecar
+
+logger = logging.getLogger(__name__)
+
+OPUS_SUFFIX = '.opus'
+NOT_TRANSCRIBED_YET = 'no fresh transcript yet'  # the only skip worth trying again later
+
+# Encoded duration may differ by codec padding; anything beyond this is a bad encode
+_DURATION_TOLERANCE_SECONDS = 0.5
+_DURATION_TOLERANCE_RATIO = 0.01
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which('ffmpeg') is not None and shutil.which('ffprobe') is not None
+
+
+def probe_duration(path: Path) -> float:
+    out = subprocess.run(
+        ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+         '-of', 'default=noprint_wrappers=1:nokey=1', str(path)],
+        capture_output=True, text=True, timeout=120, check=True,
+    )
+    return float(out.stdout.strip())
+
+
+def compact_audio(audio_path: Path, bitrate: str = AUDIO_COMPACT_BITRATE) -> dict:
+    """Transcode one recording to Opus and swap it in. Returns a result dict.
+
+    Module-level so it can run in a ProcessPoolExecutor.
+    """
+    audio_path = Path(audio_path)
+    target = audio_path.with_suffix(OPUS_SUFFIX)
+    result = {'audio': str(audio_path), 'opus': str(target)}
+
+    if audio_path.suffix.lower() == OPUS_SUFFIX:
+        return dict(result, skipped='already opus')
+    if needs_transcription(audio_path):
+        return dict(result, skipped=NOT_TRANSCRIBED_YET)
+    if target.exists():
+        return dict(result, error=f'{target.name} already exists')
+
+    tmp = audio_path.with_name(f'.{target.name}.tmp')
+    try:
+        subprocess.run(
+            ['ffmpeg', '-nostdin', '-v', 'error', '-y', '-i', str(audio_path),
+             '-vn', '-ac', '1', '-c:a', 'libopus', '-b:a', bitrate,
+             '-application', 'voip', '-f', 'ogg', str(tmp)],
+            capture_output=True, text=True, timeout=3600, check=True,
+        )
+        original = probe_duration(audio_path)
+        encoded = probe_duration(tmp)
+        tolerance = max(_DURATION_TOLERANCE_SECONDS, original * _DURATION_TOLERANCE_RATIO)
+        if abs(original - encoded) > tolerance:
+            raise RuntimeError(f'duration mismatch: {original:.1f}s vs {encoded:.1f}s')
+
+        st = audio_path.stat()
+        bytes_after = tmp.stat().st_size
+        if bytes_after >= st.st_size:
+            tmp.unlink()
+            return dict(result, skipped='opus not smaller')
+
+        os.replace(tmp, target)
+        # Keep the original mtime so the transcript stays newer than the audio
+        os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+        moved = []
+        try:
+            for suffix in (TRANSCRIPT_SUFFIX, REPORT_SUFFIX):
+                sidecar = audio_path.parent / (audio_path.name + suffix)
+                if sidecar.exists():
+                    os.replace(sidecar, target.parent / (target.name + suffix))
+                    moved.append((sidecar, target.parent / (target.name + suffix)))
+            audio_path.unlink()
+        except OSError:
+            # Put the sidecars back and drop the Opus file: the original stays as it was
+            for sidecar, new in reversed(moved):
+                os.replace(new, sidecar)
+            target.unlink(missing_ok=True)
+            raise
+        for sidecar, new in moved:
+            move_sidecar(sidecar, new)
+    except (subprocess.SubprocessError, OSError, ValueError, RuntimeError) as e:
+        tmp.unlink(missing_ok=True)
+        stderr = getattr(e, 'stderr', None)
+        return dict(result, error=(stderr or str(e)).strip())
+
+    return dict(
+        result,
+        bytes_before=st.st_size,
+        bytes_after=bytes_after,
+        bytes_saved=st.st_size - bytes_after,
+    )
+
+
+def compact_batch(paths: Iterable[Path], workers: Optional[int] = None) -> List[dict]:
+    """Compact many recordings in a process pool (ffmpeg itself is single-threaded for audio)."""
+    paths = list(paths)
+    if not paths:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(compact_audio, paths))
+
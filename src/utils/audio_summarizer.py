@@ -16,8 +16,6 @@ import re
 from datetime import datetime
 from pathlib import Path
 
-import requests
-
 from src.config.settings import (
     OPENROUTER_API_KEY,
     OPENROUTER_BASE_URL,
@@ -25,6 +23,9 @@ from src.config.settings import (
     REPORT_SUFFIX,
     TRANSCRIPT_SUFFIX,
 )
+from src.utils.audio_transcriber import read_transcript
+from src.utils.metrics import metrics
+from src.utils.search_index import index_sidecar
 
 logger = logging.getLogger(__name__)
 
@@ -149,19 +150,25 @@ def summarize(transcript: str, client_folder: str) -> str:
         "temperature": 0.2,
     }
 
-    resp = requests.post(
-        f"{OPENROUTER_BASE_URL}/chat/completions",
-        headers={
-            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://github.com/brpl/pwa-file-checker",
-            "X-Title": "PWA Audio Summarizer",
-        },
-        data=json.dumps(payload),
-        timeout=180,
-    )
+    import requests  # only needed when a report is actually generated
+
+    with metrics.span("llm.request"):
+        resp = requests.post(
+            f"{OPENROUTER_BASE_URL}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://github.com/brpl/pwa-file-checker",
+                "X-Title": "PWA Audio Summarizer",
+            },
+            data=json.dumps(payload),
+            timeout=180,
+        )
     resp.raise_for_status()
     body = resp.json()
+    usage = body.get("usage") or {}
+    metrics.incr("llm.prompt_tokens", usage.get("prompt_tokens", 0))
+    metrics.incr("llm.completion_tokens", usage.get("completion_tokens", 0))
 
     try:
         content = body["choices"][0]["message"]["content"]
@@ -173,7 +180,7 @@ def summarize(transcript: str, client_folder: str) -> str:
 
 def summarize_and_save(transcript_path: Path, client_folder: str) -> Path:
     """Read transcript, generate report, write `<audio>.relatorio.md`. Returns the report path."""
-    transcript = transcript_path.read_text(encoding="utf-8")
+    transcript = read_transcript(transcript_path)
     if not transcript.strip():
         raise RuntimeError(f"Empty transcript: {transcript_path}")
 
@@ -181,4 +188,5 @@ def summarize_and_save(transcript_path: Path, client_folder: str) -> Path:
     report_path = report_path_for(transcript_path)
     report_path.write_text(report, encoding="utf-8")
     logger.info(f"Saved report: {report_path}")
+    index_sidecar(report_path)
     return report_path
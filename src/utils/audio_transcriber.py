@@ -7,7 +7,11 @@ transcript already exists and is newer than the audio.
 """
 from __future__ import annotations
 
+import gc
+import json
 import logging
+import socket
+import time
 from pathlib import Path
 from typing import Iterator
 
@@ -16,34 +20,80 @@ from src.config.settings import (
     AUDIO_EXTENSIONS,
     EXCLUDED_DIRS,
     TRANSCRIPT_SUFFIX,
+    WHISPER_BEAM_SIZE,
     WHISPER_COMPUTE_TYPE,
     WHISPER_DEVICE,
     WHISPER_LANGUAGE,
     WHISPER_MODEL,
+    WHISPER_SOCKET,
+    WHISPER_VAD,
 )
+from src.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# First line of every transcript, so the model that produced it is on record
+TRANSCRIPT_HEADER = '# Whisper: {model} ({compute_type})\n\n'
+_HEADER_PREFIX = '# Whisper: '
+
 _model = None
+_model_name = None
+_model_compute_type = None
+_model_load_seconds = 0.0
+
+# Timing of the most recent transcribe() call, read by the runners:
+# backend ("server" | "local"), model, seconds, load_seconds, warm, audio_seconds.
+last_transcription: dict = {}
 
 
-def _get_model():
-    """Lazy-load the Whisper model — first call downloads weights."""
-    global _model
+def _get_model(model_name: str = WHISPER_MODEL, compute_type: str = WHISPER_COMPUTE_TYPE):
+    """Lazy-load the Whisper model — first call downloads weights.
+
+    Only one model is kept resident; asking for a different one (or a
+    different compute_type) replaces it.
+    """
+    global _model, _model_name, _model_compute_type, _model_load_seconds
+    if _model is not None and (_model_name, _model_compute_type) != (model_name, compute_type):
+        unload_model()
     if _model is None:
         from faster_whisper import WhisperModel
         logger.info(
-            f"Loading Whisper model '{WHISPER_MODEL}' "
-            f"(device={WHISPER_DEVICE}, compute_type={WHISPER_COMPUTE_TYPE})"
+            f"Loading Whisper model '{model_name}' "
+            f"(device={WHISPER_DEVICE}, compute_type={compute_type})"
         )
+        started = time.perf_counter()
         _model = WhisperModel(
-            WHISPER_MODEL,
+            model_name,
             device=WHISPER_DEVICE,
-            compute_type=WHISPER_COMPUTE_TYPE,
+            compute_type=compute_type,
         )
+        _model_name = model_name
+        _model_compute_type = compute_type
+        _model_load_seconds = time.perf_counter() - started
+        logger.info(f"Whisper model loaded in {_model_load_seconds:.1f}s")
     return _model
 
 
+def unload_model():
+    """Drop the cached Whisper model and hand the freed memory back to the OS."""
+    global _model, _model_name, _model_compute_type
+    if _model is None:
+        return
+    _model = None
+    _model_name = None
+    _model_compute_type = None
+    gc.collect()
+    import ctypes
+    import ctypes.util
+
+    try:
+        # glibc keeps freed arenas mapped; trim them so an idle daemon stays small
+        ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    logger.info("Unloaded Whisper model")
+
+
 def transcript_path_for(audio_path: Path) -> Path:
     return audio_path.parent / (audio_path.name + TRANSCRIPT_SUFFIX)
 
@@ -75,29 +125,118 @@ def needs_transcription(audio_path: Path) -> bool:
     return audio_path.stat().st_mtime > transcript.stat().st_mtime
 
 
-def transcribe(audio_path: Path) -> str:
-    """Transcribe a single audio file. Returns the full text."""
-    model = _get_model()
-    segments, info = model.transcribe(
-        str(audio_path),
-        language=WHISPER_LANGUAGE,
-        beam_size=5,
-        vad_filter=True,
-    )
-    parts = [seg.text.strip() for seg in segments]
+def transcribe_local(audio_path: Path, model_name: str = WHISPER_MODEL,
+                     compute_type: str = WHISPER_COMPUTE_TYPE,
+                     beam_size: int = WHISPER_BEAM_SIZE, vad_filter: bool = WHISPER_VAD) -> dict:
+    """Transcribe in this process. Returns text plus timing (see `last_transcription`)."""
+    warm = _model is not None and (_model_name, _model_compute_type) == (model_name, compute_type)
+    started = time.perf_counter()
+    if warm:
+        model = _get_model(model_name, compute_type)
+    else:
+        with metrics.span('whisper.load'):
+            model = _get_model(model_name, compute_type)
+    with metrics.span('whisper.inference'):
+        segments, info = model.transcribe(
+            str(audio_path),
+            language=WHISPER_LANGUAGE,
+            beam_size=beam_size,
+            vad_filter=vad_filter,
+        )
+        # segments is lazy: decoding happens while iterating
+        parts = [seg.text.strip() for seg in segments]
     text = ' '.join(parts).strip()
+    metrics.incr('whisper.audio_seconds', info.duration)
     logger.info(
         f"Transcribed {audio_path.name}: "
         f"duration={info.duration:.1f}s, language={info.language}, "
         f"chars={len(text)}"
     )
-    return text
-
-
-def transcribe_and_save(audio_path: Path) -> Path:
+    return {
+        "text": text,
+        "model": model_name,
+        "seconds": round(time.perf_counter() - started, 3),
+        "load_seconds": 0.0 if warm else round(_model_load_seconds, 3),
+        "warm": warm,
+        "audio_seconds": round(info.duration, 1),
+    }
+
+
+def _transcribe_via_server(audio_path: Path, model_name: str):
+    """Send the job to a running model server (`audio_daily_runner.py --serve`).
+
+    Returns the server's result dict, or None when no server is listening.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(1.0)
+        try:
+            sock.connect(WHISPER_SOCKET)
+        except (FileNotFoundError, ConnectionRefusedError, socket.timeout):
+            return None
+        sock.settimeout(None)  # long recordings take minutes
+        request = {"audio": str(Path(audio_path).resolve()), "model": model_name}
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    except OSError as e:
+        logger.warning(f"Whisper server connection failed ({e}); transcribing in-process")
+        return None
+    finally:
+        sock.close()
+
+    if not line:
+        logger.warning("Whisper server closed the connection; transcribing in-process")
+        return None
+    reply = json.loads(line)
+    if not reply.get("ok"):
+        raise RuntimeError(f"Whisper server error: {reply.get('error')}")
+    return reply
+
+
+def transcribe(audio_path: Path, model_name: str = WHISPER_MODEL) -> str:
+    """Transcribe a single audio file. Returns the full text.
+
+    Uses the warm model server when one is running, otherwise loads the model
+    in-process.
+    """
+    started = time.perf_counter()
+    result = _transcribe_via_server(audio_path, model_name)
+    backend = "server"
+    if result is None:
+        result = transcribe_local(audio_path, model_name)
+        backend = "local"
+
+    last_transcription.clear()
+    last_transcription.update({
+        "backend": backend,
+        "model": result.get("model", model_name),
+        "seconds": round(time.perf_counter() - started, 3),
+        "load_seconds": result.get("load_seconds", 0.0),
+        "warm": result.get("warm", True),
+        "audio_seconds": result.get("audio_seconds"),
+    })
+    return result["text"]
+
+
+def read_transcript(transcript_path: Path) -> str:
+    """Transcript text without the model header line."""
+    text = transcript_path.read_text(encoding='utf-8')
+    if text.startswith(_HEADER_PREFIX):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+    return text.lstrip('\n')
+
+
+def transcribe_and_save(audio_path: Path, model_name: str = WHISPER_MODEL) -> Path:
     """Transcribe audio and write the sidecar .transcricao.txt. Returns the transcript path."""
-    text = transcribe(audio_path)
+    text = transcribe(audio_path, model_name)
+    header = TRANSCRIPT_HEADER.format(
+        model=last_transcription["model"], compute_type=WHISPER_COMPUTE_TYPE,
+    )
     transcript = transcript_path_for(audio_path)
-    transcript.write_text(text, encoding='utf-8')
+    transcript.write_text(header + text, encoding='utf-8')
     logger.info(f"Saved transcript: {transcript}")
+
+    from src.utils.search_index import index_sidecar
+    index_sidecar(transcript)
     return transcript
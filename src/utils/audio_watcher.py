@@ -0,0 +1,152 @@
+"""
+Change notification for the ATENDIMENTO folders (watch mode of the audio runner).
+
+On Linux an inotify watch is placed on BASE_DIR, each client folder and every
+directory under <client>/ATENDIMENTO/, through ctypes so no extra dependency
+is needed. Where inotify is unavailable (macOS, network/FUSE mounts, watch
+limit reached) `create_watcher` returns a PollingWatcher that simply sleeps;
+the caller re-syncs the job queue on every wake-up either way, which is cheap
+because unchanged directories are skipped by mtime.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from src.config.settings import ATENDIMENTO_DIR_NAME, AUDIO_EXTENSIONS, EXCLUDED_DIRS
+
+logger = logging.getLogger(__name__)
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+_WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+               | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    """Fallback: no notifications, just wait for the poll interval."""
+
+    def wait(self, timeout: float) -> bool:
+        time.sleep(timeout)
+        return False
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    def __init__(self, base_dir: Path):
+        self.base_dir = Path(base_dir)
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._paths = {}
+        self._watch_tree(self.base_dir)
+        logger.info(f"inotify: watching {len(self._paths)} folder(s)")
+
+    def _add(self, path: Path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, 'inotify watch limit reached (fs.inotify.max_user_watches)')
+            logger.warning(f"inotify: cannot watch {path}: {os.strerror(err)}")
+            return
+        self._paths[wd] = path
+
+    def _watch_tree(self, path: Path):
+        """Watch `path` if it is BASE_DIR, a client folder or inside an ATENDIMENTO tree."""
+        try:
+            rel = path.relative_to(self.base_dir).parts
+        except ValueError:
+            return
+        if len(rel) == 1 and rel[0] in EXCLUDED_DIRS:
+            return
+        if len(rel) >= 2 and rel[1] != ATENDIMENTO_DIR_NAME:
+            return
+
+        self._add(path)
+        if len(rel) == 0:
+            children = (p for p in path.iterdir() if p.is_dir())
+        elif len(rel) == 1:
+            children = [path / ATENDIMENTO_DIR_NAME] if (path / ATENDIMENTO_DIR_NAME).is_dir() else []
+        else:
+            children = (p for p in path.iterdir() if p.is_dir())
+        for child in children:
+            self._watch_tree(child)
+
+    def wait(self, timeout: float) -> bool:
+        """Block until something relevant changes or `timeout` expires. True if woken by an event."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+
+        relevant = False
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode(errors='surrogateescape')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                relevant = True
+                continue
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+                continue
+            parent = self._paths.get(wd)
+            if parent is None or not name:
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._watch_tree(parent / name)
+                    except OSError as e:
+                        # The poll timeout still picks the folder up on the next sync
+                        logger.warning(f"inotify: {e}")
+                relevant = True
+            elif os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                relevant = True
+        return relevant
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_watcher(base_dir: Path, force_polling: bool = False):
+    """inotify where available, otherwise polling."""
+    if force_polling or not sys.platform.startswith('linux'):
+        return PollingWatcher()
+    try:
+        return InotifyWatcher(base_dir)
+    except (OSError, AttributeError) as e:
+        logger.warning(f"inotify unavailable ({e}); falling back to polling")
+        return PollingWatcher()
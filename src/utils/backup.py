@@ -1,9 +1,7 @@
 import os
 import logging
-import boto3
 from pathlib import Path
 from datetime import datetime
-from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +20,9 @@ class S3Backup:
         self.aws_region = aws_region
         self.bucket_name = bucket_name
         
+        # Imported here: boto3 takes longer to import than the rest of the app combined
+        import boto3
+
         # Initialize S3 client
         self.s3_client = boto3.client(
             's3',
@@ -37,6 +38,8 @@ class S3Backup:
         Returns:
             bool: True if bucket exists or was created successfully
         """
+        from botocore.exceptions import ClientError
+
         try:
             # Check if bucket exists
             self.s3_client.head_bucket(Bucket=self.bucket_name)
@@ -75,6 +78,8 @@ class S3Backup:
         Returns:
             bool: True if backup was successful
         """
+        from botocore.exceptions import ClientError
+
         if not self.ensure_bucket_exists():
             return False
             
@@ -0,0 +1,408 @@
+"""
+Check registry and orchestrator shared by src/main.py and cron_runner.py.
+
+Each check declares the checks it must run after. Checks whose dependencies
+have finished run concurrently, each in its own daemon thread with its own
+timeout; a check that overruns is reported as timed out and left behind, so
+one slow network share cannot hold up the whole run. Every JSON entry gets
+`duration_ms`, `items_scanned` and `errors` (anything the check raised or
+logged at ERROR level while it ran). A check built with `needs_results` is
+also given its dependencies' payloads, so it can build on them instead of
+walking BASE_DIR again.
+
+With a Shard (cron_runner.py --shard i/N), the checks that walk the client
+folders run over that shard's folders only and the rest only on shard 0;
+`merge_shards()` then builds one result out of the N partial ones, using
+each check's `merge` (or src/utils/sharding.py merge_payloads()).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config.settings import (
+    ARCHIVE_CONSULTAS_ENABLED,
+    ARCHIVE_MAX_PER_RUN,
+    AUTOREMOVE_DIRS,
+    BASE_DIR,
+    CHECK_TIMEOUT_SECONDS,
+    CONSULTAS_ARCHIVE_DIR,
+    CONSULTAS_DIR,
+    DOCUMENT_SCAN_ENABLED,
+    GROWTH_TOP,
+    GROWTH_WINDOW_DAYS,
+    IMAGE_COMPACT_ENABLED,
+    NAMING_ISSUES_REPORT,
+    NAMING_ISSUES_SAMPLES,
+    SHARD_RESULTS_DIR,
+    SIZE_HISTORY_PATH,
+    SIZE_TREE_PATH,
+    SIZE_TREE_TOP_DEPTH,
+)
+from src.utils.document_scanner import DocumentScanner
+from src.utils.file_operations import FileOperations
+from src.utils.folder_archiver import archive_folders, summarize
+from src.utils.folder_checker import FolderChecker
+from src.utils.image_compactor import ImageCompactor
+from src.utils.metrics import metrics
+from src.utils.sharding import Shard, merge_payloads
+from src.utils.size_history import SizeHistory
+from src.utils.size_tree import SizeNode, dump as dump_size_tree, largest, merge as merge_size_trees
+
+logger = logging.getLogger(__name__)
+
+# A check returns its JSON payload and how many files/folders it looked at.
+# Sharded checks are also given the Shard (None when the run isn't sharded),
+# and checks with needs_results a dict of their finished dependencies' payloads.
+CheckFunc = Callable[..., Tuple[dict, int]]
+# Combines the payloads of a sharded check from every shard, in shard order
+MergeFunc = Callable[[Path, List[dict]], dict]
+
+
+class Check:
+    def __init__(self, name: str, func: CheckFunc, depends_on: Sequence[str] = (),
+                 timeout: float = CHECK_TIMEOUT_SECONDS, sharded: bool = False,
+                 merge: Optional[MergeFunc] = None, needs_results: bool = False):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+        self.timeout = timeout
+        self.sharded = sharded
+        self.merge = merge
+        self.needs_results = needs_results
+
+
+def _owned_by(shard: Optional[Shard]):
+    return shard.owns if shard is not None else None
+
+
+def _autoremove(base_dir: Path):
+    removed = []
+    for dirname in AUTOREMOVE_DIRS:
+        target = base_dir / dirname
+        if target.exists():
+            shutil.rmtree(target)
+            removed.append(dirname)
+    return {"folders": removed}, len(AUTOREMOVE_DIRS)
+
+
+def _inactive_folders(base_dir: Path):
+    folder_checker = FolderChecker(base_dir)
+    inactive = folder_checker.find_inactive_folders(CONSULTAS_DIR)
+    return {"count": len(inactive), "folders": inactive}, folder_checker.items_scanned
+
+
+def _mb(n: Optional[int], digits: Optional[int] = None):
+    if n is None:
+        return None
+    return int(n / (1024 * 1024)) if digits is None else round(n / (1024 * 1024), digits)
+
+
+def _folder_sizes(base_dir: Path, shard: Optional[Shard] = None):
+    file_ops = FileOperations(base_dir, include=_owned_by(shard))
+    tree = file_ops.get_size_tree()
+    if shard is not None:
+        # Ranked, saved and recorded by the merge, once every shard's folders are in
+        return {"tree": tree.to_list()}, file_ops.items_scanned
+    return _summarize_sizes(base_dir, tree), file_ops.items_scanned
+
+
+def _merge_folder_sizes(base_dir: Path, payloads: List[dict]):
+    tree = merge_size_trees((SizeNode.from_list(payload["tree"]) for payload in payloads), base_dir.name)
+    return _summarize_sizes(base_dir, tree)
+
+
+def _summarize_sizes(base_dir: Path, tree: SizeNode):
+    folder_stats = FileOperations(base_dir).get_folder_stats(tree)
+    top_10 = sorted(folder_stats.items(), key=lambda x: x[1]["bytes"], reverse=True)[:10]
+    payload = {
+        "top_10": [{"name": name, "size_mb": _mb(stats["bytes"])} for name, stats in top_10],
+        "largest_subfolders": [
+            {"path": path, "size_mb": _mb(node.bytes), "files": node.files}
+            for path, node in largest(tree, 10, depth=SIZE_TREE_TOP_DEPTH)
+        ],
+        "size_tree": str(SIZE_TREE_PATH),
+    }
+    # Saved so any folder can be drilled into later without a rescan (pwa.py du)
+    dump_size_tree(tree, SIZE_TREE_PATH, root=str(base_dir))
+
+    # Append this run to the time series, then read the trend back from it
+    history = SizeHistory(SIZE_HISTORY_PATH)
+    try:
+        history.record(folder_stats, base_dir)
+        forecast = history.forecast(GROWTH_WINDOW_DAYS)
+        payload["growth"] = {
+            "window_days": GROWTH_WINDOW_DAYS,
+            "fastest": [
+                {"name": row["name"], "growth_mb": _mb(row["growth_bytes"]), "mb_per_day": _mb(row["bytes_per_day"], 1),
+                 "files_added": row["growth_files"]}
+                for row in history.fastest_growing(GROWTH_WINDOW_DAYS, GROWTH_TOP)
+            ],
+            "disk_forecast": {
+                "samples": forecast["samples"],
+                "used_mb": _mb(forecast.get("used_bytes")),
+                "total_mb": _mb(forecast.get("total_bytes")),
+                "mb_per_day": _mb(forecast.get("bytes_per_day"), 1),
+                "days_until_full": forecast.get("days_until_full"),
+            },
+        }
+    finally:
+        history.close()
+    return payload
+
+
+def _model_files(base_dir: Path):
+    file_ops = FileOperations(base_dir)
+    return {"success": file_ops.replace_model_files()}, file_ops.items_scanned
+
+
+def _nonconforming_names(base_dir: Path):
+    file_ops = FileOperations(base_dir)
+    nonconforming = file_ops.check_nonconforming_names()
+    return {"count": len(nonconforming), "items": nonconforming}, file_ops.items_scanned
+
+
+def _file_naming_issues(base_dir: Path, shard: Optional[Shard] = None):
+    file_ops = FileOperations(base_dir, include=_owned_by(shard))
+    report = NAMING_ISSUES_REPORT
+    if shard is not None:
+        report = shard.path_in(SHARD_RESULTS_DIR, NAMING_ISSUES_REPORT.name)
+        report.parent.mkdir(parents=True, exist_ok=True)
+    return file_ops.write_file_naming_issues(report), file_ops.items_scanned
+
+
+def _merge_file_naming_issues(base_dir: Path, payloads: List[dict]):
+    # Each shard's report is on the shared storage, wherever this machine mounts it
+    reports = [SHARD_RESULTS_DIR / Path(payload["report"]).name for payload in payloads]
+    tmp_path = NAMING_ISSUES_REPORT.with_name(f".{NAMING_ISSUES_REPORT.name}.tmp")
+    with open(tmp_path, "wb") as out:
+        for report in reports:
+            with open(report, "rb") as part:
+                shutil.copyfileobj(part, out)
+    os.replace(tmp_path, NAMING_ISSUES_REPORT)
+    for report in reports:
+        report.unlink()
+
+    def walk_order(path: str):
+        # BASE_DIR's own entries come first, by name, then each client folder's
+        # paths, which all come from one shard and are already in walk order
+        parts = Path(path).parts
+        return (0, path) if len(parts) == 1 else (1, parts[0])
+
+    return {
+        "counts": merge_payloads([payload["counts"] for payload in payloads]),
+        "samples": {
+            category: sorted(chain.from_iterable(payload["samples"][category] for payload in payloads),
+                             key=walk_order)[:NAMING_ISSUES_SAMPLES]
+            for category in payloads[0]["samples"]
+        },
+        "report": str(NAMING_ISSUES_REPORT),
+    }
+
+
+def _document_scans(base_dir: Path, shard: Optional[Shard] = None):
+    scanner = DocumentScanner(base_dir, include=_owned_by(shard))
+    return scanner.run(), scanner.items_scanned
+
+
+def _image_compaction(base_dir: Path, shard: Optional[Shard] = None):
+    compactor = ImageCompactor(base_dir, include=_owned_by(shard))
+    return compactor.run(), compactor.items_scanned
+
+
+def _archived_consultas(base_dir: Path, results: Dict[str, dict]):
+    # The folders inactive_folders just listed; walking CONSULTAS again would double the scan
+    listed = results["inactive_folders"]
+    if "error" in listed:
+        raise RuntimeError(f"inactive_folders failed: {listed['error']}")
+    inactive = listed["folders"]
+    batch = inactive[:ARCHIVE_MAX_PER_RUN]
+    archived = archive_folders([CONSULTAS_DIR / name for name in batch], CONSULTAS_ARCHIVE_DIR)
+    return dict(summarize(archived), pending=len(inactive) - len(batch)), len(batch)
+
+
+# Order here is the order of the JSON keys. Junk folders are removed before
+# anything walks BASE_DIR so they don't show up in sizes or names. The
+# sharded checks are the ones that walk inside the client folders.
+CHECKS: List[Check] = [
+    Check("autoremoved_folders", _autoremove),
+    Check("inactive_folders", _inactive_folders),
+    Check("folder_sizes", _folder_sizes, depends_on=["autoremoved_folders"],
+          sharded=True, merge=_merge_folder_sizes),
+    Check("model_files_replaced", _model_files),
+    Check("nonconforming_names", _nonconforming_names, depends_on=["autoremoved_folders"]),
+    Check("file_naming_issues", _file_naming_issues, depends_on=["autoremoved_folders"],
+          sharded=True, merge=_merge_file_naming_issues),
+]
+
+# These write into the client folders, so they only run when asked for
+# (DOCUMENT_SCAN=1, IMAGE_COMPACT=1, ARCHIVE_CONSULTAS=1). Photos are scanned
+# before they are compacted; CONSULTAS folders are archived after
+# inactive_folders has listed them, so this run's report still shows them.
+if ARCHIVE_CONSULTAS_ENABLED:
+    CHECKS.append(Check("archived_consultas", _archived_consultas, depends_on=["inactive_folders"],
+                        needs_results=True))
+if DOCUMENT_SCAN_ENABLED:
+    CHECKS.append(Check("document_scans", _document_scans, depends_on=["autoremoved_folders"], sharded=True))
+if IMAGE_COMPACT_ENABLED:
+    CHECKS.append(Check("image_compaction", _image_compaction,
+                        depends_on=["autoremoved_folders", "document_scans", "folder_sizes"], sharded=True))
+
+
+class _ErrorCollector(logging.Handler):
+    """Attributes ERROR log records to the check running on the emitting thread."""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.by_thread: Dict[int, List[str]] = {}
+
+    def emit(self, record):
+        errors = self.by_thread.get(record.thread)
+        if errors is not None:
+            errors.append(record.getMessage())
+
+
+def _run_one(check: Check, base_dir: Path, shard: Optional[Shard], dependencies: Dict[str, dict],
+             collector: _ErrorCollector, done: queue.Queue):
+    errors = collector.by_thread[threading.get_ident()] = []
+    started = time.perf_counter()
+    args = (base_dir, shard) if check.sharded else (base_dir,)
+    if check.needs_results:
+        args += (dependencies,)
+    try:
+        with metrics.span(f"check.{check.name}"):
+            payload, items_scanned = check.func(*args)
+        metrics.incr("items_scanned", items_scanned)
+    except Exception as e:
+        logger.exception(f"Check {check.name} failed")
+        payload, items_scanned = {"error": str(e)}, 0
+    payload.update({
+        "duration_ms": int((time.perf_counter() - started) * 1000),
+        "items_scanned": items_scanned,
+        "errors": list(dict.fromkeys(errors)),
+    })
+    done.put((check.name, payload))
+
+
+def run_checks(base_dir: Path = BASE_DIR, checks: Optional[List[Check]] = None,
+               shard: Optional[Shard] = None) -> dict:
+    """Run the registered checks and return the structured results (one shard's part, given a shard)."""
+    checks = CHECKS if checks is None else checks
+    if shard is not None:
+        checks = [check for check in checks if check.sharded or shard.runs_global_checks]
+    by_name = {check.name: check for check in checks}
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "base_dir": str(base_dir),
+        "checks": {},
+    }
+
+    collector = _ErrorCollector()
+    src_logger = logging.getLogger("src")
+    src_logger.addHandler(collector)
+
+    finished: Dict[str, dict] = {}
+    running: Dict[str, float] = {}  # name -> deadline (monotonic)
+    done: queue.Queue = queue.Queue()
+    started = time.perf_counter()
+    try:
+        while len(finished) < len(checks):
+            for check in checks:
+                if check.name in finished or check.name in running:
+                    continue
+                if all(dep in finished or dep not in by_name for dep in check.depends_on):
+                    running[check.name] = time.monotonic() + check.timeout
+                    dependencies = {dep: finished[dep] for dep in check.depends_on if dep in finished}
+                    threading.Thread(
+                        target=_run_one, args=(check, base_dir, shard, dependencies, collector, done),
+                        name=f"check-{check.name}", daemon=True,
+                    ).start()
+
+            if not running:
+                raise RuntimeError(f"Unsatisfiable check dependencies: {sorted(set(by_name) - set(finished))}")
+
+            try:
+                name, payload = done.get(timeout=max(0.0, min(running.values()) - time.monotonic()))
+                if name in running:
+                    del running[name]
+                    finished[name] = payload
+                    logger.info(f"Check {name} finished in {payload['duration_ms']} ms")
+            except queue.Empty:
+                now = time.monotonic()
+                for name in [n for n, deadline in running.items() if deadline <= now]:
+                    # The thread can't be killed; it is a daemon and is abandoned
+                    del running[name]
+                    timeout = by_name[name].timeout
+                    logger.error(f"Check {name} timed out after {timeout:.0f}s")
+                    finished[name] = {
+                        "error": f"timed out after {timeout:.0f}s",
+                        "duration_ms": int(timeout * 1000),
+                        "items_scanned": 0,
+                        "errors": [f"timed out after {timeout:.0f}s"],
+                    }
+    finally:
+        src_logger.removeHandler(collector)
+
+    results["checks"] = {check.name: finished[check.name] for check in checks}
+    results["duration_ms"] = int((time.perf_counter() - started) * 1000)
+    return results
+
+
+def _merge_check(check: Check, base_dir: Path, payloads: List[dict]) -> dict:
+    parts = [{k: v for k, v in payload.items() if k not in ("duration_ms", "items_scanned", "errors")}
+             for payload in payloads]
+    failed = [f"shard {i}: {part['error']}" for i, part in enumerate(parts) if "error" in part]
+    started = time.perf_counter()
+    if failed:
+        # Merging the rest would make the failed shard's folders look as if they had vanished
+        merged = {"error": "; ".join(failed)}
+    else:
+        try:
+            with metrics.span(f"merge.{check.name}"):
+                merged = check.merge(base_dir, parts) if check.merge else merge_payloads(parts)
+        except Exception as e:
+            logger.exception(f"Merging check {check.name} failed")
+            merged = {"error": f"merge failed: {e}"}
+    merged.update({
+        # The shards ran at the same time, so the check took as long as the slowest one
+        "duration_ms": max(payload["duration_ms"] for payload in payloads)
+        + int((time.perf_counter() - started) * 1000),
+        "items_scanned": sum(payload["items_scanned"] for payload in payloads),
+        "errors": list(dict.fromkeys(chain.from_iterable(payload["errors"] for payload in payloads))),
+    })
+    return merged
+
+
+def merge_shards(partials: List[dict], base_dir: Path = BASE_DIR, checks: Optional[List[Check]] = None) -> dict:
+    """One run's results from the results of all its shards (in shard order, shard 0 first)."""
+    checks = CHECKS if checks is None else checks
+    results = {
+        "timestamp": min(partial["timestamp"] for partial in partials),
+        "base_dir": str(base_dir),
+        "checks": {},
+    }
+    for check in checks:
+        payloads = [partial["checks"][check.name] for partial in partials if check.name in partial["checks"]]
+        if not payloads:
+            continue
+        if check.sharded:
+            if len(payloads) < len(partials):
+                raise ValueError(f"{check.name} is missing from some shards; are they all on the same settings?")
+            results["checks"][check.name] = _merge_check(check, base_dir, payloads)
+        else:
+            results["checks"][check.name] = payloads[0]
+    results["duration_ms"] = max(partial["duration_ms"] for partial in partials)
+    results["shards"] = [
+        {"shard": partial["shard"], "host": partial["host"], "timestamp": partial["timestamp"],
+         "duration_ms": partial["duration_ms"], "metrics": partial.get("metrics")}
+        for partial in partials
+    ]
+    return results
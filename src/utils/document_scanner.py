@@ -0,0 +1,238 @@
+"""
+Turns new document photos under BASE_DIR into scanned-looking pages.
+
+Phones drop multi-MB JPEG/HEIC photos of documents into the client folders.
+This stage finds the ones not seen before (FileLedger, keyed by content hash,
+so a photo is never processed twice, not even after a rename or a copy),
+runs them through scanify's `find_page` -> `warp_to_a4` -> `scan_effect` in a
+process pool and writes the compact page next to the original:
+
+    CLIENTE (123)/RG.jpg  ->  CLIENTE (123)/RG.scan.jpg
+
+Photos where no page is detected (people, places, screenshots) are recorded
+as skipped and left alone. Originals are never modified. HEIC needs the
+optional `pillow-heif` package; without it HEIC photos are recorded as
+failed with that reason.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from src.config.settings import (
+    DOCUMENT_SCAN_EXTENSIONS,
+    DOCUMENT_SCAN_MAX_PER_RUN,
+    DOCUMENT_SCAN_MIN_KB,
+    DOCUMENT_SCAN_MODE,
+    DOCUMENT_SCAN_SAMPLES,
+    DOCUMENT_SCAN_SUFFIX,
+    EXCLUDED_DIRS,
+    FILE_LEDGER_PATH,
+)
+from src.utils.file_ledger import DONE, DUPLICATE, FAILED, SKIPPED, FileLedger, file_digest
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LEDGER_STAGE = 'document_scan'
+
+# This runs in a check thread while other threads hold logging/sqlite locks, and a
+# forked child could inherit them held; spawned workers start clean (cv2 loads lazily)
+_POOL_CONTEXT = multiprocessing.get_context('spawn')
+
+# scanify modes that write a JPEG; bilevel writes a G4 TIFF, which can't go in a .scan.jpg
+SCAN_MODES = ('color', 'gray', 'auto')
+
+# Page area (fraction of the photo) and brightness over the background
+_MIN_PAGE_AREA = 0.25
+_MAX_PAGE_AREA = 0.95
+_MIN_PAGE_CONTRAST = 25  # grey levels between page and background
+
+
+def scan_path_for(photo: Path) -> Path:
+    return photo.with_name(photo.stem + DOCUMENT_SCAN_SUFFIX)
+
+
+def read_photo(path: str):
+    """BGR array of a photo (EXIF rotation applied), or None if it can't be decoded."""
+    import cv2
+    import numpy as np
+
+    img = cv2.imread(path)
+    if img is not None or os.path.splitext(path)[1].lower() not in ('.heic', '.heif'):
+        return img
+    try:
+        from pillow_heif import register_heif_opener
+    except ImportError:
+        raise RuntimeError('HEIC photo and pillow-heif is not installed')
+    from PIL import Image, ImageOps
+
+    register_heif_opener()
+    with Image.open(path) as im:
+        rgb = np.asarray(ImageOps.exif_transpose(im).convert('RGB'))
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+def looks_like_page(img, quad) -> bool:
+    """Stricter than scanify's detection, since nobody reviews these photos.
+
+    The page must leave some background visible (a quad on the image borders
+    means the threshold found nothing) and be clearly brighter than it.
+    """
+    import cv2
+    import numpy as np
+
+    small = cv2.resize(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), None, fx=0.125, fy=0.125,
+                       interpolation=cv2.INTER_AREA)
+    mask = np.zeros(small.shape, np.uint8)
+    cv2.fillConvexPoly(mask, np.int32(quad * 0.125), 255)
+    inside = cv2.countNonZero(mask)
+    if not _MIN_PAGE_AREA * mask.size <= inside <= _MAX_PAGE_AREA * mask.size:
+        return False
+    return cv2.mean(small, mask)[0] - cv2.mean(small, cv2.bitwise_not(mask))[0] >= _MIN_PAGE_CONTRAST
+
+
+def scan_document(path: str, mode: str = DOCUMENT_SCAN_MODE) -> dict:
+    """Detect the page in one photo and write its scanned version next to it.
+
+    Module-level so it can run in a ProcessPoolExecutor.
+    """
+    import scanify  # cv2/numpy are only loaded by the workers
+
+    target = scan_path_for(Path(path))
+    result = {'photo': path}
+    tmp = target.with_name(f'.{target.name}.tmp')
+    try:
+        img = read_photo(path)
+        if img is None:
+            return dict(result, status=FAILED, detail='could not decode image')
+        quad = scanify.find_page(img)
+        if quad is None or not looks_like_page(img, quad):
+            return dict(result, status=SKIPPED, detail='no page detected')
+        data = scanify.encode_page(scanify.scan_effect(scanify.warp_to_a4(img, quad)), mode)
+        # Written under a temp name so a half-written page is never left behind
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        return dict(result, status=FAILED, detail=str(e))
+    return dict(result, status=DONE, output=str(target), bytes_after=len(data))
+
+
+def _init_worker():
+    import scanify
+
+    scanify._init_worker()
+
+
+class DocumentScanner:
+    def __init__(self, base_path: Path, ledger_path: Path = FILE_LEDGER_PATH,
+                 include: Optional[Callable[[str], bool]] = None):
+        self.base_path = Path(base_path)
+        self.ledger_path = Path(ledger_path)
+        self.include = include  # top-level entries to walk (e.g. Shard.owns); None walks them all
+        self.items_scanned = 0
+
+    def iter_photos(self) -> Iterator[Tuple[Path, os.stat_result]]:
+        """Camera-sized JPEG/HEIC files under BASE_DIR, excluding our own outputs."""
+        min_bytes = DOCUMENT_SCAN_MIN_KB * 1024
+        for root, dirnames, filenames in os.walk(self.base_path):
+            dirnames.sort()
+            dirnames[:] = [
+                name for name in dirnames
+                if not any(excluded in os.path.join(root, name) for excluded in EXCLUDED_DIRS)
+            ]
+            if self.include is not None and root == str(self.base_path):
+                dirnames[:] = [name for name in dirnames if self.include(name)]
+                filenames = [name for name in filenames if self.include(name)]
+            for name in sorted(filenames):
+                self.items_scanned += 1
+                lower = name.lower()
+                if (name.startswith('.') or lower.endswith(DOCUMENT_SCAN_SUFFIX)
+                        or os.path.splitext(lower)[1] not in DOCUMENT_SCAN_EXTENSIONS):
+                    continue
+                path = Path(root) / name
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                if st.st_size >= min_bytes:
+                    yield path, st
+
+    def run(self, mode: str = DOCUMENT_SCAN_MODE, max_files: int = DOCUMENT_SCAN_MAX_PER_RUN,
+            workers: Optional[int] = None) -> dict:
+        """Scan the photos that are new to the ledger; returns the summary for the results JSON."""
+        if mode not in SCAN_MODES:
+            raise ValueError(f"DOCUMENT_SCAN_MODE must be one of {', '.join(SCAN_MODES)}, not {mode!r}")
+        ledger = FileLedger(self.ledger_path, LEDGER_STAGE)
+        summary = {
+            'new_photos': 0, 'scanned': 0, 'no_page': 0, 'duplicates': 0, 'already_scanned': 0,
+            'pending': 0, 'bytes_photos': 0, 'bytes_scans': 0, 'failed': [], 'outputs': [],
+        }
+        todo: List[Tuple[Path, os.stat_result, str]] = []
+        digests = set()
+        try:
+            with metrics.span('document_scan.discover'):
+                for photo, st in self.iter_photos():
+                    rel = str(photo.relative_to(self.base_path))
+                    if ledger.is_unchanged(rel, st):
+                        continue
+                    if len(todo) >= max_files:
+                        summary['pending'] += 1
+                        continue
+                    digest = file_digest(photo)
+                    known = ledger.find_digest(digest, rel, self.base_path)
+                    if known is not None and known['path'] == rel:
+                        # Only touched (synced again, copied back): same content, same outcome
+                        ledger.record(rel, st, digest, known['status'], known['output'], known['detail'])
+                        continue
+                    summary['new_photos'] += 1
+                    scan = scan_path_for(photo)
+                    if known is not None or digest in digests:
+                        ledger.record(rel, st, digest, DUPLICATE)
+                        summary['duplicates'] += 1
+                    elif scan.exists() and scan.stat().st_mtime_ns >= st.st_mtime_ns:
+                        # Scanned by hand (or before the ledger existed)
+                        ledger.record(rel, st, digest, DONE, output=str(scan.relative_to(self.base_path)))
+                        summary['already_scanned'] += 1
+                    else:
+                        digests.add(digest)
+                        todo.append((photo, st, digest))
+
+            if todo:
+                logger.info(f"Scanning {len(todo)} new document photo(s)")
+                with metrics.span('document_scan.process'), \
+                        ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                            mp_context=_POOL_CONTEXT) as pool:
+                    outcomes = pool.map(scan_document, [str(p) for p, _, _ in todo], [mode] * len(todo))
+                    for (photo, st, digest), outcome in zip(todo, outcomes):
+                        self._record(ledger, summary, photo, st, digest, outcome)
+            summary['ledger'] = ledger.counts()
+        finally:
+            ledger.close()
+        metrics.incr('document_scan.scanned', summary['scanned'])
+        return summary
+
+    def _record(self, ledger: FileLedger, summary: dict, photo: Path, st: os.stat_result, digest: str,
+                outcome: dict):
+        rel = str(photo.relative_to(self.base_path))
+        status = outcome['status']
+        if status == DONE:
+            output = str(Path(outcome['output']).relative_to(self.base_path))
+            ledger.record(rel, st, digest, DONE, output=output)
+            summary['scanned'] += 1
+            summary['bytes_photos'] += st.st_size
+            summary['bytes_scans'] += outcome['bytes_after']
+            if len(summary['outputs']) < DOCUMENT_SCAN_SAMPLES:
+                summary['outputs'].append(output)
+        elif status == SKIPPED:
+            ledger.record(rel, st, digest, SKIPPED, detail=outcome['detail'])
+            summary['no_page'] += 1
+        else:
+            logger.warning(f"Document scan failed for {rel}: {outcome['detail']}")
+            ledger.record(rel, st, digest, FAILED, detail=outcome['detail'])
+            summary['failed'].append({'path': rel, 'error': outcome['detail']})
@@ -0,0 +1,123 @@
+"""
+SQLite ledger of the files a BASE_DIR stage has already handled.
+
+Each stage (document scans, image compaction, ...) records one row per file
+with its size, mtime and content hash. On the next run a file is skipped
+without being read when its size and mtime are unchanged; a file that is new
+to the ledger is hashed, and skipped as well when the same content was
+already handled under another name (a copy, or a photo moved to another
+folder). Failures are recorded too, so a photo that cannot be processed is
+not retried every run; it is picked up again once the file changes.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+DONE = 'done'
+DUPLICATE = 'duplicate'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+_CHUNK = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    stage      TEXT NOT NULL,
+    path       TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    mtime_ns   INTEGER NOT NULL,
+    digest     TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    output     TEXT,
+    detail     TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (stage, path)
+);
+CREATE INDEX IF NOT EXISTS files_digest ON files (stage, digest);
+"""
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FileLedger:
+    def __init__(self, db_path: Path, stage: str):
+        self.db_path = Path(db_path)
+        self.stage = stage
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+        self._known: Optional[Dict[str, tuple]] = None
+
+    def close(self):
+        self.conn.close()
+
+    def is_unchanged(self, rel_path: str, st: os.stat_result) -> bool:
+        """True if `rel_path` was recorded with this size and mtime (no need to read it)."""
+        if self._known is None:
+            # One query for the whole walk instead of one per file
+            self._known = {
+                row['path']: (row['size'], row['mtime_ns'])
+                for row in self.conn.execute('SELECT path, size, mtime_ns FROM files WHERE stage = ?', (self.stage,))
+            }
+        return self._known.get(rel_path) == (st.st_size, st.st_mtime_ns)
+
+    def find_digest(self, digest: str, rel_path: str, base_dir: Path) -> Optional[sqlite3.Row]:
+        """The row that already handled this content, if any (failures excluded).
+
+        `rel_path`'s own row comes first (the file was only touched); any other
+        row counts only while its file still exists under `base_dir`, so content
+        whose every copy was deleted is handled again. All rows with the digest
+        are looked at, since the first one may be a copy that is gone.
+        """
+        rows = self.conn.execute(
+            'SELECT * FROM files WHERE stage = ? AND digest = ? AND status != ? ORDER BY status = ?',
+            (self.stage, digest, FAILED, DUPLICATE),
+        ).fetchall()
+        for row in rows:
+            if row['path'] == rel_path:
+                return row
+        for row in rows:
+            if (base_dir / row['path']).exists():
+                return row
+        return None
+
+    def record(self, rel_path: str, st: os.stat_result, digest: str, status: str,
+               output: Optional[str] = None, detail: Optional[str] = None):
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO files '
+                '(stage, path, size, mtime_ns, digest, status, output, detail, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.stage, rel_path, st.st_size, st.st_mtime_ns, digest, status, output, detail, time.time()),
+            )
+        if self._known is not None:
+            self._known[rel_path] = (st.st_size, st.st_mtime_ns)
+
+    def file_replaced(self, rel_path: str, st: os.stat_result, digest: str):
+        """Follow a file rewritten by this stage in the other stages' rows, so they don't redo it."""
+        with self.conn:
+            self.conn.execute(
+                'UPDATE files SET size = ?, mtime_ns = ?, digest = ?, updated_at = ? '
+                'WHERE path = ? AND stage != ?',
+                (st.st_size, st.st_mtime_ns, digest, time.time(), rel_path, self.stage),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Number of files per status for this stage."""
+        counts = {status: 0 for status in (DONE, DUPLICATE, SKIPPED, FAILED)}
+        for row in self.conn.execute(
+            'SELECT status, COUNT(*) AS n FROM files WHERE stage = ? GROUP BY status', (self.stage,)
+        ):
+            counts[row['status']] = row['n']
+        return counts
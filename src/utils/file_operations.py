@@ -1,38 +1,95 @@
 # src/utils/file_operations.py
+import json
+import os
 import re
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import shutil
 import logging
 from src.config.settings import (
     EXCLUDED_DIRS, 
+    NAMING_ISSUES_SAMPLES,
     SYSTEM_FILES, 
     SIZE_THRESHOLD_MB,
     ZMODELOS_DIR,
     MODELOS_DIR
 )
+from src.utils.metrics import metrics
+from src.utils.size_tree import SizeNode, TreeScanner
 
 logger = logging.getLogger(__name__)
 
+NAMING_ISSUE_CATEGORIES = (
+    'no_extension_files',
+    'year_month_dot',    # 2025.01.
+    'year_month_dash',   # 2025.01-
+    'year_only',         # 2025
+    'year_dash',         # 2025-
+)
+
+# Report lines are built from one preconfigured encoder (same output as json.dumps)
+# and written in batches; a json.dumps call and a write per line doubled the check's time
+_ENCODE_STR = json.JSONEncoder(ensure_ascii=False).encode
+_REPORT_BATCH_LINES = 1024
+
+_YEAR_MONTH_DOT = re.compile(r'\d{4}\.01\.')
+_YEAR_MONTH_DASH = re.compile(r'\d{4}\.01-')
+_YEAR_ONLY = re.compile(r'\b\d{4}\b')
+_YEAR_DASH = re.compile(r'\d{4}-')
+
+
+def _date_issue(name: str) -> Optional[str]:
+    """The date-pattern category of a file or folder name, if any."""
+    if _YEAR_MONTH_DOT.search(name):
+        return 'year_month_dot'
+    if _YEAR_MONTH_DASH.search(name):
+        return 'year_month_dash'
+    if _YEAR_ONLY.search(name):
+        return 'year_only'
+    if _YEAR_DASH.search(name):
+        return 'year_dash'
+    return None
+
 class FileOperations:
-    def __init__(self, base_path: Path):
+    def __init__(self, base_path: Path, include: Optional[Callable[[str], bool]] = None):
         self.base_path = base_path
+        # Top-level entries to walk (e.g. Shard.owns); None walks them all
+        self.include = include
+        self.items_scanned = 0  # files/folders examined, for run statistics
 
     def get_folder_sizes(self) -> Dict[str, int]:
         """
         Calculate sizes of all folders in the base path.
         Returns dictionary of folder names and their sizes in MB.
         """
-        folder_sizes = {}
+        return {
+            name: int(stats['bytes'] / (1024 * 1024))
+            for name, stats in self.get_folder_stats().items()
+        }
+
+    def get_size_tree(self) -> SizeNode:
+        """
+        Aggregated size tree of the base path (excluded top-level folders left out).
+        One walk; see src/utils/size_tree.py.
+        """
+        scanner = TreeScanner()
+        tree = scanner.scan(self.base_path, skip=EXCLUDED_DIRS, include=self.include)
+        self.items_scanned += scanner.items_scanned
+        return tree
+
+    def get_folder_stats(self, tree: Optional[SizeNode] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Returns {folder name: {'bytes', 'files', 'last_activity'}} for each
+        top-level folder, the last being the newest file mtime (epoch seconds,
+        0 for an empty folder). Pass a tree from get_size_tree() to avoid a rescan.
+        """
         try:
-            for folder in self.base_path.iterdir():
-                if folder.is_dir() and folder.name not in EXCLUDED_DIRS:
-                    folder_size = sum(
-                        f.stat().st_size for f in folder.rglob('*') if f.is_file()
-                    )
-                    folder_sizes[folder.name] = int(folder_size / (1024 * 1024))
-            return folder_sizes
+            tree = tree or self.get_size_tree()
+            return {
+                node.name: {'bytes': node.bytes, 'files': node.files, 'last_activity': node.last_activity}
+                for node in tree.children
+            }
         except Exception as e:
             logger.error(f"Error calculating folder sizes: {e}")
             return {}
@@ -48,6 +105,7 @@ class FileOperations:
         
         try:
             for item in self.base_path.iterdir():
+                self.items_scanned += 1
                 if item.name not in EXCLUDED_DIRS and item.name not in SYSTEM_FILES:
                     if not re.search(pattern, item.name):
                         nonconforming.append(item.name)
@@ -72,16 +130,19 @@ class FileOperations:
                 logger.info("Created MODELOS directory")
 
             for item in ZMODELOS_DIR.iterdir():
+                self.items_scanned += 1
                 dest_item = MODELOS_DIR / item.name
                 if item.is_dir():
                     if dest_item.exists():
                         shutil.rmtree(dest_item)
                     shutil.copytree(item, dest_item)
+                    metrics.incr('model_files.dirs_copied')
                     logger.debug(f"Copied directory: {item.name}")
                 else:
                     if dest_item.exists():
                         dest_item.unlink()
                     shutil.copy2(item, dest_item)
+                    metrics.incr('model_files.files_copied')
                     logger.debug(f"Copied file: {item.name}")
             
             logger.info("Model files successfully replaced")
@@ -90,46 +151,84 @@ class FileOperations:
             logger.error(f"Error replacing model files: {e}")
             return False
 
+    def iter_file_naming_issues(self) -> Iterator[Tuple[str, str]]:
+        """
+        Walks the tree once and yields (category, relative path) for each naming issue.
+        Nothing is accumulated, so memory stays flat however large the tree is.
+        A path can be yielded twice (no extension and a date pattern).
+        """
+        base = str(self.base_path)
+        for root, dirnames, filenames in os.walk(base):
+            # Sorted so the samples in the summary are stable between runs
+            dirnames.sort()
+            filenames.sort()
+            if root == base and self.include is not None:
+                dirnames[:] = [name for name in dirnames if self.include(name)]
+                filenames[:] = [name for name in filenames if self.include(name)]
+            kept = []
+            for name in dirnames:
+                self.items_scanned += 1
+                path = os.path.join(root, name)
+                # Skip excluded directories (and never descend into them)
+                if any(excluded in path for excluded in EXCLUDED_DIRS):
+                    continue
+                kept.append(name)
+                category = _date_issue(name)
+                if category:
+                    yield category, os.path.relpath(path, base)
+            dirnames[:] = kept
+
+            for name in filenames:
+                self.items_scanned += 1
+                path = os.path.join(root, name)
+                if any(excluded in path for excluded in EXCLUDED_DIRS):
+                    continue
+                # Check files without extension
+                if '.' not in name:
+                    yield 'no_extension_files', os.path.relpath(path, base)
+                category = _date_issue(name)
+                if category:
+                    yield category, os.path.relpath(path, base)
+
     def check_file_naming_issues(self) -> Dict[str, List[str]]:
         """
         Recursively checks all files and folders for naming issues.
         Returns a dictionary with categories of issues and their corresponding paths.
+        Keeps every path in memory; use write_file_naming_issues() on large trees.
         """
-        issues = {
-            'no_extension_files': [],
-            'year_month_dot': [],    # 2025.01.
-            'year_month_dash': [],   # 2025.01-
-            'year_only': [],         # 2025
-            'year_dash': [],         # 2025-
-        }
-
+        issues = {category: [] for category in NAMING_ISSUE_CATEGORIES}
         try:
-            # Walk through all directories recursively
-            for path in self.base_path.rglob('*'):
-                # Skip excluded directories
-                if any(excluded in str(path) for excluded in EXCLUDED_DIRS):
-                    continue
-
-                # Get relative path for cleaner output
-                rel_path = path.relative_to(self.base_path)
-
-                # Check files without extension (excluding directories)
-                if path.is_file() and '.' not in path.name:
-                    issues['no_extension_files'].append(str(rel_path))
-
-                # Check for date patterns
-                name = path.name
-                if re.search(r'\d{4}\.01\.', name):
-                    issues['year_month_dot'].append(str(rel_path))
-                elif re.search(r'\d{4}\.01-', name):
-                    issues['year_month_dash'].append(str(rel_path))
-                elif re.search(r'\b\d{4}\b', name):
-                    issues['year_only'].append(str(rel_path))
-                elif re.search(r'\d{4}-', name):
-                    issues['year_dash'].append(str(rel_path))
+            for category, rel_path in self.iter_file_naming_issues():
+                issues[category].append(rel_path)
+        except Exception as e:
+            logger.error(f"Error checking file naming issues: {e}")
 
+        return issues
 
+    def write_file_naming_issues(self, report_path: Path, samples: int = NAMING_ISSUES_SAMPLES) -> Dict:
+        """
+        Streams every naming issue to `report_path` as JSON lines
+        ({"category": ..., "path": ...}) and returns only per-category counts
+        and the first `samples` paths of each category.
+        """
+        counts = {category: 0 for category in NAMING_ISSUE_CATEGORIES}
+        found = {category: [] for category in NAMING_ISSUE_CATEGORIES}
+        prefixes = {category: f'{{"category": {_ENCODE_STR(category)}, "path": ' for category in NAMING_ISSUE_CATEGORIES}
+        tmp_path = report_path.with_name(f".{report_path.name}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as report:
+                lines = []
+                for category, rel_path in self.iter_file_naming_issues():
+                    lines.append(f'{prefixes[category]}{_ENCODE_STR(rel_path)}}}\n')
+                    if len(lines) >= _REPORT_BATCH_LINES:
+                        report.writelines(lines)
+                        lines.clear()
+                    counts[category] += 1
+                    if len(found[category]) < samples:
+                        found[category].append(rel_path)
+                report.writelines(lines)
+            os.replace(tmp_path, report_path)
         except Exception as e:
-            print(f"Error checking file naming issues: {e}")
+            logger.error(f"Error checking file naming issues: {e}")
 
-        return issues
+        return {'counts': counts, 'samples': found, 'report': str(report_path)}
@@ -0,0 +1,217 @@
+"""
+Packs inactive CONSULTAS folders into archives in `AAA --- ARQUIVO MORTO`.
+
+Each folder becomes one ZIP, with every file compressed on its own (LZMA,
+or stored as it is for formats that are already compressed), so listing
+the archive or extracting a single file reads only the central directory
+and that one member, never the whole archive. Next to it goes a JSON index
+(path, size, exact mtime, CRC of every file) that can be read without
+opening, or even downloading, the ZIP:
+
+    AAA --- ARQUIVO MORTO/CONSULTAS/FULANO (123).zip
+    AAA --- ARQUIVO MORTO/CONSULTAS/FULANO (123).zip.index.json
+
+The source folder is only removed after the archive is verified: every
+member is decompressed and CRC-checked (`testzip`), the members match the
+index, and the source still matches the index (nothing was added or changed
+while it was being packed). A folder whose archive already exists (kept with
+--keep-source, or its removal failed) counts as done if the archive and the
+folder still match the index. LZMA releases the GIL, so several folders are
+compressed at once in threads.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.config.settings import ARCHIVE_STORED_EXTENSIONS, ARCHIVE_THREADS
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = '.index.json'
+
+
+def index_path_for(archive: Path) -> Path:
+    return archive.with_name(archive.name + INDEX_SUFFIX)
+
+
+def scan_source(folder: Path) -> Dict[str, dict]:
+    """Relative path -> size/mtime of every file and directory under `folder` (symlinks skipped)."""
+    entries = {}
+    for root, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        for name in dirnames + sorted(filenames):
+            path = os.path.join(root, name)
+            st = os.lstat(path)
+            if os.path.islink(path):
+                logger.warning(f"Not archiving symlink {path}")
+                continue
+            rel = os.path.relpath(path, folder).replace(os.sep, '/')
+            if name in dirnames:
+                entries[rel + '/'] = {'size': 0, 'mtime_ns': st.st_mtime_ns}
+            else:
+                entries[rel] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    return entries
+
+
+def _write_json(path: Path, data: dict):
+    tmp = path.with_name(f'.{path.name}.tmp')
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def verify_archive(archive: Path, index: dict, source: Optional[Path] = None, test_members: bool = True):
+    """Raise RuntimeError unless `archive` holds exactly the indexed files, intact (and `source` is unchanged).
+
+    Without `test_members` only the central directory is compared with the
+    index; nothing is decompressed.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        bad = zf.testzip() if test_members else None
+        if bad is not None:
+            raise RuntimeError(f'corrupt member in archive: {bad}')
+        members = {info.filename: info for info in zf.infolist()}
+    files = index['files']
+    if set(members) != set(files):
+        raise RuntimeError(f'archive has {len(members)} members, index lists {len(files)}')
+    for name, entry in files.items():
+        if members[name].file_size != entry['size'] or members[name].CRC != entry['crc32']:
+            raise RuntimeError(f'{name} does not match the index')
+    if source is not None and scan_source(source) != {
+        name: {'size': entry['size'], 'mtime_ns': entry['mtime_ns']} for name, entry in files.items()
+    }:
+        raise RuntimeError('source folder does not match the archive (changed while or since it was packed)')
+
+
+def archive_folder(folder: Path, archive_dir: Path, remove_source: bool = True) -> dict:
+    """Pack one folder into `archive_dir/<name>.zip` (+ index), verify it, then remove the folder."""
+    folder = Path(folder)
+    archive = Path(archive_dir) / f'{folder.name}.zip'
+    result = {'folder': folder.name, 'archive': str(archive)}
+    if archive.exists():
+        return _already_archived(folder, archive, result, remove_source)
+
+    tmp = archive.with_name(f'.{archive.name}.tmp')
+    started = time.perf_counter()
+    try:
+        archive.parent.mkdir(parents=True, exist_ok=True)
+        source = scan_source(folder)
+        files = {}
+        with zipfile.ZipFile(tmp, 'w', strict_timestamps=False) as zf:
+            for name, entry in source.items():
+                path = folder / name
+                stored = os.path.splitext(name)[1].lower() in ARCHIVE_STORED_EXTENSIONS or name.endswith('/')
+                zf.write(path, name, compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_LZMA)
+                files[name] = dict(entry, crc32=zf.getinfo(name).CRC)
+
+        index = {
+            'folder': folder.name,
+            'source': str(folder),
+            'archived_at': datetime.now().isoformat(),
+            'bytes': sum(entry['size'] for entry in files.values()),
+            'archive_bytes': tmp.stat().st_size,
+            'files': files,
+        }
+        verify_archive(tmp, index, folder)
+        os.replace(tmp, archive)
+        _write_json(index_path_for(archive), index)
+    except (OSError, RuntimeError, zipfile.BadZipFile) as e:
+        tmp.unlink(missing_ok=True)
+        return dict(result, error=str(e))
+
+    result.update(
+        files=len(files),
+        bytes=index['bytes'],
+        archive_bytes=index['archive_bytes'],
+        seconds=round(time.perf_counter() - started, 1),
+    )
+    return _remove_source(folder, result) if remove_source else result
+
+
+def _already_archived(folder: Path, archive: Path, result: dict, remove_source: bool) -> dict:
+    # Verified in full when it was written; the folder must still be what went in
+    try:
+        index = read_index(archive)
+        verify_archive(archive, index, folder, test_members=False)
+    except (OSError, ValueError, KeyError, RuntimeError, zipfile.BadZipFile) as e:
+        return dict(result, error=f'{archive.name} already exists and does not match the folder: {e}')
+    result.update(
+        already_archived=True,
+        files=len(index['files']),
+        bytes=index['bytes'],
+        archive_bytes=archive.stat().st_size,
+    )
+    return _remove_source(folder, result) if remove_source else result
+
+
+def _remove_source(folder: Path, result: dict) -> dict:
+    try:
+        shutil.rmtree(folder)
+    except OSError as e:
+        # The archive is complete and verified; only the cleanup is left
+        return dict(result, error=f'archived, but removing the source failed: {e}')
+    return result
+
+
+def archive_folders(folders: List[Path], archive_dir: Path, workers: int = ARCHIVE_THREADS,
+                    remove_source: bool = True) -> List[dict]:
+    """Archive several folders, `workers` at a time."""
+    if not folders:
+        return []
+    with metrics.span('archive.folders'), ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda folder: archive_folder(folder, archive_dir, remove_source), folders))
+
+
+def summarize(results: List[dict]) -> dict:
+    """Results JSON entry for a batch of archive_folder() results."""
+    archived = [r for r in results if 'error' not in r and not r.get('already_archived')]
+    return {
+        'archived': [
+            {'folder': r['folder'], 'files': r['files'], 'bytes': r['bytes'], 'archive_bytes': r['archive_bytes']}
+            for r in archived
+        ],
+        'already_archived': [r['folder'] for r in results if 'error' not in r and r.get('already_archived')],
+        'bytes_before': sum(r['bytes'] for r in archived),
+        'bytes_after': sum(r['archive_bytes'] for r in archived),
+        'failed': [{'folder': r['folder'], 'error': r['error']} for r in results if 'error' in r],
+    }
+
+
+def read_index(archive: Path) -> dict:
+    """The archive's index, from the JSON next to it, or rebuilt from the ZIP central directory."""
+    index_path = index_path_for(archive)
+    if index_path.exists():
+        return json.loads(index_path.read_text(encoding='utf-8'))
+    with zipfile.ZipFile(archive) as zf:
+        files = {
+            info.filename: {'size': info.file_size, 'crc32': info.CRC,
+                            'mtime_ns': int(datetime(*info.date_time).timestamp() * 1e9)}
+            for info in zf.infolist()
+        }
+    return {'folder': archive.stem, 'files': files, 'bytes': sum(f['size'] for f in files.values())}
+
+
+def extract(archive: Path, dest: Path, members: Optional[List[str]] = None) -> List[Path]:
+    """Extract `members` (default: all) into `dest`, restoring their mtimes. Only those members are read."""
+    index = read_index(archive)
+    names = members or list(index['files'])
+    written = []
+    with zipfile.ZipFile(archive) as zf:
+        for name in names:
+            if name not in index['files']:
+                raise KeyError(f'{name} is not in {archive.name}')
+            written.append((name, Path(zf.extract(name, dest))))
+    # Deepest first, so writing a file doesn't bump its folder's restored mtime
+    for name, path in sorted(written, key=lambda item: item[0].rstrip('/').count('/'), reverse=True):
+        mtime_ns = index['files'][name]['mtime_ns']
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return [path for _, path in written]
@@ -12,10 +12,12 @@ logger = logging.getLogger(__name__)
 class FolderChecker:
     def __init__(self, base_path: Path):
         self.base_path = base_path
-        
+        self.items_scanned = 0  # files/folders examined, for run statistics
+
     def is_folder_recently_modified(self, folder_path: Path, cutoff_time: datetime) -> bool:
         try:
             for item in folder_path.rglob('*'):
+                self.items_scanned += 1
                 if item.is_file() and datetime.fromtimestamp(item.stat().st_mtime) > cutoff_time:
                     return True
             return False
@@ -37,5 +39,5 @@ class FolderChecker:
                         inactive_folders.append(folder.name)
             return inactive_folders
         except Exception as e:
-            print(f"Error finding inactive folders: {e}")
+            logger.error(f"Error finding inactive folders: {e}")
             return []
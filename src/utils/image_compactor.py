@@ -0,0 +1,259 @@
+"""
+In-place compaction of camera photos in the client folders.
+
+Phone photos are 12-48 MP JPEGs at high quality with EXIF/GPS/thumbnail
+metadata, and make up a large share of BASE_DIR. Each photo is
+
+- downscaled to IMAGE_COMPACT_MAX_PIXELS if it is larger;
+- re-encoded without metadata (OpenCV applies the EXIF rotation on read, so
+  the photo stays upright) at the lowest JPEG quality in
+  IMAGE_COMPACT_QUALITY_RANGE whose PSNR against the (downscaled) photo is
+  at least IMAGE_COMPACT_TARGET_PSNR, so busy photos keep a higher quality
+  than flat ones;
+- swapped in atomically (temp file in the same folder + os.replace), keeping
+  the original mtime, and only when it is IMAGE_COMPACT_MIN_SAVING smaller.
+
+The FileLedger records every photo handled (compacted or not worth it), so
+nothing is decoded twice. `dry_run` does all the encoding in memory, writes
+nothing and extrapolates the saving to every candidate photo.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from src.config.settings import (
+    DOCUMENT_SCAN_SUFFIX,
+    EXCLUDED_DIRS,
+    FILE_LEDGER_PATH,
+    IMAGE_COMPACT_EXTENSIONS,
+    IMAGE_COMPACT_MAX_PER_RUN,
+    IMAGE_COMPACT_MAX_PIXELS,
+    IMAGE_COMPACT_MIN_KB,
+    IMAGE_COMPACT_MIN_SAVING,
+    IMAGE_COMPACT_QUALITY_RANGE,
+    IMAGE_COMPACT_TARGET_PSNR,
+)
+from src.utils.file_ledger import DONE, DUPLICATE, FAILED, SKIPPED, FileLedger, file_digest
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LEDGER_STAGE = 'image_compact'
+
+# This runs in a check thread while other threads hold logging/sqlite locks, and a
+# forked child could inherit them held; spawned workers start clean (cv2 loads lazily)
+_POOL_CONTEXT = multiprocessing.get_context('spawn')
+
+
+def downscale(img, max_pixels: int = IMAGE_COMPACT_MAX_PIXELS):
+    import cv2
+
+    height, width = img.shape[:2]
+    if height * width <= max_pixels:
+        return img
+    scale = math.sqrt(max_pixels / (height * width))
+    return cv2.resize(img, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+
+def encode_adaptive(img, target_psnr: float = IMAGE_COMPACT_TARGET_PSNR,
+                    quality_range: Tuple[int, int] = IMAGE_COMPACT_QUALITY_RANGE):
+    """(jpeg bytes, quality, psnr) for the lowest quality that reaches `target_psnr`."""
+    import cv2
+
+    def encode(quality):
+        data = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1])[1]
+        return data.tobytes(), quality, cv2.PSNR(img, cv2.imdecode(data, cv2.IMREAD_COLOR))
+
+    # PSNR grows with the quality, so binary search for the first one that passes
+    lo, hi = quality_range
+    best = None
+    while lo <= hi:
+        candidate = encode((lo + hi) // 2)
+        if candidate[2] >= target_psnr:
+            best, hi = candidate, candidate[1] - 1
+        else:
+            lo = candidate[1] + 1
+    return best or encode(quality_range[1])
+
+
+def compact_image(path: str, dry_run: bool = False) -> dict:
+    """Re-encode one photo and swap it in. Returns a result dict.
+
+    Module-level so it can run in a ProcessPoolExecutor.
+    """
+    import cv2
+
+    path = Path(path)
+    result = {'image': str(path)}
+    tmp = path.with_name(f'.{path.name}.tmp')
+    try:
+        st = path.stat()
+        img = cv2.imread(str(path))
+        if img is None:
+            return dict(result, error='could not decode image')
+        pixels_before = img.shape[0] * img.shape[1]
+        img = downscale(img)
+        data, quality, psnr = encode_adaptive(img)
+        result.update(
+            bytes_before=st.st_size,
+            bytes_after=len(data),
+            pixels_before=pixels_before,
+            pixels_after=img.shape[0] * img.shape[1],
+            quality=quality,
+            psnr=round(psnr, 1),
+        )
+        if len(data) > st.st_size * (1 - IMAGE_COMPACT_MIN_SAVING):
+            return dict(result, skipped=f'saves less than {IMAGE_COMPACT_MIN_SAVING:.0%}')
+        if dry_run:
+            return result
+
+        tmp.write_bytes(data)
+        if cv2.imread(str(tmp)) is None:
+            raise RuntimeError('re-encoded file does not decode')
+        if path.stat().st_mtime_ns != st.st_mtime_ns:
+            raise RuntimeError('photo changed while it was being compacted')
+        os.replace(tmp, path)
+        # Keep the original mtime: folder activity (inactive_folders) must not change
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    except Exception as e:
+        # Anything from decode/downscale/encode (ValueError, MemoryError...) fails
+        # this photo only; raised, it would end pool.map and the whole check
+        tmp.unlink(missing_ok=True)
+        return dict(result, error=str(e))
+    return result
+
+
+def _init_worker():
+    import cv2
+
+    cv2.setNumThreads(1)  # the parallelism comes from the pool
+
+
+class ImageCompactor:
+    def __init__(self, base_path: Path, ledger_path: Path = FILE_LEDGER_PATH,
+                 include: Optional[Callable[[str], bool]] = None):
+        self.base_path = Path(base_path)
+        self.ledger_path = Path(ledger_path)
+        self.include = include  # top-level entries to walk (e.g. Shard.owns); None walks them all
+        self.items_scanned = 0
+
+    def iter_images(self) -> Iterator[Tuple[Path, os.stat_result]]:
+        """JPEG photos under BASE_DIR big enough to be worth re-encoding (scanned pages excluded)."""
+        min_bytes = IMAGE_COMPACT_MIN_KB * 1024
+        for root, dirnames, filenames in os.walk(self.base_path):
+            dirnames.sort()
+            dirnames[:] = [
+                name for name in dirnames
+                if not any(excluded in os.path.join(root, name) for excluded in EXCLUDED_DIRS)
+            ]
+            if self.include is not None and root == str(self.base_path):
+                dirnames[:] = [name for name in dirnames if self.include(name)]
+                filenames = [name for name in filenames if self.include(name)]
+            for name in sorted(filenames):
+                self.items_scanned += 1
+                lower = name.lower()
+                if (name.startswith('.') or lower.endswith(DOCUMENT_SCAN_SUFFIX)
+                        or os.path.splitext(lower)[1] not in IMAGE_COMPACT_EXTENSIONS):
+                    continue
+                path = Path(root) / name
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                if st.st_size >= min_bytes:
+                    yield path, st
+
+    def run(self, dry_run: bool = False, max_files: int = IMAGE_COMPACT_MAX_PER_RUN,
+            workers: Optional[int] = None) -> dict:
+        """Compact the photos that are new to the ledger; returns the summary for the results JSON."""
+        ledger = FileLedger(self.ledger_path, LEDGER_STAGE)
+        summary = {
+            'dry_run': dry_run, 'candidates': 0, 'candidate_bytes': 0, 'compacted': 0, 'not_worth_it': 0,
+            'duplicates': 0, 'pending': 0, 'bytes_before': 0, 'bytes_after': 0, 'bytes_saved': 0, 'failed': [],
+        }
+        todo: List[Tuple[Path, os.stat_result, str]] = []
+        duplicate_bytes = 0
+        try:
+            with metrics.span('image_compact.discover'):
+                for image, st in self.iter_images():
+                    rel = str(image.relative_to(self.base_path))
+                    if ledger.is_unchanged(rel, st):
+                        continue
+                    summary['candidates'] += 1
+                    summary['candidate_bytes'] += st.st_size
+                    if len(todo) >= max_files:
+                        summary['pending'] += 1
+                        continue
+                    digest = file_digest(image)
+                    known = ledger.find_digest(digest, rel, self.base_path)
+                    if known is not None and known['path'] == rel:
+                        # Only touched: same content, same outcome
+                        if not dry_run:
+                            ledger.record(rel, st, digest, known['status'], known['output'], known['detail'])
+                        summary['candidates'] -= 1
+                        summary['candidate_bytes'] -= st.st_size
+                        continue
+                    if known is not None:
+                        # Same content as a photo already handled (e.g. a copy of a compacted one)
+                        if not dry_run:
+                            ledger.record(rel, st, digest, DUPLICATE)
+                        summary['duplicates'] += 1
+                        duplicate_bytes += st.st_size
+                        continue
+                    todo.append((image, st, digest))
+
+            processed_bytes = 0
+            if todo:
+                logger.info(f"{'Estimating' if dry_run else 'Compacting'} {len(todo)} photo(s)")
+                with metrics.span('image_compact.process'), \
+                        ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                            mp_context=_POOL_CONTEXT) as pool:
+                    outcomes = pool.map(compact_image, [str(p) for p, _, _ in todo], [dry_run] * len(todo))
+                    for (image, st, digest), outcome in zip(todo, outcomes):
+                        if 'error' not in outcome:
+                            processed_bytes += st.st_size
+                        self._record(ledger, summary, image, st, digest, outcome, dry_run)
+
+            if dry_run and processed_bytes:
+                # What compacting every candidate would save, at the ratio measured on this sample
+                summary['estimated_bytes_saved'] = int(
+                    summary['bytes_saved'] / processed_bytes * (summary['candidate_bytes'] - duplicate_bytes)
+                )
+            summary['ledger'] = ledger.counts()
+        finally:
+            ledger.close()
+        metrics.incr('image_compact.bytes_saved', 0 if dry_run else summary['bytes_saved'])
+        return summary
+
+    def _record(self, ledger: FileLedger, summary: dict, image: Path, st: os.stat_result, digest: str,
+                outcome: dict, dry_run: bool):
+        rel = str(image.relative_to(self.base_path))
+        if 'error' in outcome:
+            logger.warning(f"Image compaction failed for {rel}: {outcome['error']}")
+            summary['failed'].append({'path': rel, 'error': outcome['error']})
+            if not dry_run:
+                ledger.record(rel, st, digest, FAILED, detail=outcome['error'])
+            return
+
+        detail = f"q{outcome['quality']} {outcome['psnr']} dB"
+        if 'skipped' in outcome:
+            summary['not_worth_it'] += 1
+            if not dry_run:
+                ledger.record(rel, st, digest, SKIPPED, detail=f"{outcome['skipped']} ({detail})")
+            return
+
+        summary['compacted'] += 1
+        summary['bytes_before'] += outcome['bytes_before']
+        summary['bytes_after'] += outcome['bytes_after']
+        summary['bytes_saved'] += outcome['bytes_before'] - outcome['bytes_after']
+        if not dry_run:
+            new_st = image.stat()
+            new_digest = file_digest(image)
+            ledger.record(rel, new_st, new_digest, DONE, detail=detail)
+            ledger.file_replaced(rel, new_st, new_digest)
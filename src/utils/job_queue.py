@@ -0,0 +1,309 @@
+"""
+SQLite-backed job table for the ATENDIMENTO audio pipeline.
+
+Every audio file under BASE_DIR/<client>/ATENDIMENTO/ gets one row that moves
+through `discovered` -> `transcribed` -> `reported`, or to `failed` with a
+retry count and a backoff deadline. Discovery only re-lists directories whose
+mtime changed since the previous sync; in the others it stats just the
+recordings it already knows (re-saving a file in place changes the file, not
+its folder), so a daily run costs no listing or sidecar checks for folders
+where nothing was added.
+
+The retry count belongs to the stage that failed and is only cleared once
+that stage succeeds: a job whose transcription is fine but whose summary
+keeps failing still backs off and eventually gives up.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.config.settings import (
+    ATENDIMENTO_DIR_NAME,
+    AUDIO_EXTENSIONS,
+    EXCLUDED_DIRS,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BASE_SECONDS,
+    JOB_RETRY_MAX_SECONDS,
+)
+from src.utils.audio_summarizer import needs_report
+from src.utils.audio_transcriber import needs_transcription, transcript_path_for
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DISCOVERED = 'discovered'
+TRANSCRIBED = 'transcribed'
+REPORTED = 'reported'
+FAILED = 'failed'
+
+# Directories touched this recently are re-listed on the next sync too, so a
+# file landing in the same mtime tick as our stat() is never missed.
+_MTIME_SETTLE_NS = 2 * 1_000_000_000
+# Saved for such a directory instead of its mtime: it matches no real mtime, so
+# the folder is re-listed next time, yet its parent still knows to descend into it
+_UNSETTLED_MTIME = -1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    path         TEXT PRIMARY KEY,
+    client       TEXT NOT NULL,
+    state        TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    stage        TEXT,
+    last_error   TEXT,
+    mtime_ns     INTEGER NOT NULL,
+    size         INTEGER NOT NULL,
+    next_attempt REAL,
+    updated_at   REAL NOT NULL,
+    compaction   TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, next_attempt);
+CREATE TABLE IF NOT EXISTS dirs (
+    path     TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+
+class JobQueue:
+    def __init__(self, db_path: Path, base_dir: Path):
+        self.db_path = Path(db_path)
+        self.base_dir = Path(base_dir)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+        columns = {row['name'] for row in self.conn.execute('PRAGMA table_info(jobs)')}
+        if 'compaction' not in columns:
+            # Tables created before compaction outcomes were kept
+            self.conn.execute('ALTER TABLE jobs ADD COLUMN compaction TEXT')
+
+    def close(self):
+        self.conn.close()
+
+    # --- discovery ---------------------------------------------------------
+
+    def sync(self) -> int:
+        """Register new/changed audio files. Returns the number of new jobs."""
+        if not self.base_dir.is_dir():
+            logger.error(f"BASE_DIR does not exist: {self.base_dir}")
+            return 0
+
+        known = {row['path']: row['mtime_ns'] for row in self.conn.execute('SELECT path, mtime_ns FROM dirs')}
+        children: Dict[str, List[str]] = {}
+        for rel in known:
+            children.setdefault(os.path.dirname(rel), []).append(rel)
+        files: Dict[str, List[sqlite3.Row]] = {}
+        for row in self.conn.execute('SELECT path, mtime_ns, size FROM jobs'):
+            files.setdefault(os.path.dirname(row['path']), []).append(row)
+
+        seen = set()
+        new_jobs = 0
+        with self.conn, metrics.span('audio.scan'):
+            for client_dir in self.base_dir.iterdir():
+                if not client_dir.is_dir() or client_dir.name in EXCLUDED_DIRS:
+                    continue
+                atendimento = client_dir / ATENDIMENTO_DIR_NAME
+                if atendimento.is_dir():
+                    new_jobs += self._sync_dir(atendimento, known, children, files, seen)
+
+            for rel in set(known) - seen:
+                self.conn.execute('DELETE FROM dirs WHERE path = ?', (rel,))
+                self.conn.execute(
+                    "DELETE FROM jobs WHERE path LIKE ? ESCAPE '\\'",
+                    (_like_prefix(rel),),
+                )
+        metrics.incr('audio.dirs_seen', len(seen))
+        metrics.incr('audio.new_jobs', new_jobs)
+        return new_jobs
+
+    def _sync_dir(self, directory: Path, known, children, files, seen) -> int:
+        try:
+            st = directory.stat()
+        except FileNotFoundError:
+            return 0
+        rel = str(directory.relative_to(self.base_dir))
+        seen.add(rel)
+
+        if known.get(rel) == st.st_mtime_ns:
+            # Nothing was added, removed or renamed here, but a recording may
+            # have been re-saved in place: stat the known ones, then descend.
+            for row in files.get(rel, []):
+                path = self.base_dir / row['path']
+                try:
+                    file_st = path.stat()
+                except FileNotFoundError:
+                    continue
+                if (file_st.st_mtime_ns, file_st.st_size) != (row['mtime_ns'], row['size']):
+                    self._upsert(path, file_st)
+            return sum(
+                self._sync_dir(self.base_dir / child, known, children, files, seen)
+                for child in children.get(rel, [])
+            )
+
+        new_jobs = 0
+        present = set()
+        for entry in os.scandir(directory):
+            if entry.is_dir(follow_symlinks=False):
+                new_jobs += self._sync_dir(Path(entry.path), known, children, files, seen)
+            elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS:
+                path = Path(entry.path)
+                present.add(str(path.relative_to(self.base_dir)))
+                new_jobs += self._upsert(path, entry.stat())
+
+        # Forget recordings that were deleted or moved away from this folder
+        for row in self.conn.execute(
+            "SELECT path FROM jobs WHERE path LIKE ? ESCAPE '\\'", (_like_prefix(rel),)
+        ).fetchall():
+            if os.path.dirname(row['path']) == rel and row['path'] not in present:
+                self.conn.execute('DELETE FROM jobs WHERE path = ?', (row['path'],))
+
+        settled = time.time_ns() - st.st_mtime_ns > _MTIME_SETTLE_NS
+        self.conn.execute(
+            'INSERT OR REPLACE INTO dirs (path, mtime_ns) VALUES (?, ?)',
+            (rel, st.st_mtime_ns if settled else _UNSETTLED_MTIME),
+        )
+        return new_jobs
+
+    def _upsert(self, path: Path, st: os.stat_result) -> int:
+        rel = str(path.relative_to(self.base_dir))
+        row = self.conn.execute('SELECT * FROM jobs WHERE path = ?', (rel,)).fetchone()
+        now = time.time()
+
+        if row is None or (row['mtime_ns'], row['size']) != (st.st_mtime_ns, st.st_size):
+            # New or re-recorded audio: seed the state from existing sidecars so
+            # files processed before the queue existed are not redone.
+            state = self._state_from_sidecars(path)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO jobs '
+                '(path, client, state, attempts, stage, last_error, mtime_ns, size, next_attempt, updated_at) '
+                'VALUES (?, ?, ?, 0, NULL, NULL, ?, ?, NULL, ?)',
+                (rel, path.relative_to(self.base_dir).parts[0], state, st.st_mtime_ns, st.st_size, now),
+            )
+            return 1 if row is None else 0
+
+        if row['state'] in (DISCOVERED, TRANSCRIBED, FAILED):
+            # Sidecars may have been written by another process since the last sync
+            state = self._state_from_sidecars(path)
+            if _STATE_ORDER[state] > _STATE_ORDER.get(row['state'], 0) and _completes(row, state):
+                self.conn.execute(
+                    'UPDATE jobs SET state = ?, attempts = 0, stage = NULL, last_error = NULL, '
+                    'next_attempt = NULL, updated_at = ? WHERE path = ?',
+                    (state, now, rel),
+                )
+        return 0
+
+    def refresh(self, rel_path: str):
+        """Re-derive a job's state from its sidecars (after another machine processed it)."""
+        state = self._state_from_sidecars(self.base_dir / rel_path)
+        if state != DISCOVERED:
+            self.mark(rel_path, state)
+
+    @staticmethod
+    def _state_from_sidecars(audio_path: Path) -> str:
+        if needs_transcription(audio_path):
+            return DISCOVERED
+        if needs_report(transcript_path_for(audio_path)):
+            return TRANSCRIBED
+        return REPORTED
+
+    # --- processing --------------------------------------------------------
+
+    def pending(self, include_reports: bool = True, now: Optional[float] = None) -> List[sqlite3.Row]:
+        """Jobs that have work left: new, awaiting a report, or due for a retry."""
+        now = time.time() if now is None else now
+        states = [DISCOVERED, TRANSCRIBED] if include_reports else [DISCOVERED]
+        return self.conn.execute(
+            f"SELECT * FROM jobs WHERE state IN ({','.join('?' * len(states))}) "
+            "OR (state = ? AND attempts < ? AND next_attempt <= ?) "
+            "ORDER BY mtime_ns",
+            (*states, FAILED, JOB_MAX_ATTEMPTS, now),
+        ).fetchall()
+
+    def mark(self, rel_path: str, state: str):
+        """Move a job to `state`, clearing its failure record if `state` means the failed stage succeeded."""
+        row = self.conn.execute('SELECT state, stage FROM jobs WHERE path = ?', (rel_path,)).fetchone()
+        with self.conn:
+            if row is not None and not _completes(row, state):
+                # E.g. transcribed again on the way to a summary that failed before
+                self.conn.execute(
+                    'UPDATE jobs SET state = ?, updated_at = ? WHERE path = ?',
+                    (state, time.time(), rel_path),
+                )
+                return
+            self.conn.execute(
+                'UPDATE jobs SET state = ?, attempts = 0, stage = NULL, last_error = NULL, '
+                'next_attempt = NULL, updated_at = ? WHERE path = ?',
+                (state, time.time(), rel_path),
+            )
+
+    def mark_failed(self, rel_path: str, stage: str, error: str) -> int:
+        """Record a failure and schedule the retry with exponential backoff. Returns the attempt count."""
+        now = time.time()
+        row = self.conn.execute('SELECT attempts FROM jobs WHERE path = ?', (rel_path,)).fetchone()
+        attempts = (row['attempts'] if row else 0) + 1
+        delay = min(JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), JOB_RETRY_MAX_SECONDS)
+        with self.conn:
+            self.conn.execute(
+                'UPDATE jobs SET state = ?, attempts = ?, stage = ?, last_error = ?, '
+                'next_attempt = ?, updated_at = ? WHERE path = ?',
+                (FAILED, attempts, stage, error, now + delay, now, rel_path),
+            )
+        if attempts >= JOB_MAX_ATTEMPTS:
+            logger.warning(f"Giving up on {rel_path} after {attempts} attempts: {error}")
+        return attempts
+
+    def compactable(self, suffix: str) -> List[sqlite3.Row]:
+        """Transcribed jobs whose audio is not yet in the compact `suffix` format and was never tried."""
+        return self.conn.execute(
+            'SELECT * FROM jobs WHERE state IN (?, ?) AND lower(path) NOT LIKE ? AND compaction IS NULL',
+            (TRANSCRIBED, REPORTED, '%' + suffix.lower()),
+        ).fetchall()
+
+    def set_compaction(self, rel_path: str, outcome: str):
+        """Record why a recording was not compacted; it is not tried again until the file changes."""
+        with self.conn:
+            self.conn.execute(
+                'UPDATE jobs SET compaction = ?, updated_at = ? WHERE path = ?',
+                (outcome, time.time(), rel_path),
+            )
+
+    def rename(self, rel_path: str, new_path: Path):
+        """Point a job at its replacement audio file, keeping its state."""
+        st = new_path.stat()
+        with self.conn:
+            self.conn.execute(
+                'UPDATE jobs SET path = ?, mtime_ns = ?, size = ?, updated_at = ? WHERE path = ?',
+                (str(new_path.relative_to(self.base_dir)), st.st_mtime_ns, st.st_size, time.time(), rel_path),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per state, plus the failed jobs that ran out of retries."""
+        counts = {state: 0 for state in (DISCOVERED, TRANSCRIBED, REPORTED, FAILED)}
+        for row in self.conn.execute('SELECT state, COUNT(*) AS n FROM jobs GROUP BY state'):
+            counts[row['state']] = row['n']
+        counts['gave_up'] = self.conn.execute(
+            'SELECT COUNT(*) FROM jobs WHERE state = ? AND attempts >= ?',
+            (FAILED, JOB_MAX_ATTEMPTS),
+        ).fetchone()[0]
+        return counts
+
+
+_STATE_ORDER = {FAILED: 0, DISCOVERED: 0, TRANSCRIBED: 1, REPORTED: 2}
+
+# Failed stage -> the states that mean it has since succeeded
+_STAGE_DONE = {'transcribe': (TRANSCRIBED, REPORTED), 'summarize': (REPORTED,)}
+
+
+def _completes(row: sqlite3.Row, state: str) -> bool:
+    """True unless the job has a failed stage that reaching `state` does not get past."""
+    return row['stage'] is None or state in _STAGE_DONE.get(row['stage'], (state,))
+
+
+def _like_prefix(rel_dir: str) -> str:
+    escaped = rel_dir.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + os.sep + '%'
@@ -0,0 +1,153 @@
+"""
+Lightweight run instrumentation: counters, gauges and timed spans.
+
+A single process-wide `metrics` registry is filled by the hot paths
+(scanning, copying, Whisper inference, LLM calls, webhook posting) and
+exported at the end of a run both into the results JSON (`to_dict()`) and as
+a Prometheus textfile for node_exporter's textfile collector
+(`write_prometheus()`). `profiled()` wraps a run in cProfile when asked to.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_bytes(children: bool = False) -> int:
+    """Peak resident set size of this process (or of its finished children)."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    return usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.timers: Dict[str, dict] = {}
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.timers.clear()
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float):
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            timer = self.timers.setdefault(name, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            timer['count'] += 1
+            timer['total_seconds'] += seconds
+            timer['max_seconds'] = max(timer['max_seconds'], seconds)
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block under `name` (failures are timed too and counted)."""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.incr(f'{name}.errors')
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'timers': {
+                    name: {
+                        'count': t['count'],
+                        'total_ms': int(t['total_seconds'] * 1000),
+                        'max_ms': int(t['max_seconds'] * 1000),
+                    }
+                    for name, t in self.timers.items()
+                },
+                'peak_rss_mb': round(peak_rss_bytes() / (1024 * 1024), 1),
+                'peak_rss_children_mb': round(peak_rss_bytes(children=True) / (1024 * 1024), 1),
+            }
+
+    def write_prometheus(self, path: Path, runner: str):
+        """Write a node_exporter textfile (atomically, as the collector requires)."""
+        label = f'runner="{runner}"'
+        lines = [
+            '# HELP pwa_span_seconds_total Time spent in instrumented spans.',
+            '# TYPE pwa_span_seconds_total counter',
+        ]
+        with self._lock:
+            timers = dict(self.timers)
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        for name, t in sorted(timers.items()):
+            lines.append(f'pwa_span_seconds_total{{{label},span="{name}"}} {t["total_seconds"]:.6f}')
+        lines += ['# HELP pwa_span_count_total Number of times each span ran.',
+                  '# TYPE pwa_span_count_total counter']
+        for name, t in sorted(timers.items()):
+            lines.append(f'pwa_span_count_total{{{label},span="{name}"}} {t["count"]}')
+        for name, value in sorted(counters.items()):
+            metric = f'pwa_{_metric_name(name)}_total'
+            lines += [f'# TYPE {metric} counter', f'{metric}{{{label}}} {value}']
+        for name, value in sorted(gauges.items()):
+            metric = f'pwa_{_metric_name(name)}'
+            lines += [f'# TYPE {metric} gauge', f'{metric}{{{label}}} {value}']
+        lines += [
+            '# TYPE pwa_peak_rss_bytes gauge',
+            f'pwa_peak_rss_bytes{{{label}}} {peak_rss_bytes()}',
+            '# TYPE pwa_last_run_timestamp_seconds gauge',
+            f'pwa_last_run_timestamp_seconds{{{label}}} {time.time():.0f}',
+        ]
+
+        path = Path(path)
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        tmp.write_text('\n'.join(lines) + '\n')
+        os.replace(tmp, path)
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+@contextmanager
+def profiled(output_path: Optional[Path]):
+    """Run the block under cProfile when `output_path` is set; dump stats there and log the top 25."""
+    if output_path is None:
+        yield
+        return
+    import cProfile
+    import io
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(output_path))
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(25)
+        logger.info(f"cProfile written to {output_path}\n{out.getvalue()}")
+
+
+# Process-wide registry
+metrics = Metrics()
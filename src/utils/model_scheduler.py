@@ -0,0 +1,150 @@
+"""
+Deadline-aware Whisper model selection.
+
+Keeps a measured real-time factor (RTF = processing seconds / audio seconds)
+per model and compute type in a small JSON file, and before each file picks
+the largest model — never above WHISPER_MODEL — whose estimate for the whole
+remaining backlog still finishes before WHISPER_DEADLINE. As the night goes
+on and the budget shrinks, later files are downgraded to smaller models.
+
+Several workers can share the file: `save()` takes a lock, re-reads it and
+folds in only the samples this process measured since, so nobody's samples
+are overwritten.
+"""
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.config.settings import (
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_DEADLINE,
+    WHISPER_MODEL,
+    WHISPER_RTF_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+# Largest to smallest; selection only ever moves down from WHISPER_MODEL
+MODEL_LADDER = ['large-v3', 'medium', 'small', 'base', 'tiny']
+
+# Starting guesses for CPU int8 with beam_size=5, replaced by measurements
+# after the first files of each model have been transcribed.
+DEFAULT_RTF = {
+    'large-v3': 1.0,
+    'medium': 0.5,
+    'small': 0.2,
+    'base': 0.08,
+    'tiny': 0.05,
+}
+
+# Weight of the newest sample in the moving average
+_EMA_ALPHA = 0.3
+
+# Rough bytes per second of compressed speech, when the container can't be probed
+_FALLBACK_BYTES_PER_SECOND = 16_000
+
+
+def audio_duration(audio_path: Path) -> float:
+    """Duration in seconds, via PyAV (installed with faster-whisper) or a size estimate."""
+    try:
+        import av
+        with av.open(str(audio_path)) as container:
+            if container.duration:
+                return container.duration / av.time_base
+    except Exception:
+        pass
+    return audio_path.stat().st_size / _FALLBACK_BYTES_PER_SECOND
+
+
+def next_deadline(now: datetime, deadline: str = WHISPER_DEADLINE) -> Optional[datetime]:
+    """Next occurrence of the HH:MM deadline after `now` (None if not configured)."""
+    if not deadline:
+        return None
+    hour, minute = (int(part) for part in deadline.split(':'))
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return target
+
+
+class ModelScheduler:
+    def __init__(self, rtf_path: Path = WHISPER_RTF_PATH, deadline: Optional[datetime] = None,
+                 compute_type: str = WHISPER_COMPUTE_TYPE, max_model: str = WHISPER_MODEL):
+        self.rtf_path = Path(rtf_path)
+        self.deadline = deadline
+        self.compute_type = compute_type
+        if max_model in MODEL_LADDER:
+            self.ladder = MODEL_LADDER[MODEL_LADDER.index(max_model):]
+        else:
+            self.ladder = [max_model]  # custom model: nothing to downgrade to
+        self.measured: Dict[str, dict] = self._load()
+        self._unsaved: List[Tuple[str, float]] = []  # (key, rtf) recorded since the last save
+
+    def _load(self) -> Dict[str, dict]:
+        if not self.rtf_path.exists():
+            return {}
+        try:
+            return json.loads(self.rtf_path.read_text())
+        except ValueError:
+            logger.warning(f"Ignoring unreadable RTF table: {self.rtf_path}")
+            return {}
+
+    def _key(self, model: str) -> str:
+        return f"{model}/{self.compute_type}"
+
+    def rtf(self, model: str) -> float:
+        entry = self.measured.get(self._key(model))
+        if entry:
+            return entry['rtf']
+        return DEFAULT_RTF.get(model, 1.0)
+
+    def estimate(self, model: str, audio_seconds: float) -> float:
+        return audio_seconds * self.rtf(model)
+
+    def pick(self, backlog_seconds: float, now: Optional[datetime] = None) -> str:
+        """Largest model whose estimate for `backlog_seconds` of audio meets the deadline."""
+        if self.deadline is None:
+            return self.ladder[0]
+        budget = (self.deadline - (now or datetime.now())).total_seconds()
+        for model in self.ladder:
+            if self.estimate(model, backlog_seconds) <= budget:
+                return model
+        return self.ladder[-1]
+
+    def record(self, model: str, audio_seconds: Optional[float], seconds: float):
+        """Fold one measured transcription (excluding model load time) into the table."""
+        if not audio_seconds or audio_seconds <= 0:
+            return
+        sample = seconds / audio_seconds
+        _fold(self.measured, self._key(model), sample)
+        self._unsaved.append((self._key(model), sample))
+
+    def save(self):
+        """Merge this process's new samples into the file (other workers may have saved since)."""
+        lock_path = self.rtf_path.with_name(f".{self.rtf_path.name}.lock")
+        with open(lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            measured = self._load()
+            for key, sample in self._unsaved:
+                _fold(measured, key, sample)
+            # Readers don't lock: they must only ever see a complete file
+            tmp = self.rtf_path.with_name(f".{self.rtf_path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(measured, indent=2, sort_keys=True))
+            os.replace(tmp, self.rtf_path)
+        self.measured = measured
+        self._unsaved = []
+
+
+def _fold(measured: Dict[str, dict], key: str, sample: float):
+    entry = measured.get(key)
+    if entry:
+        entry['rtf'] = round((1 - _EMA_ALPHA) * entry['rtf'] + _EMA_ALPHA * sample, 4)
+        entry['samples'] += 1
+    else:
+        measured[key] = {'rtf': round(sample, 4), 'samples': 1}
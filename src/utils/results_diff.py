@@ -0,0 +1,143 @@
+"""
+Structured diff between two cron_runner result snapshots.
+
+The weekly payload is mostly the same lists as last week, so cron_runner
+sends a delta against the previous `latest_results.json` and only every
+RESULTS_FULL_SNAPSHOT_DAYS a full snapshot. Delta rules, applied per check:
+
+- scalars (counts, duration_ms, ...) are copied as they are;
+- dicts are diffed key by key;
+- lists become `{"added": [...], "removed": [...]}` (plus `"changed"` for
+  lists of dicts with an identity key such as `name`), and are left out
+  entirely when nothing changed;
+- ranked lists (RANKED_LISTS, e.g. the top 10) are compared in order and
+  sent whole when anything changed, a reordering included;
+- lists of what happened during the run (EVENT_LISTS and every check's
+  `errors`) are always sent whole, even when last run's were the same.
+
+List diffs are hash-based, O(len(old) + len(new)), so the naming-issue lists
+with tens of thousands of paths diff in milliseconds.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+# Fields that identify an item in a list of dicts, tried in order
+IDENTITY_KEYS = ('name', 'path', 'folder')
+
+# Lists whose order is the ranking, by (check, key, ...)
+RANKED_LISTS = {
+    ('folder_sizes', 'top_10'),
+    ('folder_sizes', 'largest_subfolders'),
+    ('folder_sizes', 'growth', 'fastest'),
+}
+# Lists of this run's events rather than the state of BASE_DIR: the same
+# folder removed or the same file failing two runs in a row is still news
+EVENT_LISTS = {
+    ('autoremoved_folders', 'folders'),
+    ('archived_consultas', 'archived'),
+    ('archived_consultas', 'already_archived'),
+    ('archived_consultas', 'failed'),
+    ('document_scans', 'failed'),
+    ('document_scans', 'outputs'),
+    ('image_compaction', 'failed'),
+}
+
+_UNCHANGED = object()
+
+
+def _identity_key(items: list) -> Optional[str]:
+    for key in IDENTITY_KEYS:
+        if all(isinstance(item, dict) and key in item for item in items):
+            return key
+    return None
+
+
+def _canonical(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+def diff_lists(old: list, new: list):
+    """Added/removed (and changed, for keyed dicts) items; `_UNCHANGED` if equal as sets."""
+    key = _identity_key(old + new) if (old or new) else None
+    if key:
+        before = {item[key]: item for item in old}
+        after = {item[key]: item for item in new}
+        delta = {
+            'added': [item for k, item in after.items() if k not in before],
+            'removed': [item for k, item in before.items() if k not in after],
+            'changed': [item for k, item in after.items() if k in before and before[k] != item],
+        }
+    else:
+        before = {_canonical(item) for item in old}
+        after = {_canonical(item) for item in new}
+        delta = {
+            'added': [item for item in new if _canonical(item) not in before],
+            'removed': [item for item in old if _canonical(item) not in after],
+        }
+    if not any(delta.values()):
+        return _UNCHANGED
+    return {name: items for name, items in delta.items() if items}
+
+
+def diff_values(old: Any, new: Any, path: tuple = ()):
+    """Delta of `new` against `old`; `path` is (check, key, ...) of where they sit in the results."""
+    if isinstance(new, dict) and isinstance(old, dict):
+        delta = {}
+        for key, value in new.items():
+            sub = diff_values(old.get(key), value, path + (key,)) if key in old else value
+            if sub is not _UNCHANGED:
+                delta[key] = sub
+        removed = [key for key in old if key not in new]
+        if removed:
+            delta['_removed_keys'] = removed
+        return delta
+    if isinstance(new, list) and (path in EVENT_LISTS or path[1:] == ('errors',)):
+        return new
+    if isinstance(new, list) and isinstance(old, list):
+        if path in RANKED_LISTS:
+            return _UNCHANGED if old == new else new
+        return diff_lists(old, new)
+    if isinstance(new, list):
+        return {'added': new} if new else _UNCHANGED
+    return new  # scalars (and type changes) are sent as they are
+
+
+def diff_results(previous: dict, current: dict) -> dict:
+    """Per-check delta of `current` against `previous` (both full snapshots)."""
+    checks = {}
+    for name, payload in current.get('checks', {}).items():
+        before = previous.get('checks', {}).get(name)
+        checks[name] = payload if before is None else diff_values(before, payload, (name,))
+    return checks
+
+
+def build_payload(previous: Optional[dict], current: dict, full_every_days: int, force_full: bool = False) -> dict:
+    """Webhook payload for `current`: a delta against `previous`, or a full snapshot when due.
+
+    Records `last_full_snapshot` in `current` so the next run knows when the
+    last full one went out.
+    """
+    now = datetime.fromisoformat(current['timestamp'])
+    last_full = previous.get('last_full_snapshot') if previous else None
+    full = (
+        force_full
+        or not previous
+        or not last_full
+        or previous.get('base_dir') != current.get('base_dir')
+        or now - datetime.fromisoformat(last_full) >= timedelta(days=full_every_days)
+    )
+    if full:
+        current['last_full_snapshot'] = current['timestamp']
+        return dict(current, snapshot='full')
+
+    current['last_full_snapshot'] = last_full
+    payload = {key: value for key, value in current.items() if key != 'checks'}
+    payload.update({
+        'snapshot': 'delta',
+        'since': previous['timestamp'],
+        'checks': diff_results(previous, current),
+    })
+    return payload
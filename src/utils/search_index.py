@@ -0,0 +1,202 @@
+"""
+Full-text search over transcripts and relatórios (SQLite FTS5).
+
+`transcribe_and_save` and `summarize_and_save` call `index_sidecar()` after
+writing, so the index stays current without rescanning; `rebuild()` walks the
+ATENDIMENTO folders once to pick up sidecars written before the index existed
+(or by another machine). Queries are ranked with bm25 and return the client
+folder and a snippet around the match.
+
+The tokenizer folds accents and case, so "previdenciario" finds
+"previdenciário"; punctuated numbers such as a CPF are matched as a phrase of
+their digit groups.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import List, Optional
+
+from src.config.settings import (
+    ATENDIMENTO_DIR_NAME,
+    BASE_DIR,
+    EXCLUDED_DIRS,
+    REPORT_SUFFIX,
+    SEARCH_INDEX_PATH,
+    TRANSCRIPT_SUFFIX,
+)
+from src.utils.audio_transcriber import read_transcript
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+    body,
+    path UNINDEXED,
+    client UNINDEXED,
+    kind UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS files (
+    path     TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    doc_id   INTEGER NOT NULL
+);
+"""
+
+
+def sidecar_kind(path: Path) -> Optional[str]:
+    if path.name.endswith(TRANSCRIPT_SUFFIX):
+        return 'transcricao'
+    if path.name.endswith(REPORT_SUFFIX):
+        return 'relatorio'
+    return None
+
+
+class SearchIndex:
+    def __init__(self, db_path: Path = SEARCH_INDEX_PATH, base_dir: Path = BASE_DIR):
+        self.base_dir = Path(base_dir)
+        # Sidecars may be indexed from several processes (pool workers, watch mode)
+        self.conn = sqlite3.connect(str(db_path), timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _rel(self, path: Path) -> str:
+        return str(Path(path).relative_to(self.base_dir))
+
+    def add(self, sidecar: Path):
+        """Index (or re-index) one transcript/relatório."""
+        sidecar = Path(sidecar)
+        kind = sidecar_kind(sidecar)
+        if kind is None:
+            raise ValueError(f"Not a transcript or report: {sidecar}")
+        if kind == 'transcricao':
+            body = read_transcript(sidecar)
+        else:
+            body = sidecar.read_text(encoding='utf-8')
+        rel = self._rel(sidecar)
+        mtime_ns = sidecar.stat().st_mtime_ns
+
+        with self.conn:
+            self._delete(rel)
+            cur = self.conn.execute(
+                'INSERT INTO docs (body, path, client, kind) VALUES (?, ?, ?, ?)',
+                (body, rel, Path(rel).parts[0], kind),
+            )
+            self.conn.execute(
+                'INSERT INTO files (path, mtime_ns, doc_id) VALUES (?, ?, ?)',
+                (rel, mtime_ns, cur.lastrowid),
+            )
+
+    def remove(self, sidecar: Path):
+        with self.conn:
+            self._delete(self._rel(sidecar))
+
+    def _delete(self, rel: str):
+        row = self.conn.execute('SELECT doc_id FROM files WHERE path = ?', (rel,)).fetchone()
+        if row:
+            self.conn.execute('DELETE FROM docs WHERE rowid = ?', (row[0],))
+            self.conn.execute('DELETE FROM files WHERE path = ?', (rel,))
+
+    def rebuild(self, full: bool = False) -> dict:
+        """Index every sidecar under the ATENDIMENTO folders.
+
+        Unchanged files (same mtime) are skipped unless `full`; entries whose
+        file disappeared are dropped.
+        """
+        known = dict(self.conn.execute('SELECT path, mtime_ns FROM files'))
+        if full:
+            with self.conn:
+                self.conn.execute('DELETE FROM docs')
+                self.conn.execute('DELETE FROM files')
+            known = {}
+
+        stats = {'indexed': 0, 'unchanged': 0, 'removed': 0}
+        seen = set()
+        for sidecar in self._iter_sidecars():
+            rel = self._rel(sidecar)
+            seen.add(rel)
+            if known.get(rel) == sidecar.stat().st_mtime_ns:
+                stats['unchanged'] += 1
+                continue
+            try:
+                self.add(sidecar)
+                stats['indexed'] += 1
+            except (OSError, UnicodeDecodeError) as e:
+                logger.warning(f"Could not index {rel}: {e}")
+
+        with self.conn:
+            for rel in set(known) - seen:
+                self._delete(rel)
+                stats['removed'] += 1
+        self.conn.execute("INSERT INTO docs (docs) VALUES ('optimize')")
+        self.conn.commit()
+        return stats
+
+    def _iter_sidecars(self):
+        for client_dir in self.base_dir.iterdir():
+            if not client_dir.is_dir() or client_dir.name in EXCLUDED_DIRS:
+                continue
+            atendimento = client_dir / ATENDIMENTO_DIR_NAME
+            if not atendimento.is_dir():
+                continue
+            for root, _, files in os.walk(atendimento):
+                for name in files:
+                    if name.endswith(TRANSCRIPT_SUFFIX) or name.endswith(REPORT_SUFFIX):
+                        yield Path(root) / name
+
+    def search(self, query: str, limit: int = 20, client: Optional[str] = None) -> List[dict]:
+        """Ranked hits (best first) with client folder and a snippet."""
+        sql = (
+            "SELECT path, client, kind, snippet(docs, 0, '[', ']', '…', 16), bm25(docs) "
+            "FROM docs WHERE docs MATCH ?"
+        )
+        params = []
+        if client:
+            sql += ' AND client = ?'
+            params.append(client)
+        sql += ' ORDER BY bm25(docs) LIMIT ?'
+
+        try:
+            rows = self.conn.execute(sql, (query, *params, limit)).fetchall()
+        except sqlite3.OperationalError:
+            # Not valid FTS syntax (e.g. a CPF with dots and dash): match each term literally
+            rows = self.conn.execute(sql, (_quote_terms(query), *params, limit)).fetchall()
+        return [
+            {'path': path, 'client': client, 'kind': kind, 'snippet': snippet, 'score': round(-rank, 3)}
+            for path, client, kind, snippet, rank in rows
+        ]
+
+
+def _quote_terms(query: str) -> str:
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def index_sidecar(path: Path):
+    """Best-effort incremental update after a sidecar is written; never raises."""
+    try:
+        index = SearchIndex()
+        try:
+            index.add(path)
+        finally:
+            index.close()
+    except Exception as e:
+        logger.warning(f"Search index update failed for {path}: {e}")
+
+
+def move_sidecar(old_path: Path, new_path: Path):
+    """Best-effort index update after a sidecar was renamed; never raises."""
+    try:
+        index = SearchIndex()
+        try:
+            index.remove(old_path)
+            index.add(new_path)
+        finally:
+            index.close()
+    except Exception as e:
+        logger.warning(f"Search index update failed for {new_path}: {e}")
@@ -0,0 +1,153 @@
+"""
+Splitting one cron_runner run across several machines that mount BASE_DIR.
+
+    cron_runner.py --shard 0/3     # on each machine, with its own i
+    cron_runner.py --merge 3       # on one of them, once the shards are done
+
+Every top-level entry of BASE_DIR belongs to exactly one shard: the CRC-32
+of its name (NFC-normalised, since macOS and Linux clients can store the
+same accented name in different forms) modulo N. Unlike hash() that does not
+change between processes, so a client folder is walked by the same machine
+run after run, and that machine's file ledger keeps knowing its photos, as
+long as N stays the same.
+
+Checks that walk the client folders (`Check.sharded`) run on every shard over
+its own folders; the others work on shared state (junk folders, MODELOS,
+CONSULTAS) and run on shard 0 only. Each shard writes its results to
+`SHARD_RESULTS_DIR/shard-<i>-of-<N>.json` and posts nothing; the merge
+combines them check by check into the usual results. The directory must be
+on storage every machine mounts directly, like SHARED_JOBS_DIR.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import time
+import unicodedata
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from src.config.settings import AUTOREMOVE_DIRS, SHARD_MAX_AGE_HOURS, SHARD_POLL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(name: str, count: int) -> int:
+    """The shard (0..count-1) that owns the top-level entry `name`."""
+    return zlib.crc32(unicodedata.normalize('NFC', name).encode('utf-8')) % count
+
+
+class Shard:
+    def __init__(self, index: int, count: int):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"shard {index}/{count} is out of range (0 <= i < N)")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, text: str) -> 'Shard':
+        """Shard from "i/N", e.g. "0/3"."""
+        try:
+            index, count = (int(part) for part in text.split('/'))
+        except ValueError:
+            raise ValueError(f"expected i/N (e.g. 0/3), got {text!r}") from None
+        return cls(index, count)
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+    @property
+    def runs_global_checks(self) -> bool:
+        return self.index == 0
+
+    def owns(self, name: str) -> bool:
+        # Junk folders are removed by shard 0 before its own walks; the other
+        # shards may get there first, so they skip them too
+        return name not in AUTOREMOVE_DIRS and shard_of(name, self.count) == self.index
+
+    def path_in(self, directory: Path, name: str) -> Path:
+        """`directory/<stem>.shard-<i>-of-<N><suffix>`, for files a check writes per shard."""
+        path = Path(name)
+        return Path(directory) / f"{path.stem}.shard-{self.index}-of-{self.count}{path.suffix}"
+
+
+def partial_path(directory: Path, index: int, count: int) -> Path:
+    return Path(directory) / f"shard-{index}-of-{count}.json"
+
+
+def write_partial(results: dict, shard: Shard, directory: Path) -> Path:
+    """Save one shard's results (temp file + rename, so the merge never reads half a file)."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = partial_path(directory, shard.index, shard.count)
+    tmp = directory / f".{path.name}.{os.getpid()}.tmp"
+    data = dict(results, shard=str(shard), host=socket.gethostname())
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp, path)
+    return path
+
+
+def _read_fresh(path: Path, oldest: datetime):
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable {path.name}: {e}")
+        return None
+    if datetime.fromisoformat(data['timestamp']) < oldest:
+        return None  # left over from an earlier run
+    return data
+
+
+def wait_for_partials(count: int, directory: Path, wait_seconds: float = 0) -> List[dict]:
+    """All `count` shards' results, in shard order, waiting up to `wait_seconds` for missing ones.
+
+    Raises FileNotFoundError naming the shards still missing (or too old, see
+    SHARD_MAX_AGE_HOURS) when the wait is over.
+    """
+    oldest = datetime.now() - timedelta(hours=SHARD_MAX_AGE_HOURS)
+    deadline = time.monotonic() + wait_seconds
+    partials: Dict[int, dict] = {}
+    while True:
+        for index in range(count):
+            if index not in partials:
+                data = _read_fresh(partial_path(directory, index, count), oldest)
+                if data is not None:
+                    partials[index] = data
+        missing = [index for index in range(count) if index not in partials]
+        if not missing:
+            return [partials[index] for index in range(count)]
+        if time.monotonic() >= deadline:
+            raise FileNotFoundError(
+                f"missing results of shard(s) {', '.join(f'{i}/{count}' for i in missing)} in {directory}"
+            )
+        time.sleep(min(SHARD_POLL_SECONDS, max(0.0, deadline - time.monotonic())))
+
+
+def remove_partials(count: int, directory: Path):
+    """Delete the merged shards' results, so a later merge can't pick them up again."""
+    for index in range(count):
+        partial_path(directory, index, count).unlink(missing_ok=True)
+
+
+def merge_payloads(payloads: List[dict]) -> dict:
+    """One check's payloads from several shards, key by key: numbers are summed,
+    lists concatenated and dicts merged the same way; anything else (flags,
+    paths) is taken from the first shard that has it."""
+    merged = {}
+    for key in dict.fromkeys(key for payload in payloads for key in payload):
+        values = [payload[key] for payload in payloads if key in payload]
+        if all(isinstance(value, dict) for value in values):
+            merged[key] = merge_payloads(values)
+        elif all(isinstance(value, list) for value in values):
+            merged[key] = [item for value in values for item in value]
+        elif all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+            merged[key] = sum(values)
+        else:
+            merged[key] = values[0]
+    return merged
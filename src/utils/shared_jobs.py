@@ -0,0 +1,184 @@
+"""
+Shared job directory for distributed transcription workers.
+
+The coordinator (`audio_daily_runner.py --distribute`) drops one small JSON
+file per recording into `pending/`; any number of workers
+(`audio_daily_runner.py --worker`, one per machine) claim jobs by renaming
+them into `claimed/`. rename() is atomic on a single filesystem, so exactly
+one worker wins each job. While working, the claimant touches its claim file
+as a heartbeat; claims whose heartbeat is older than WORKER_STALE_SECONDS are
+renamed back to `pending/` by whoever notices first.
+
+Finished jobs move to `done/`, failed ones to `failed/` with the error, and
+the coordinator folds both back into its SQLite job queue.
+
+The directory must live on storage all machines mount directly (NFS/SMB),
+not on a sync client such as OneDrive: synced renames are not atomic across
+machines. Audio paths are stored relative to BASE_DIR so each machine can
+mount the client tree wherever it likes.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from src.config.settings import WORKER_HEARTBEAT_SECONDS, WORKER_STALE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+CLAIMED = 'claimed'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class SharedJobDir:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        for sub in (PENDING, CLAIMED, DONE, FAILED):
+            (self.root / sub).mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def job_id(rel_path: str) -> str:
+        return hashlib.sha1(rel_path.encode('utf-8')).hexdigest()[:20]
+
+    def _write(self, sub: str, job_id: str, data: dict):
+        # Write under a temp name first so readers never see half a file
+        target = self.root / sub / f"{job_id}.json"
+        tmp = self.root / sub / f".{job_id}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, target)
+
+    # --- coordinator -------------------------------------------------------
+
+    def enqueue(self, rel_path: str) -> bool:
+        """Add a job unless it is already pending or being worked on."""
+        job_id = self.job_id(rel_path)
+        name = f"{job_id}.json"
+        if (self.root / PENDING / name).exists() or (self.root / CLAIMED / name).exists():
+            return False
+        self._write(PENDING, job_id, {'audio': rel_path, 'enqueued_at': time.time()})
+        return True
+
+    def collect(self) -> Tuple[List[dict], List[dict]]:
+        """Remove and return the (done, failed) job records."""
+        collected = []
+        for sub in (DONE, FAILED):
+            records = []
+            for path in (self.root / sub).glob('*.json'):
+                try:
+                    records.append(json.loads(path.read_text(encoding='utf-8')))
+                    path.unlink()
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping unreadable job record {path}: {e}")
+            collected.append(records)
+        return collected[0], collected[1]
+
+    def counts(self) -> dict:
+        return {sub: sum(1 for _ in (self.root / sub).glob('*.json'))
+                for sub in (PENDING, CLAIMED, DONE, FAILED)}
+
+    # --- workers -----------------------------------------------------------
+
+    def requeue_stale(self, stale_seconds: float = WORKER_STALE_SECONDS) -> int:
+        """Return claims whose heartbeat stopped to `pending/`. Returns how many."""
+        cutoff = time.time() - stale_seconds
+        requeued = 0
+        for path in (self.root / CLAIMED).glob('*.json'):
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                os.rename(path, self.root / PENDING / path.name)
+            except FileNotFoundError:
+                continue  # finished or requeued by someone else meanwhile
+            logger.warning(f"Re-queued stalled job {path.name}")
+            requeued += 1
+        return requeued
+
+    def claim(self, worker_id: str) -> Optional[dict]:
+        """Atomically take the oldest pending job, or None if there is none."""
+        for path in sorted((self.root / PENDING).glob('*.json'), key=_mtime_or_zero):
+            claimed = self.root / CLAIMED / path.name
+            try:
+                os.rename(path, claimed)
+                os.utime(claimed)  # rename keeps the old mtime: don't look stale
+            except FileNotFoundError:
+                continue  # another worker won this one
+            try:
+                job = json.loads(claimed.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.error(f"Dropping corrupt job file {path.name}: {e}")
+                claimed.unlink(missing_ok=True)
+                continue
+            job.update({'id': path.stem, 'worker': worker_id, 'claimed_at': time.time()})
+            self._write(CLAIMED, job['id'], job)
+            return job
+        return None
+
+    def heartbeat(self, job: dict) -> bool:
+        """Refresh the claim. False if the claim was lost (re-queued as stale)."""
+        try:
+            os.utime(self.root / CLAIMED / f"{job['id']}.json")
+            return True
+        except FileNotFoundError:
+            return False
+
+    def finish(self, job: dict, error: Optional[str] = None):
+        """Move a claimed job to `done/` (or `failed/` with the error)."""
+        claimed = self.root / CLAIMED / f"{job['id']}.json"
+        record = dict(job, finished_at=time.time())
+        if error is not None:
+            record['error'] = error
+        self._write(FAILED if error is not None else DONE, job['id'], record)
+        try:
+            owner = json.loads(claimed.read_text(encoding='utf-8')).get('worker')
+        except (OSError, ValueError):
+            owner = None
+        if owner == job['worker']:
+            claimed.unlink(missing_ok=True)
+        else:
+            # Re-queued as stale meanwhile; leave the new claimant's file alone
+            logger.warning(f"Claim on {job['audio']} was lost before finishing")
+
+
+class Heartbeat:
+    """Background thread that keeps a claim fresh while the job runs."""
+
+    def __init__(self, jobs: SharedJobDir, job: dict, interval: float = WORKER_HEARTBEAT_SECONDS):
+        self._jobs = jobs
+        self._job = job
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            if not self._jobs.heartbeat(self._job):
+                logger.warning(f"Lost claim on {self._job['audio']}")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _mtime_or_zero(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
@@ -0,0 +1,146 @@
+"""
+Time series of per-folder size, file count and last activity.
+
+Every cron run appends one sample per top-level client folder (bytes, files,
+newest file mtime) plus one for the disk holding BASE_DIR, keyed by day, so
+a second run on the same day replaces that day's sample. Rows are a few
+integers in a WITHOUT ROWID table keyed by (folder, day): a year of weekly
+runs over a thousand folders is about 2 MB, and the growth queries below are
+index range scans that never touch BASE_DIR.
+
+The forecast is a least-squares line over the disk's used bytes in the
+window; `days_until_full` is where that line meets the disk's capacity.
+"""
+from __future__ import annotations
+
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SECONDS_PER_DAY = 86400
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS samples (
+    folder_id     INTEGER NOT NULL,
+    day           INTEGER NOT NULL,
+    bytes         INTEGER NOT NULL,
+    files         INTEGER NOT NULL,
+    last_activity INTEGER NOT NULL,
+    PRIMARY KEY (folder_id, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS samples_day ON samples (day);
+CREATE TABLE IF NOT EXISTS disk (
+    day   INTEGER PRIMARY KEY,
+    total INTEGER NOT NULL,
+    used  INTEGER NOT NULL
+);
+"""
+
+
+def today(now: Optional[float] = None) -> int:
+    """Days since the epoch, the time axis of the store."""
+    return int((time.time() if now is None else now) // SECONDS_PER_DAY)
+
+
+class SizeHistory:
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _folder_ids(self, names) -> Dict[str, int]:
+        self.conn.executemany('INSERT OR IGNORE INTO folders (name) VALUES (?)', [(name,) for name in names])
+        return {row['name']: row['id'] for row in self.conn.execute('SELECT id, name FROM folders')}
+
+    def record(self, folder_stats: Dict[str, Dict[str, int]], disk_path: Optional[Path] = None,
+               day: Optional[int] = None):
+        """Append today's sample of every folder (and of the disk under `disk_path`)."""
+        day = today() if day is None else day
+        with self.conn:
+            ids = self._folder_ids(folder_stats)
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO samples (folder_id, day, bytes, files, last_activity) VALUES (?, ?, ?, ?, ?)',
+                [(ids[name], day, s['bytes'], s['files'], s['last_activity']) for name, s in folder_stats.items()],
+            )
+            if disk_path is not None:
+                usage = shutil.disk_usage(disk_path)
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO disk (day, total, used) VALUES (?, ?, ?)',
+                    (day, usage.total, usage.used),
+                )
+
+    def fastest_growing(self, days: int = 90, limit: int = 10, now_day: Optional[int] = None) -> List[dict]:
+        """Folders with the largest byte growth between their first and last sample in the last `days`."""
+        since = (today() if now_day is None else now_day) - days
+        rows = self.conn.execute(
+            """
+            WITH bounds AS (
+                SELECT folder_id, MIN(day) AS first_day, MAX(day) AS last_day
+                FROM samples WHERE day >= ? GROUP BY folder_id
+            )
+            SELECT f.name, b.first_day, b.last_day,
+                   a.bytes AS start_bytes, z.bytes AS end_bytes, z.bytes - a.bytes AS growth_bytes,
+                   z.files - a.files AS growth_files, z.last_activity
+            FROM bounds b
+            JOIN samples a ON a.folder_id = b.folder_id AND a.day = b.first_day
+            JOIN samples z ON z.folder_id = b.folder_id AND z.day = b.last_day
+            JOIN folders f ON f.id = b.folder_id
+            WHERE b.last_day > b.first_day
+            ORDER BY growth_bytes DESC
+            LIMIT ?
+            """,
+            (since, limit),
+        ).fetchall()
+        return [
+            dict(row, bytes_per_day=round(row['growth_bytes'] / (row['last_day'] - row['first_day'])))
+            for row in rows
+        ]
+
+    def folder_history(self, name: str) -> List[dict]:
+        return [dict(row) for row in self.conn.execute(
+            'SELECT s.day, s.bytes, s.files, s.last_activity FROM samples s JOIN folders f ON f.id = s.folder_id '
+            'WHERE f.name = ? ORDER BY s.day',
+            (name,),
+        )]
+
+    def forecast(self, days: int = 90, now_day: Optional[int] = None) -> dict:
+        """Linear trend of the disk's used bytes over the last `days`, and when it reaches capacity."""
+        now_day = today() if now_day is None else now_day
+        rows = self.conn.execute(
+            'SELECT day, total, used FROM disk WHERE day >= ? ORDER BY day', (now_day - days,)
+        ).fetchall()
+        if not rows:
+            return {'samples': 0}
+        latest = rows[-1]
+        result = {
+            'samples': len(rows),
+            'since_day': rows[0]['day'],
+            'total_bytes': latest['total'],
+            'used_bytes': latest['used'],
+            'bytes_per_day': None,
+            'days_until_full': None,
+        }
+        if len(rows) < 2:
+            return result
+
+        n = len(rows)
+        mean_x = sum(r['day'] for r in rows) / n
+        mean_y = sum(r['used'] for r in rows) / n
+        var_x = sum((r['day'] - mean_x) ** 2 for r in rows)
+        slope = sum((r['day'] - mean_x) * (r['used'] - mean_y) for r in rows) / var_x
+        result['bytes_per_day'] = round(slope)
+        if slope > 0:
+            # Where the fitted line (not the last sample) crosses the capacity
+            fitted_now = mean_y + slope * (now_day - mean_x)
+            result['days_until_full'] = max(0, round((latest['total'] - fitted_now) / slope))
+        return result
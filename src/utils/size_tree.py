@@ -0,0 +1,164 @@
+"""
+Aggregated size tree of BASE_DIR, the `du` of every folder from one walk.
+
+Each directory node carries the totals of everything below it: apparent
+bytes, file count, allocated bytes (st_blocks, so OneDrive files that are
+only online count as ~0) and the newest file mtime. Files themselves are not
+kept, only folders, so the whole tree of a large BASE_DIR fits in a few MB.
+A file with several hardlinks is counted once, at the first path found.
+
+`largest()` is a heap-based top-K over the nodes at a given depth (or at any
+depth), `merge()` joins the trees of sharded runs (each over its own client
+folders), and `dump()`/`load()` store the tree as gzip'd compact JSON so it
+can be queried again (pwa.py du) without rescanning:
+
+    [name, bytes, files, blocks, last_activity, [children...]]
+"""
+from __future__ import annotations
+
+import gzip
+import heapq
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('bytes', 'files', 'blocks', 'last_activity')
+
+
+class SizeNode:
+    __slots__ = ('name', 'bytes', 'files', 'blocks', 'last_activity', 'children')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.bytes = 0
+        self.files = 0
+        self.blocks = 0  # allocated bytes
+        self.last_activity = 0  # newest file mtime, epoch seconds
+        self.children: List[SizeNode] = []
+
+    def add(self, other: 'SizeNode'):
+        self.bytes += other.bytes
+        self.files += other.files
+        self.blocks += other.blocks
+        self.last_activity = max(self.last_activity, other.last_activity)
+
+    def child(self, name: str) -> Optional['SizeNode']:
+        return next((c for c in self.children if c.name == name), None)
+
+    def find(self, rel_path: str) -> Optional['SizeNode']:
+        node = self
+        for part in Path(rel_path).parts:
+            node = node.child(part)
+            if node is None:
+                return None
+        return node
+
+    def walk(self, prefix: str = '', depth: int = 0) -> Iterator[Tuple[str, int, 'SizeNode']]:
+        """(relative path, depth, node) for this node and everything below it."""
+        yield prefix, depth, self
+        for child in self.children:
+            yield from child.walk(os.path.join(prefix, child.name) if prefix else child.name, depth + 1)
+
+    def to_list(self) -> list:
+        return [self.name, self.bytes, self.files, self.blocks, self.last_activity,
+                [child.to_list() for child in self.children]]
+
+    @classmethod
+    def from_list(cls, data: list) -> 'SizeNode':
+        node = cls(data[0])
+        node.bytes, node.files, node.blocks, node.last_activity = data[1:5]
+        node.children = [cls.from_list(child) for child in data[5]]
+        return node
+
+
+class TreeScanner:
+    def __init__(self):
+        self.items_scanned = 0
+        self._seen_inodes = set()
+
+    def scan(self, path: Path, skip: Iterable[str] = (),
+             include: Optional[Callable[[str], bool]] = None) -> SizeNode:
+        """Size tree of `path`; top-level directories named in `skip` are left out,
+        and so are top-level entries for which `include(name)` is false."""
+        self._seen_inodes.clear()
+        return self._scan(str(path), os.path.basename(str(path).rstrip(os.sep)), set(skip), include)
+
+    def _scan(self, path: str, name: str, skip=(), include=None) -> SizeNode:
+        node = SizeNode(name)
+        try:
+            entries = list(os.scandir(path))
+        except OSError as e:
+            logger.warning(f"Cannot list {path}: {e}")
+            return node
+        for entry in entries:
+            if include is not None and not include(entry.name):
+                continue
+            self.items_scanned += 1
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in skip:
+                        continue
+                    child = self._scan(entry.path, entry.name)
+                    node.children.append(child)
+                    node.add(child)
+                elif entry.is_file():
+                    st = entry.stat()
+                    if st.st_nlink > 1:
+                        key = (st.st_dev, st.st_ino)
+                        if key in self._seen_inodes:
+                            continue
+                        self._seen_inodes.add(key)
+                    node.bytes += st.st_size
+                    node.files += 1
+                    # st_blocks is in 512-byte units; not available on Windows
+                    node.blocks += st.st_blocks * 512 if hasattr(st, 'st_blocks') else st.st_size
+                    node.last_activity = max(node.last_activity, int(st.st_mtime))
+            except OSError as e:
+                logger.warning(f"Cannot stat {entry.path}: {e}")
+        return node
+
+
+def largest(tree: SizeNode, k: int = 10, depth: Optional[int] = None, key: str = 'bytes',
+            under: str = '') -> List[Tuple[str, SizeNode]]:
+    """Top `k` folders by `key` at `depth` below `under` (any depth if None), largest first."""
+    start = tree.find(under) if under else tree
+    if start is None:
+        return []
+    candidates = (
+        (os.path.join(under, path) if under else path, node)
+        for path, level, node in start.walk()
+        if level > 0 and (depth is None or level == depth)
+    )
+    return heapq.nlargest(k, candidates, key=lambda item: getattr(item[1], key))
+
+
+def merge(trees: Iterable[SizeNode], name: str = '') -> SizeNode:
+    """One tree from trees of disjoint parts of the same folder (cron_runner.py --merge)."""
+    root = SizeNode(name)
+    for tree in trees:
+        root.add(tree)
+        root.children.extend(tree.children)
+    root.children.sort(key=lambda child: child.name)
+    return root
+
+
+def dump(tree: SizeNode, path: Path, root: str = ''):
+    """Write the tree as gzip'd compact JSON (temp file + rename)."""
+    path = Path(path)
+    tmp = path.with_name(f'.{path.name}.tmp')
+    data = {'root': root, 'scanned_at': datetime.now().isoformat(timespec='seconds'), 'tree': tree.to_list()}
+    with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=6) as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def load(path: Path) -> Tuple[SizeNode, dict]:
+    """(tree, header with `root` and `scanned_at`) from a dump()."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        data = json.load(f)
+    return SizeNode.from_list(data.pop('tree')), data
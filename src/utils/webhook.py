@@ -0,0 +1,147 @@
+"""
+Webhook delivery shared by cron_runner.py and audio_daily_runner.py.
+
+Payloads are POSTed as JSON (gzip-compressed unless WEBHOOK_GZIP=0) over a
+pooled requests session that retries connection errors and 429/5xx answers
+with exponential backoff. A payload that still cannot be delivered is written
+to WEBHOOK_OUTBOX_DIR and re-sent, oldest first, before the next delivery, so
+a down N8N instance delays a report instead of losing it. A payload left
+claimed by a runner that was killed mid-POST goes back in the outbox once
+the claim is older than any delivery could take.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from src.config.settings import (
+    WEBHOOK_GZIP,
+    WEBHOOK_OUTBOX_DIR,
+    WEBHOOK_OUTBOX_MAX,
+    WEBHOOK_RETRIES,
+    WEBHOOK_TIMEOUT_SECONDS,
+    WEBHOOK_URL,
+)
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Longest a delivery can take: every attempt timing out plus the backoff, with margin
+_SENDING_STALE_SECONDS = WEBHOOK_TIMEOUT_SECONDS * (WEBHOOK_RETRIES + 1) + 60
+
+_session: Optional["requests.Session"] = None
+
+
+def get_session() -> "requests.Session":
+    """Process-wide session, so retries and later posts reuse the connection."""
+    global _session
+    if _session is None:
+        # requests/urllib3 are imported on first delivery, not at runner startup
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=WEBHOOK_RETRIES,
+            backoff_factor=2,  # 0s, 4s, 8s...
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'POST'}),
+            raise_on_status=False,
+        )
+        _session = requests.Session()
+        _session.mount('https://', HTTPAdapter(max_retries=retry))
+        _session.mount('http://', HTTPAdapter(max_retries=retry))
+    return _session
+
+
+def post_json(data: dict, url: str = WEBHOOK_URL) -> bool:
+    """POST `data` once (with the session's retries). True on a 2xx answer."""
+    body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    if WEBHOOK_GZIP:
+        body = gzip.compress(body)
+        headers['Content-Encoding'] = 'gzip'
+    import requests
+
+    try:
+        response = get_session().post(url, data=body, headers=headers, timeout=WEBHOOK_TIMEOUT_SECONDS)
+    except requests.RequestException as e:
+        logger.error(f"Webhook POST failed: {e}")
+        return False
+    if response.ok:
+        logger.info(f"Webhook POST success: HTTP {response.status_code} ({len(body)} bytes)")
+        return True
+    logger.error(f"Webhook POST failed: HTTP {response.status_code}, body: {response.text[:500]}")
+    return False
+
+
+def _save_to_outbox(data: dict, url: str, source: str):
+    WEBHOOK_OUTBOX_DIR.mkdir(parents=True, exist_ok=True)
+    path = WEBHOOK_OUTBOX_DIR / f"{time.time_ns()}-{source}.json"
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps({'url': url, 'payload': data}, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp, path)
+    metrics.incr('webhook.outbox_queued')
+    logger.warning(f"Webhook payload kept in outbox: {path.name}")
+
+    queued = sorted(WEBHOOK_OUTBOX_DIR.glob('*.json'))
+    for old in queued[:max(0, len(queued) - WEBHOOK_OUTBOX_MAX)]:
+        logger.error(f"Webhook outbox full, dropping {old.name}")
+        old.unlink(missing_ok=True)
+
+
+def flush_outbox() -> int:
+    """Re-send queued payloads, oldest first; stops at the first failure. Returns how many went out."""
+    if not WEBHOOK_OUTBOX_DIR.is_dir():
+        return 0
+    for sending in WEBHOOK_OUTBOX_DIR.glob('*.sending'):
+        try:
+            if time.time() - sending.stat().st_mtime > _SENDING_STALE_SECONDS:
+                logger.warning(f"Re-queueing {sending.name}, claimed by a runner that did not finish")
+                os.rename(sending, sending.with_suffix('.json'))
+        except FileNotFoundError:
+            continue
+    sent = 0
+    for path in sorted(WEBHOOK_OUTBOX_DIR.glob('*.json')):
+        # Claim the file so a concurrent runner does not send it twice; the
+        # mtime marks when, so an abandoned claim can be told apart
+        sending = path.with_suffix('.sending')
+        try:
+            os.rename(path, sending)
+            os.utime(sending)
+        except FileNotFoundError:
+            continue
+        try:
+            entry = json.loads(sending.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logger.error(f"Dropping unreadable outbox entry {path.name}: {e}")
+            sending.unlink(missing_ok=True)
+            continue
+        if not post_json(entry['payload'], entry['url']):
+            os.rename(sending, path)
+            break
+        sending.unlink(missing_ok=True)
+        sent += 1
+    if sent:
+        metrics.incr('webhook.outbox_flushed', sent)
+        logger.info(f"Delivered {sent} payload(s) from the webhook outbox")
+    return sent
+
+
+def deliver(data: dict, source: str, url: str = WEBHOOK_URL) -> bool:
+    """Flush the outbox, then POST `data`; keep it in the outbox if that fails.
+
+    If older payloads are still stuck the endpoint is down: `data` is queued
+    behind them without another round of retries, keeping delivery in order.
+    `source` (e.g. "cron_runner") only tags the outbox file name.
+    """
+    flush_outbox()
+    backlog = WEBHOOK_OUTBOX_DIR.is_dir() and any(WEBHOOK_OUTBOX_DIR.glob('*.json'))
+    if not backlog and post_json(data, url):
+        return True
+    _save_to_outbox(data, url, source)
+    return False
@@ -0,0 +1,67 @@
+"""
+Warm Whisper model server over a Unix socket.
+
+`audio_daily_runner.py --serve` loads the model once and keeps it resident;
+`audio_transcriber.transcribe()` sends jobs here when the socket answers and
+falls back to loading the model in-process when it does not.
+
+Protocol: one JSON line per connection in each direction.
+  request:  {"audio": "/abs/path/to/file.m4a", "model": "small"}
+  response: {"ok": true, "text": ..., "seconds": ..., "warm": ..., ...}
+            {"ok": false, "error": "..."}
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import signal
+import socketserver
+import threading
+import time
+from pathlib import Path
+
+from src.config.settings import WHISPER_MODEL, WHISPER_SOCKET
+from src.utils import audio_transcriber
+
+logger = logging.getLogger(__name__)
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            audio = Path(request["audio"])
+            if not audio.is_file():
+                raise FileNotFoundError(f"No such audio file: {audio}")
+            logger.info(f"Server transcribing: {audio}")
+            model_name = request.get("model") or WHISPER_MODEL
+            reply = {"ok": True, **audio_transcriber.transcribe_local(audio, model_name)}
+        except Exception as e:
+            logger.exception("Server job failed")
+            reply = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+def serve(socket_path: str = WHISPER_SOCKET):
+    """Load the model and answer transcription jobs until SIGTERM/Ctrl-C."""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # stale socket from a previous run
+
+    started = time.perf_counter()
+    audio_transcriber._get_model()
+    logger.info(f"Model server ready in {time.perf_counter() - started:.1f}s on {socket_path}")
+
+    # One job at a time: the model is a single shared CPU/GPU resource
+    server = socketserver.UnixStreamServer(socket_path, _JobHandler)
+    os.chmod(socket_path, 0o600)  # transcripts carry client data
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        logger.info("Model server stopped")